@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the Personal Finance Tracker
+Serves the same Flask routes from an asyncio server (uvicorn, hypercorn):
+connections, keep-alive and request/response I/O live on the event loop,
+so one process can hold thousands of idle dashboard connections, while the
+Flask views themselves (and their SQLite queries) run on bounded thread
+pools:
+
+    reads   GET/HEAD/OPTIONS, DB_EXECUTOR_THREADS threads (default: the
+            connection pool size), so queries never wait for a connection
+    writes  everything else, one thread: SQLite takes one writer at a time,
+            and queueing writers here keeps them from holding read threads
+
+At most MAX_PENDING_REQUESTS views may be queued or running at once; past
+that the server answers 503 with Retry-After instead of queueing without
+bound. Every response, including ETag and 304 handling, comes from the
+Flask app unchanged, except the /api/events stream: it is served on the
+event loop itself (a coroutine per client, woken by the event broker), so
+open dashboards cost no threads.
+
+Usage: python asgi_app.py [--host 0.0.0.0] [--port 5000]
+   or: uvicorn asgi_app:app --port 5000
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import events
+import simple_backend
+
+DB_EXECUTOR_THREADS = int(os.environ.get('DB_EXECUTOR_THREADS', simple_backend.DB_POOL_SIZE))
+MAX_PENDING_REQUESTS = int(os.environ.get('MAX_PENDING_REQUESTS', 256))
+# Room for a bulk insert of MAX_BULK_ROWS rows
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', 32 * 1024 * 1024))
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+EVENTS_PATH = '/api/events'
+EVENT_STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+    (b'access-control-allow-origin', b'*')
+]
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ for one ASGI http scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    # WSGI carries the path as latin-1 decoded bytes
+    path = scope.get('raw_path') or scope['path'].encode('utf-8')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': path.split(b'?', 1)[0].decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif key != 'CONTENT_LENGTH':
+            key = f'HTTP_{key}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def call_flask(flask_app, environ):
+    """Run one request through the Flask app; returns (status, headers, body)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    chunks = flask_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in started['headers']]
+    return started['status'], headers, body
+
+
+class FinanceASGI:
+    """ASGI application wrapping the Flask app with bounded read and write executors"""
+
+    def __init__(self, flask_app, read_threads=DB_EXECUTOR_THREADS, max_pending=MAX_PENDING_REQUESTS):
+        self.flask_app = flask_app
+        self.read_threads = max(read_threads, 1)
+        self.max_pending = max_pending
+        self.pending = 0
+        self.reads = None
+        self.writes = None
+
+    def start(self):
+        if self.reads is None:
+            self.reads = ThreadPoolExecutor(self.read_threads, thread_name_prefix='asgi-read')
+            self.writes = ThreadPoolExecutor(1, thread_name_prefix='asgi-write')
+
+    def stop(self):
+        for executor in (self.reads, self.writes):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self.reads = self.writes = None
+        simple_backend.reset_pool()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"unsupported ASGI scope type {scope['type']!r}")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await asyncio.get_running_loop().run_in_executor(None, simple_backend.init_db)
+                    self.start()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.stop)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            body += message.get('body', b'')
+            if len(body) > MAX_BODY_BYTES:
+                return False
+            if not message.get('more_body'):
+                return bytes(body)
+
+    async def http(self, scope, receive, send):
+        if scope['path'] == EVENTS_PATH and scope['method'] in ('GET', 'HEAD'):
+            await self.event_stream(scope, receive, send)
+            return
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        if body is False:
+            await self.send_json(send, 413, b'{"error": "Request body too large"}')
+            return
+        if self.pending >= self.max_pending:
+            await self.send_json(send, 503, b'{"error": "Server busy, retry shortly"}', [(b'retry-after', b'1')])
+            return
+
+        self.start()
+        executor = self.reads if scope['method'] in READ_METHODS else self.writes
+        self.pending += 1
+        try:
+            status, headers, content = await asyncio.get_running_loop().run_in_executor(
+                executor, call_flask, self.flask_app, wsgi_environ(scope, body)
+            )
+        finally:
+            self.pending -= 1
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else content})
+
+    async def event_stream(self, scope, receive, send, heartbeat=events.EVENT_HEARTBEAT_SECONDS):
+        """Serve /api/events until the client disconnects"""
+        if scope['method'] == 'HEAD':
+            await send({'type': 'http.response.start', 'status': 200, 'headers': EVENT_STREAM_HEADERS})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        last_event_id = dict(scope.get('headers', [])).get(b'last-event-id', b'').decode('latin-1') or \
+            parse_qs(scope.get('query_string', b'').decode('latin-1')).get('last_event_id', [None])[0]
+        broker = events.get_broker()
+        # Deliveries happen on writer threads; hop onto the loop to wake this client
+        subscription = broker.subscribe(last_event_id, wake=lambda: loop.call_soon_threadsafe(ready.set))
+        if subscription is None:
+            await self.send_json(send, 503, b'{"error": "Too many event subscribers, retry shortly"}',
+                                 [(b'retry-after', b'5')])
+            return
+        broker.start_polling(simple_backend.poll_data_versions)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': EVENT_STREAM_HEADERS})
+            await send({'type': 'http.response.body', 'body': events.STREAM_PREAMBLE, 'more_body': True})
+            while not disconnected.done():
+                ready.clear()
+                queued = subscription.drain()
+                if queued:
+                    chunk = b''.join(events.format_event(e) for e in queued)
+                else:
+                    woken = asyncio.ensure_future(ready.wait())
+                    done, _ = await asyncio.wait({woken, disconnected}, timeout=heartbeat,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    woken.cancel()
+                    if done:
+                        continue
+                    chunk = events.HEARTBEAT
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        except OSError:
+            pass
+        finally:
+            broker.unsubscribe(subscription)
+            disconnected.cancel()
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def send_json(self, send, status, content, extra_headers=()):
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(content)).encode())]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers + list(extra_headers)})
+        await send({'type': 'http.response.body', 'body': content})
+
+
+app = FinanceASGI(simple_backend.app)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the Personal Finance Tracker API over ASGI')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn is not installed (pip install uvicorn)")
+        sys.exit(1)
+    # Idle keep-alive connections cost a coroutine each, not a thread
+    uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=75, lifespan='on')
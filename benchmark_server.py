@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Server Throughput Benchmark
+Starts the API with serve.py against a throwaway database, once with the
+threaded single-process server and then with 1, 2, 4 ... gunicorn workers,
+and drives each with keep-alive HTTP clients running in separate processes.
+Prints requests/sec and latency percentiles per configuration; on a
+multi-core machine read throughput should grow with the worker count up to
+the number of cores.
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import simple_backend
+from serve import BaseApplication, cpu_count
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+READ_PATHS = [
+    '/api/expenses?limit=50',
+    '/api/networth/2024-06',
+    '/api/expenses/category/2024-06',
+    '/api/expenses/total/2024-06',
+    '/api/financial-health',
+    '/api/ai/stock-analysis'
+]
+
+
+def seed(db_dir, rows):
+    """finance_simple.db in db_dir with a year of expenses, assets and liabilities"""
+    simple_backend.reset_pool()
+    simple_backend.DB_PATH = os.path.join(db_dir, 'finance_simple.db')
+    simple_backend.init_db()
+    conn = simple_backend.get_db_connection()
+    data = []
+    for i in range(rows):
+        day = f'2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}'
+        data.append((1, random.choice(['Food', 'Rent', 'Travel']), f'seed {i}', random.uniform(10, 500), day, day[:7]))
+    conn.executemany(
+        'INSERT INTO expenses (user_id, category, description, amount, date, month) VALUES (?, ?, ?, ?, ?, ?)', data
+    )
+    conn.commit()
+    conn.close()
+    client = simple_backend.app.test_client()
+    client.post('/api/assets', json={'name': 'Savings', 'category': 'Cash', 'value': 50000, 'month': '2024-06'})
+    client.post('/api/liabilities', json={'name': 'Car Loan', 'category': 'Car Loan', 'amount': 20000, 'month': '2024-06'})
+    simple_backend.reset_pool()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_dir, port, workers, threads, fallback):
+    command = [sys.executable, os.path.join(HERE, 'serve.py'), '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--threads', str(threads)]
+    if fallback:
+        command.append('--fallback')
+    # serve.py opens finance_simple.db relative to its working directory
+    server = subprocess.Popen(command, cwd=db_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('server did not start')
+
+
+def client_process(port, connections, seconds, results):
+    """Keep-alive connections on threads; puts (latencies, errors) on `results`"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', random.choice(READ_PATHS))
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise OSError(response.status)
+                local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((latencies, errors[0]))
+
+
+def measure(port, concurrency, processes, seconds):
+    results = multiprocessing.Queue()
+    per_process = [concurrency // processes + (i < concurrency % processes) for i in range(processes)]
+    clients = [multiprocessing.Process(target=client_process, args=(port, n, seconds, results))
+               for n in per_process if n]
+    for c in clients:
+        c.start()
+    latencies, errors = [], 0
+    for _ in clients:
+        part, failed = results.get()
+        latencies.extend(part)
+        errors += failed
+    for c in clients:
+        c.join()
+    latencies = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    return {
+        'requests_per_sec': len(latencies) / seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'errors': errors
+    }
+
+
+def main():
+    cores = cpu_count()
+    parser = argparse.ArgumentParser(description='Benchmark serving modes')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--client-processes', type=int, default=max(cores // 2, 1))
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='*',
+                        default=sorted({1, cores, *[2 ** i for i in range(1, 8) if 2 ** i < cores]}))
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp(prefix='finance_serve_bench_')
+    seed(db_dir, args.rows)
+    configs = [('threaded', 1, True)]
+    if BaseApplication is not None:
+        configs += [('gunicorn', workers, False) for workers in args.workers]
+    else:
+        print("gunicorn is not installed: only the threaded server is measured")
+
+    print("Server throughput benchmark")
+    print("=" * 66)
+    print(f"{cores} CPUs, {args.concurrency} keep-alive connections from {args.client_processes} "
+          f"client processes, {args.seconds}s per run")
+    print("-" * 66)
+    print(f"{'server':<10} {'workers':>8} {'threads':>8} {'req/sec':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    baseline = None
+    try:
+        for name, workers, fallback in configs:
+            port = free_port()
+            server = start_server(db_dir, port, workers, args.threads, fallback)
+            try:
+                result = measure(port, args.concurrency, args.client_processes, args.seconds)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+            if name == 'gunicorn' and baseline is None:
+                baseline = result['requests_per_sec']
+            scaling = f"  x{result['requests_per_sec'] / baseline:.2f}" if name == 'gunicorn' and baseline else ''
+            print(f"{name:<10} {workers:>8} {args.threads:>8} {result['requests_per_sec']:>10.0f} "
+                  f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>7}{scaling}")
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Storage Profile Benchmark
+Measures report-style read throughput while writers keep inserting expenses,
+once per storage profile, against a throwaway copy of the schema
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import simple_backend
+from db_pool import STORAGE_PROFILES, apply_storage_profile
+
+READ_QUERIES = [
+    ('SELECT SUM(amount) as total FROM expenses WHERE user_id = ? AND month = ?', (1, '2024-06')),
+    ('SELECT SUM(value) as total FROM assets WHERE month = ?', ('2024-06',)),
+    ('SELECT month, SUM(amount) FROM expenses GROUP BY month', ()),
+    ('SELECT * FROM expenses WHERE user_id = ? ORDER BY date DESC LIMIT 50', (1,))
+]
+
+
+def connect(db_path, pragmas):
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    apply_storage_profile(conn, pragmas)
+    return conn
+
+
+def seed(db_path, pragmas, rows):
+    """Create the schema and insert some history to read from"""
+    simple_backend.reset_pool()
+    simple_backend.DB_PATH = db_path
+    simple_backend.init_db()
+    simple_backend.reset_pool()
+
+    conn = connect(db_path, pragmas)
+    data = []
+    for i in range(rows):
+        day = f'2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}'
+        data.append((1, 'Food', f'seed {i}', random.uniform(10, 500), day, day[:7]))
+    conn.executemany(
+        'INSERT INTO expenses (user_id, category, description, amount, date, month) VALUES (?, ?, ?, ?, ?, ?)',
+        data
+    )
+    conn.execute("INSERT INTO assets (name, category, value, month) VALUES ('Savings', 'Cash', 1000, '2024-06')")
+    conn.commit()
+    conn.close()
+
+
+def run_profile(name, seconds, readers, writers, rows):
+    pragmas = STORAGE_PROFILES[name]
+    tmp_dir = tempfile.mkdtemp(prefix='finance_bench_')
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    seed(db_path, pragmas, rows)
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def reader():
+        conn = connect(db_path, pragmas)
+        done = 0
+        while not stop.is_set():
+            sql, params = random.choice(READ_QUERIES)
+            try:
+                conn.execute(sql, params).fetchall()
+                done += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    counts['busy'] += 1
+        conn.close()
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        conn = connect(db_path, pragmas)
+        done = 0
+        while not stop.is_set():
+            try:
+                conn.execute(
+                    'INSERT INTO expenses (user_id, category, description, amount, date, month) VALUES (?, ?, ?, ?, ?, ?)',
+                    (1, 'Food', 'bench', 42.0, '2024-06-15', '2024-06')
+                )
+                conn.commit()
+                done += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                with lock:
+                    counts['busy'] += 1
+        conn.close()
+        with lock:
+            counts['writes'] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    os.rmdir(tmp_dir)
+
+    return {
+        'profile': name,
+        'reads_per_sec': counts['reads'] / seconds,
+        'writes_per_sec': counts['writes'] / seconds,
+        'busy_errors': counts['busy']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite storage profiles')
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=1)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--profiles', nargs='*', default=list(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    print("Storage profile benchmark")
+    print("=" * 60)
+    print(f"{args.readers} readers, {args.writers} writer(s), {args.seconds}s per profile, {args.rows} seed rows")
+    print("-" * 60)
+    print(f"{'profile':<10} {'reads/sec':>12} {'writes/sec':>12} {'busy errors':>12}")
+    for name in args.profiles:
+        result = run_profile(name, args.seconds, args.readers, args.writers, args.rows)
+        print(f"{result['profile']:<10} {result['reads_per_sec']:>12.0f} "
+              f"{result['writes_per_sec']:>12.0f} {result['busy_errors']:>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Shared test fixtures
+Tests that touch the backend get their own database file under tmp_path;
+DB_PATH is restored and the connection pool and response cache are emptied
+afterwards, so no test sees another's data or connections
+"""
+
+import pytest
+
+import simple_backend
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Point simple_backend at an empty database file; yields its path"""
+    path = str(tmp_path / 'finance.db')
+    simple_backend.reset_pool()
+    monkeypatch.setattr(simple_backend, 'DB_PATH', path)
+    simple_backend.response_cache.clear()
+    yield path
+    simple_backend.reset_pool()
+    simple_backend.response_cache.clear()
+
+
+@pytest.fixture
+def client(database):
+    """Test client on a freshly migrated database"""
+    simple_backend.init_db()
+    return simple_backend.app.test_client()
@@ -33,6 +33,24 @@ def create_deployment():
         "index.html",
         "styles.css", 
         "simple_backend.py",
+        "db_pool.py",
+        "migrations.py",
+        "rollups.py",
+        "response_cache.py",
+        "loan_engine.py",
+        "rate_simulator.py",
+        "debt_optimizer.py",
+        "investments.py",
+        "xirr.py",
+        "gold_prices.py",
+        "stock_universe.py",
+        "stock_universe.json",
+        "price_history.py",
+        "serve.py",
+        "asgi_app.py",
+        "events.py",
+        "bulk_insert.py",
+        "csv_import.py",
         "start_modular_app.py"
     ]
     
@@ -58,6 +76,9 @@ def create_deployment():
     # Create requirements.txt
     requirements_content = """flask==2.3.3
 flask-cors==4.0.0
+numpy>=1.24
+gunicorn>=21.2; platform_system != "Windows"
+uvicorn>=0.23
 """
     requirements_file = deploy_dir / "requirements.txt"
     requirements_file.write_text(requirements_content)
@@ -78,6 +99,11 @@ pip install -r requirements.txt
 python start_modular_app.py
 ```
 
+For production, serve the API with multiple worker processes:
+```bash
+python start_modular_app.py --production
+```
+
 ### 3. Access Application:
 - Backend: http://localhost:5000
 - Frontend: Opens automatically in browser
@@ -103,6 +129,23 @@ python start_modular_app.py
 - index.html (Main application interface)
 - styles.css (Professional styling)
 - simple_backend.py (Complete backend server)
+- db_pool.py (SQLite connection pool)
+- migrations.py (Versioned schema migrations, applied at startup)
+- rollups.py (Monthly report rollups and rebuild/check command)
+- response_cache.py (Report response cache)
+- loan_engine.py (Loan amortization schedules)
+- rate_simulator.py (Floating-rate Monte Carlo for loan closure strategies)
+- debt_optimizer.py (Multi-loan payoff planner)
+- investments.py (RD, chit and gold chit valuation)
+- xirr.py (vectorized XIRR for chit simulations and investment returns)
+- gold_prices.py (gold price history from GOLD_PRICE_CSV)
+- stock_universe.py, stock_universe.json (stock analysis data and screener)
+- price_history.py (daily price store and technical indicators)
+- serve.py (production server: python serve.py --workers 4)
+- asgi_app.py (asyncio server for many keep-alive clients: python asgi_app.py)
+- events.py (live change events pushed to the dashboards over /api/events)
+- bulk_insert.py (bulk JSON/NDJSON inserts: POST /api/expenses/bulk and friends)
+- csv_import.py (streaming bank statement CSV import with duplicate detection: POST /api/import/csv)
 - start_modular_app.py (Application launcher)
 - js/ (JavaScript functionality)
   - app.js (Core features)
@@ -111,7 +154,7 @@ python start_modular_app.py
 
 ## Troubleshooting:
 1. Ensure Python 3.7+ is installed
-2. Install dependencies: pip install flask flask-cors
+2. Install dependencies: pip install flask flask-cors numpy
 3. Run: python start_modular_app.py
 4. If port 5000 is busy, the app will find another port
 
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Bank statement CSV import for the Personal Finance Tracker
+Statements are read as a stream: bytes are decoded incrementally, parsed
+row by row and written in batches of IMPORT_BATCH_ROWS, each batch one
+transaction, so memory stays flat however large the file is and an
+import in progress never blocks other writers for long.
+
+A profile maps a bank's export layout onto expenses: which columns hold
+the date (and its formats), narration, amount (one signed column, or
+separate debit and credit columns) and optionally the category. Banks put
+account details above the header, so the header row is searched for.
+Debits become expenses with month = date[:7], as in POST /api/expenses;
+credits, blank and zero rows are skipped. A Dr or Cr after an amount marks
+the row a debit or a credit whatever the profile's sign convention. Extra profiles can be added in
+a JSON file (BANK_PROFILES_JSON, default bank_profiles.json next to this
+module) with the same keys as BANK_PROFILES.
+
+Duplicates are found with the content_hash column (owner, date, amount,
+description) and its index. The k-th identical row in a file is skipped
+when at least k such rows existed before the import, so re-importing a
+statement, or one that overlaps an earlier one, adds nothing twice while
+two identical purchases on the same day are both kept. Occurrences are
+counted over the last OCCURRENCE_DATES dates seen, which is exact for
+statements listed in date order (either direction).
+
+Progress is stored in import_jobs and updated in each batch's
+transaction, so every worker process reports the same numbers. An import
+that was interrupted can simply be run again: rows it already added are
+duplicates the second time.
+
+Usage: python csv_import.py statement.csv [--profile hdfc] [--db path] [--dry-run]
+"""
+
+import argparse
+import codecs
+import csv
+import json
+import os
+import sys
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+from bulk_insert import content_hash
+
+IMPORT_BATCH_ROWS = int(os.environ.get('IMPORT_BATCH_ROWS', 5000))
+OCCURRENCE_DATES = 31
+HEADER_SEARCH_ROWS = 50
+# Rows listed in a job's errors; the invalid count covers all of them
+MAX_JOB_ERRORS = 50
+DEFAULT_CATEGORY = 'Uncategorized'
+# Hashes per IN (...) lookup, well under SQLite's parameter limit
+HASH_LOOKUP_CHUNK = 500
+
+BANK_PROFILES_JSON = os.environ.get(
+    'BANK_PROFILES_JSON', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bank_profiles.json')
+)
+
+# Column names are matched ignoring case and surrounding spaces
+BANK_PROFILES = {
+    'generic': {
+        'description': 'date, description, amount[, category]; positive amounts are expenses',
+        'date': 'date', 'narration': 'description', 'amount': 'amount', 'debits': 'positive',
+        'category': 'category', 'date_formats': ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']
+    },
+    'signed': {
+        'description': 'date, description, amount; negative amounts are expenses (most card exports)',
+        'date': 'date', 'narration': 'description', 'amount': 'amount', 'debits': 'negative',
+        'date_formats': ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y']
+    },
+    'hdfc': {
+        'description': 'HDFC Bank account statement (delimited export)',
+        'date': 'Date', 'narration': 'Narration', 'debit': 'Withdrawal Amt.', 'credit': 'Deposit Amt.',
+        'date_formats': ['%d/%m/%y', '%d/%m/%Y']
+    },
+    'icici': {
+        'description': 'ICICI Bank detailed statement',
+        'date': 'Transaction Date', 'narration': 'Transaction Remarks',
+        'debit': 'Withdrawal Amount (INR )', 'credit': 'Deposit Amount (INR )',
+        'date_formats': ['%d/%m/%Y', '%d-%m-%Y']
+    },
+    'sbi': {
+        'description': 'State Bank of India account statement',
+        'date': 'Txn Date', 'narration': 'Description', 'debit': 'Debit', 'credit': 'Credit',
+        'date_formats': ['%d %b %Y', '%d/%m/%Y', '%d-%m-%Y']
+    },
+    'axis': {
+        'description': 'Axis Bank account statement',
+        'date': 'Tran Date', 'narration': 'PARTICULARS', 'debit': 'DR', 'credit': 'CR',
+        'date_formats': ['%d-%m-%Y', '%d/%m/%Y']
+    }
+}
+
+CURRENCY_MARKS = ('₹', 'INR', 'Rs.', 'Rs', '$')
+
+
+def load_profiles(path=None):
+    """Built-in profiles plus those in the profiles file, if there is one"""
+    profiles = dict(BANK_PROFILES)
+    path = path or BANK_PROFILES_JSON
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            profiles.update(json.load(f))
+    for name, profile in profiles.items():
+        if 'date' not in profile or 'narration' not in profile or not ('amount' in profile or 'debit' in profile):
+            raise ValueError(f'profile {name} needs date, narration and amount or debit columns')
+    return profiles
+
+
+def compile_profile(profile):
+    """The profile with its column names lowered, as read_statement() keys rows"""
+    compiled = dict(profile)
+    for key in ('date', 'narration', 'amount', 'debit', 'credit', 'category'):
+        if key in profile:
+            compiled[key] = profile[key].strip().lower()
+    compiled.setdefault('date_formats', ['%Y-%m-%d'])
+    return compiled
+
+
+def split_amount(value):
+    """(number, 'dr', 'cr' or None) from a statement amount ('1,250.00', '(45.10)', '300 Dr')
+
+    The number is None when the cell is blank; a Dr/Cr suffix is returned
+    apart from it rather than applied as a sign.
+    """
+    value = (value or '').strip()
+    for mark in CURRENCY_MARKS:
+        value = value.replace(mark, '')
+    value = value.replace(',', '').replace(' ', '')
+    side = value[-2:].lower()
+    if side in ('dr', 'cr'):
+        value = value[:-2]
+    else:
+        side = None
+    if not value or value in ('-', '--'):
+        return None, side
+    if value.startswith('(') and value.endswith(')'):
+        return -float(value[1:-1]), side
+    return float(value), side
+
+
+def parse_amount(value):
+    """Signed float from a statement amount, Dr negative and Cr positive; None when blank"""
+    amount, side = split_amount(value)
+    if amount is None or side is None:
+        return amount
+    return -abs(amount) if side == 'dr' else abs(amount)
+
+
+def parse_date(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f'unrecognised date {value!r}')
+
+
+def expense_amount(record, profile):
+    """The amount spent in a statement row, or None for credits and blank/zero rows"""
+    if 'debit' in profile:
+        debit = parse_amount(record.get(profile['debit']))
+        return abs(debit) if debit else None
+    amount, side = split_amount(record.get(profile['amount']))
+    if not amount:
+        return None
+    if side is not None:
+        spent = side == 'dr'
+    else:
+        spent = amount < 0 if profile.get('debits') == 'negative' else amount > 0
+    return abs(amount) if spent else None
+
+
+def normalize(record, profile, user_id):
+    """Expense parameters for a statement row; None to skip it; ValueError when it is malformed"""
+    raw_date = (record.get(profile['date']) or '').strip()
+    if not raw_date:
+        return None
+    day = parse_date(raw_date, profile['date_formats'])
+    try:
+        amount = expense_amount(record, profile)
+    except ValueError:
+        raise ValueError('unreadable amount')
+    if amount is None:
+        return None
+    amount = round(amount, 2)
+    description = ' '.join((record.get(profile['narration']) or '').split())
+    category = (record.get(profile['category']) or '').strip() if 'category' in profile else ''
+    return (user_id, category or DEFAULT_CATEGORY, description, amount, day, day[:7],
+            content_hash(user_id, day, amount, description))
+
+
+def read_statement(path, profile, progress):
+    """(line number, {column: value}) for every row after the header
+
+    progress['bytes_read'] follows the bytes consumed from the file.
+    """
+    wanted = {profile['date'], profile['narration']}
+    decoder = codecs.getincrementaldecoder(profile.get('encoding', 'utf-8-sig'))(errors='replace')
+
+    with open(path, 'rb') as f:
+        def lines():
+            for raw in f:
+                progress['bytes_read'] += len(raw)
+                yield decoder.decode(raw)
+
+        reader = csv.reader(lines(), delimiter=profile.get('delimiter', ','))
+        header = None
+        for row in reader:
+            cells = [cell.strip().lower() for cell in row]
+            if wanted <= set(cells):
+                header = cells
+                break
+            if reader.line_num > HEADER_SEARCH_ROWS:
+                break
+        if header is None:
+            raise ValueError(f"no header row with {profile['date']!r} and {profile['narration']!r} columns")
+        for row in reader:
+            yield reader.line_num, dict(zip(header, row))
+
+
+class OccurrenceWindow:
+    """How often each content hash was seen, and inserted, on the most recent dates"""
+
+    def __init__(self, dates=OCCURRENCE_DATES):
+        self.dates = dates
+        self.by_date = OrderedDict()
+
+    def counters(self, day):
+        """(seen, inserted) Counters of content hashes on `day`"""
+        if day not in self.by_date:
+            self.by_date[day] = (Counter(), Counter())
+            if len(self.by_date) > self.dates:
+                self.by_date.popitem(last=False)
+        return self.by_date[day]
+
+
+def existing_counts(conn, user_id, hashes):
+    """{content_hash: rows already stored} for the given hashes"""
+    hashes = list(set(hashes))
+    counts = {}
+    for start in range(0, len(hashes), HASH_LOOKUP_CHUNK):
+        chunk = hashes[start:start + HASH_LOOKUP_CHUNK]
+        rows = conn.execute(f'''
+            SELECT content_hash, COUNT(*) FROM expenses
+            WHERE user_id = ? AND content_hash IN ({', '.join('?' * len(chunk))})
+            GROUP BY content_hash
+        ''', [user_id] + chunk).fetchall()
+        counts.update((row[0], row[1]) for row in rows)
+    return counts
+
+
+def write_batch(conn, batch, window, stats, user_id, dry_run=False):
+    """Insert the rows of a batch that are not duplicates; the caller commits
+
+    A dry run only counts them: it writes nothing, so it never holds a write
+    transaction.
+    """
+    stored = existing_counts(conn, user_id, [values[6] for values in batch])
+    fresh, added = [], []
+    for values in batch:
+        seen, inserted = window.counters(values[4])
+        key = values[6]
+        seen[key] += 1
+        # Rows this import added in earlier batches are counted in `stored` too
+        earlier = 0 if dry_run else inserted[key]
+        if seen[key] <= stored.get(key, 0) - earlier:
+            stats['duplicates'] += 1
+        else:
+            fresh.append(values)
+            added.append((inserted, key))
+    # Counted once the whole batch is checked: `stored` predates it
+    for inserted, key in added:
+        inserted[key] += 1
+    stats['inserted'] += len(fresh)
+    if dry_run:
+        return
+    # Date order keeps the date and month indexes append-mostly
+    conn.executemany(
+        'INSERT INTO expenses (user_id, category, description, amount, date, month, content_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        sorted(fresh, key=lambda values: values[4])
+    )
+
+
+def import_csv(conn, path, profile_name='generic', user_id=1, job_id=None, dry_run=False,
+               batch_rows=IMPORT_BATCH_ROWS, profiles=None):
+    """Import one statement file; returns the counts. Commits after every batch; a dry run writes nothing"""
+    profiles = profiles or load_profiles()
+    if profile_name not in profiles:
+        raise ValueError(f"unknown profile {profile_name!r} (known: {', '.join(sorted(profiles))})")
+    profile = compile_profile(profiles[profile_name])
+    stats = {
+        'total_bytes': os.path.getsize(path), 'bytes_read': 0, 'rows_read': 0, 'inserted': 0,
+        'duplicates': 0, 'invalid': 0, 'skipped': 0, 'errors': []
+    }
+    window = OccurrenceWindow()
+    batch = []
+
+    def flush():
+        write_batch(conn, batch, window, stats, user_id, dry_run)
+        batch.clear()
+        if dry_run:
+            return
+        if job_id is not None:
+            save_progress(conn, job_id, stats, 'running')
+        conn.commit()
+
+    for line, record in read_statement(path, profile, stats):
+        stats['rows_read'] += 1
+        try:
+            values = normalize(record, profile, user_id)
+        except ValueError as e:
+            stats['invalid'] += 1
+            if len(stats['errors']) < MAX_JOB_ERRORS:
+                stats['errors'].append({'line': line, 'error': str(e)})
+            continue
+        if values is None:
+            stats['skipped'] += 1
+            continue
+        batch.append(values)
+        if len(batch) >= batch_rows:
+            flush()
+    flush()
+    return stats
+
+
+def create_job(conn, filename, profile_name, user_id=1, total_bytes=0):
+    cursor = conn.execute(
+        'INSERT INTO import_jobs (user_id, filename, profile, total_bytes) VALUES (?, ?, ?, ?)',
+        (user_id, filename, profile_name, total_bytes)
+    )
+    conn.commit()
+    return cursor.lastrowid
+
+
+def save_progress(conn, job_id, stats, status):
+    conn.execute('''
+        UPDATE import_jobs
+        SET status = ?, total_bytes = ?, bytes_read = ?, rows_read = ?, inserted = ?, duplicates = ?,
+            invalid = ?, skipped = ?, errors = ?,
+            finished_at = CASE WHEN ? = 'done' THEN CURRENT_TIMESTAMP END
+        WHERE id = ?
+    ''', (status, stats['total_bytes'], stats['bytes_read'], stats['rows_read'], stats['inserted'],
+          stats['duplicates'], stats['invalid'], stats['skipped'], json.dumps(stats['errors']), status, job_id))
+
+
+def job_summary(row):
+    """An import_jobs row as JSON, with percent done"""
+    job = dict(row)
+    job['errors'] = json.loads(job['errors'])
+    total = job['total_bytes']
+    if job['status'] == 'done':
+        job['percent'] = 100.0
+    else:
+        job['percent'] = round(100 * job['bytes_read'] / total, 1) if total else 0.0
+    return job
+
+
+def run_job(connect, path, profile_name, job_id, user_id=1, remove_file=False):
+    """Run an import job to completion on a connection from connect(), recording the outcome"""
+    conn = connect()
+    try:
+        stats = import_csv(conn, path, profile_name, user_id=user_id, job_id=job_id)
+        save_progress(conn, job_id, stats, 'done')
+        conn.commit()
+    except Exception as e:
+        # Batches committed before the failure stay; running the file again skips them as duplicates
+        conn.rollback()
+        conn.execute(
+            "UPDATE import_jobs SET status = 'failed', message = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (str(e), job_id)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+        if remove_file:
+            os.remove(path)
+
+
+def start_job(connect, path, profile_name, job_id, user_id=1, remove_file=False):
+    """run_job() on a background thread; returns the thread"""
+    thread = threading.Thread(target=run_job, args=(connect, path, profile_name, job_id, user_id, remove_file),
+                              name=f'csv-import-{job_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    import simple_backend
+
+    parser = argparse.ArgumentParser(description='Import a bank statement CSV as expenses')
+    parser.add_argument('path')
+    parser.add_argument('--profile', default='generic')
+    parser.add_argument('--db', help="database file (default: the backend's)")
+    parser.add_argument('--dry-run', action='store_true', help='count what would be imported, write nothing')
+    args = parser.parse_args()
+    if args.db:
+        simple_backend.DB_PATH = args.db
+    simple_backend.init_db()
+    conn = simple_backend.get_db_connection()
+    try:
+        result = import_csv(conn, args.path, args.profile, dry_run=args.dry_run)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    for error in result['errors']:
+        print(f"  line {error['line']}: {error['error']}")
+    verb = 'Would import' if args.dry_run else 'Imported'
+    print(f"✅ {verb} {result['inserted']} expenses from {result['rows_read']} rows "
+          f"({result['duplicates']} duplicates, {result['skipped']} skipped, {result['invalid']} invalid)")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+SQLite connection pool for the Personal Finance Tracker backend
+Keeps a bounded set of open connections so requests reuse them
+(and their prepared-statement caches) instead of reconnecting
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+
+# Pragma profiles applied to every new connection. journal_mode=WAL lets the
+# report endpoints keep reading while an expense/income write is committing.
+STORAGE_PROFILES = {
+    # SQLite defaults: rollback journal, full fsync on every commit
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000
+    },
+    # WAL with an fsync per commit; survives power loss without losing commits
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 0,
+        'busy_timeout': 5000
+    },
+    # WAL with fsync only at checkpoints; a power cut may drop the last commits
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 134217728,
+        'busy_timeout': 5000
+    },
+    # No fsync at all; only for throwaway or easily rebuilt databases
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -64000,
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,
+        'busy_timeout': 5000
+    }
+}
+
+PRAGMA_VALUES = {
+    'journal_mode': ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'),
+    'synchronous': ('OFF', 'NORMAL', 'FULL', 'EXTRA'),
+    'temp_store': ('DEFAULT', 'FILE', 'MEMORY'),
+    'cache_size': int,
+    'mmap_size': int,
+    'busy_timeout': int
+}
+
+
+def get_storage_profile(name, overrides=None):
+    """Return the pragma dict for a named profile with optional overrides"""
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f'Unknown storage profile: {name}')
+    pragmas = dict(STORAGE_PROFILES[name])
+    for key, value in (overrides or {}).items():
+        if value is not None and value != '':
+            pragmas[key] = value
+    return pragmas
+
+
+def apply_storage_profile(conn, pragmas):
+    """Apply a pragma dict to a connection, validating names and values"""
+    for name, value in pragmas.items():
+        allowed = PRAGMA_VALUES.get(name)
+        if allowed is None:
+            raise ValueError(f'Unsupported pragma: {name}')
+        if allowed is int:
+            value = int(value)
+        else:
+            value = str(value).upper()
+            if value not in allowed:
+                raise ValueError(f'Invalid value for {name}: {value}')
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the checkout timeout"""
+
+
+class PooledConnection:
+    """Wrapper around a pooled sqlite3 connection
+
+    Behaves like a sqlite3.Connection. close() hands the connection back to
+    the pool instead of closing it; request-scoped connections ignore close()
+    and are released when the Flask app context is torn down.
+    """
+
+    def __init__(self, pool, conn, request_scoped=False):
+        self._pool = pool
+        self._conn = conn
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def release(self):
+        """Return the underlying connection to the pool"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of sqlite3 connections to one database file"""
+
+    def __init__(self, db_path, size=8, timeout=10.0, cached_statements=256, pragmas=None):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.pragmas = pragmas or {}
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+        # Metrics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            apply_storage_profile(conn, self.pragmas)
+        except (sqlite3.Error, ValueError):
+            conn.close()
+            raise
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._discarded += 1
+
+    def acquire(self, request_scoped=False):
+        """Check out a connection, waiting up to `timeout` seconds for one"""
+        if self._closed:
+            raise PoolTimeout('Connection pool is closed')
+
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+                with self._lock:
+                    if self._created < self.size:
+                        self._created += 1
+                        create = True
+                    else:
+                        create = False
+                if create:
+                    try:
+                        conn = self._connect()
+                    except (sqlite3.Error, ValueError):
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                else:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        with self._lock:
+                            self._timeouts += 1
+                        raise PoolTimeout(
+                            f'No database connection available after {self.timeout}s '
+                            f'(pool size {self.size})'
+                        )
+                    try:
+                        conn = self._idle.get(timeout=remaining)
+                    except queue.Empty:
+                        continue
+
+            if not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+
+            waited = time.perf_counter() - started
+            with self._lock:
+                self._checkouts += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            return PooledConnection(self, conn, request_scoped)
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """Close every idle connection; checked-out ones close on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        """Pool usage and checkout wait-time metrics"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'db_path': self.db_path,
+                'size': self.size,
+                'timeout': self.timeout,
+                'pragmas': self.pragmas,
+                'open_connections': self._created,
+                'idle_connections': self._idle.qsize(),
+                'in_use_connections': self._created - self._idle.qsize(),
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'avg_wait_ms': round(self._total_wait / checkouts * 1000, 3) if checkouts else 0,
+                'max_wait_ms': round(self._max_wait * 1000, 3)
+            }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Multi-loan payoff optimizer for the Personal Finance Tracker
+Every month each loan accrues interest and receives its minimum payment;
+whatever is left of the monthly budget (including minimums freed by loans
+already repaid) goes to the loans in a priority order, topping each one
+off before moving to the next. A plan is therefore just an ordering of the
+loans:
+
+    avalanche   highest rate first
+    snowball    smallest balance first
+    hybrid      loans the spare budget clears within a few months first
+                (quick wins, smallest first), then highest rate first
+    optimal     local search over orderings for the minimum total interest
+
+Many orderings are simulated together: the month loop runs once over a
+(candidates x loans) balance array, and the budget is poured into each
+candidate's order with a cumulative sum, so a whole neighbourhood of the
+search costs about as much as a single plan.
+"""
+
+import numpy as np
+
+# (annual rate %, tenure in months) assumed when a liability has no terms of its own
+DEFAULT_LOAN_TERMS = {
+    'Home Loan': (8.5, 240),
+    'Car Loan': (9.5, 60),
+    'Personal Loan': (13.0, 48),
+    'Education Loan': (10.0, 84),
+    'Credit Card': (36.0, 24),
+    'Credit Cards': (36.0, 24),
+    'Business Loan': (14.0, 60),
+    'Gold Loan': (9.5, 12),
+    'Others': (0.0, 12)
+}
+
+MAX_PLAN_MONTHS = 600
+HYBRID_QUICK_WIN_MONTHS = 3
+MAX_SEARCH_ROUNDS = 25
+PAID_OFF_EPSILON = 0.005
+
+
+def loan_terms(category):
+    return DEFAULT_LOAN_TERMS.get(category, DEFAULT_LOAN_TERMS['Others'])
+
+
+def default_min_payment(balance, annual_rate, months):
+    rate = annual_rate / 1200
+    if rate == 0:
+        return balance / months
+    return balance * rate / (1 - (1 + rate) ** -months)
+
+
+def simulate(balances, rates, minimums, budget, orders, record=False):
+    """Run every candidate order; orders is (candidates x loans) of loan indexes
+
+    Returns total interest, debt-free month and per-loan payoff month for
+    each candidate (0 where a loan is never repaid within MAX_PLAN_MONTHS).
+    With record=True also returns the (months x loans) payments and
+    balances of the first candidate.
+    """
+    orders = np.atleast_2d(orders)
+    candidates, loans = orders.shape
+    balance = np.tile(balances, (candidates, 1))
+    monthly = rates / 1200
+    interest_total = np.zeros(candidates)
+    payoff = np.zeros((candidates, loans), dtype=int)
+    payments_log, balances_log = [], []
+
+    for month in range(1, MAX_PLAN_MONTHS + 1):
+        open_loans = balance > PAID_OFF_EPSILON
+        if not open_loans.any():
+            break
+        interest = balance * monthly
+        interest_total += interest.sum(axis=1)
+        balance += interest
+        paid = np.minimum(minimums, balance)
+        balance -= paid
+
+        # Pour the spare budget into each candidate's order
+        spare = budget - paid.sum(axis=1)
+        ordered = np.take_along_axis(balance, orders, axis=1)
+        ahead = np.cumsum(ordered, axis=1) - ordered
+        extra = np.clip(spare[:, None] - ahead, 0, ordered)
+        extra_by_loan = np.zeros_like(balance)
+        np.put_along_axis(extra_by_loan, orders, extra, axis=1)
+        balance -= extra_by_loan
+        paid += extra_by_loan
+
+        balance[balance <= PAID_OFF_EPSILON] = 0.0
+        payoff[(balance == 0) & open_loans & (payoff == 0)] = month
+        if record:
+            payments_log.append(paid[0].copy())
+            balances_log.append(balance[0].copy())
+
+    repaid = (payoff > 0) | (balances <= PAID_OFF_EPSILON)
+    debt_free = np.where(repaid.all(axis=1), payoff.max(axis=1), 0)
+    result = {'interest': interest_total, 'debt_free_month': debt_free, 'payoff': payoff}
+    if record:
+        result['payments'] = np.array(payments_log).reshape(-1, loans)
+        result['balances'] = np.array(balances_log).reshape(-1, loans)
+    return result
+
+
+def heuristic_orders(balances, rates, minimums, budget):
+    spare = budget - minimums.sum()
+    avalanche = np.lexsort((balances, -rates))
+    snowball = np.lexsort((-rates, balances))
+    quick = balances <= spare * HYBRID_QUICK_WIN_MONTHS
+    quick_wins = np.flatnonzero(quick)[np.argsort(balances[quick], kind='stable')]
+    hybrid = np.concatenate([quick_wins, avalanche[~quick[avalanche]]]).astype(int)
+    return {'avalanche': avalanche, 'snowball': snowball, 'hybrid': hybrid}
+
+
+def _neighbours(order):
+    """Every ordering one swap or one move-to-front away"""
+    loans = len(order)
+    result = []
+    for i in range(loans):
+        for j in range(i + 1, loans):
+            swapped = order.copy()
+            swapped[i], swapped[j] = order[j], order[i]
+            result.append(swapped)
+        if i:
+            result.append(np.concatenate(([order[i]], np.delete(order, i))))
+    return np.array(result) if result else np.empty((0, loans), dtype=int)
+
+
+def _score(run):
+    """Lower is better: total interest, then unpaid plans last, then time to debt-free"""
+    unpaid = run['debt_free_month'] == 0
+    return np.lexsort((np.where(unpaid, MAX_PLAN_MONTHS + 1, run['debt_free_month']),
+                       np.round(run['interest'], 2), unpaid))
+
+
+def search_order(balances, rates, minimums, budget, starts):
+    """Best-improvement local search from the given starting orders"""
+    starts = np.array(starts)
+    run = simulate(balances, rates, minimums, budget, starts)
+    best = _score(run)[0]
+    order, interest = starts[best], run['interest'][best]
+    rounds = 0
+    for rounds in range(1, MAX_SEARCH_ROUNDS + 1):
+        candidates = _neighbours(order)
+        if not len(candidates):
+            break
+        run = simulate(balances, rates, minimums, budget, candidates)
+        best = _score(run)[0]
+        if run['interest'][best] >= interest - 0.005:
+            break
+        order, interest = candidates[best], run['interest'][best]
+    return order, rounds
+
+
+def optimize(loans, budget, warm_start=None, include_schedule=True):
+    """Compare payoff strategies for `loans` under a monthly `budget`
+
+    loans       [{'id', 'name', 'balance', 'rate', 'min_payment'}, ...]
+    warm_start  a previous best order (loan ids); the search starts there
+                as well as from the heuristics, so re-planning after one
+                liability changes usually converges in a round or two
+    """
+    if not loans:
+        raise ValueError('no liabilities to plan')
+    ids = [loan['id'] for loan in loans]
+    balances = np.array([float(loan['balance']) for loan in loans])
+    rates = np.array([float(loan['rate']) for loan in loans])
+    minimums = np.array([float(loan['min_payment']) for loan in loans])
+    if (balances < 0).any() or (rates < 0).any() or (minimums < 0).any():
+        raise ValueError('balances, rates and minimum payments must not be negative')
+    required = float(np.minimum(minimums, balances * (1 + rates / 1200)).sum())
+    if budget < required:
+        raise ValueError(f'budget {budget:.2f} is below the minimum payments of {required:.2f}')
+
+    orders = heuristic_orders(balances, rates, minimums, budget)
+    starts = list(orders.values())
+    if warm_start:
+        position = {loan_id: index for index, loan_id in enumerate(ids)}
+        kept = [position[loan_id] for loan_id in warm_start if loan_id in position]
+        # Loans new since the last plan join at their avalanche position
+        added = [index for index in orders['avalanche'] if index not in kept]
+        starts.append(np.array(kept + added))
+    orders['optimal'], rounds = search_order(balances, rates, minimums, budget, starts)
+
+    names = list(orders)
+    run = simulate(balances, rates, minimums, budget, np.array([orders[name] for name in names]))
+    strategies = {}
+    for row, name in enumerate(names):
+        strategies[name] = {
+            'order': [ids[index] for index in orders[name]],
+            'total_interest': round(float(run['interest'][row]), 2),
+            'debt_free_month': int(run['debt_free_month'][row]) or None,
+            'payoff_month': {str(ids[i]): int(run['payoff'][row, i]) or None for i in range(len(ids))}
+        }
+    baseline = strategies['snowball']['total_interest']
+    for result in strategies.values():
+        result['interest_saved_vs_snowball'] = round(baseline - result['total_interest'], 2)
+
+    plan = {
+        'budget': budget,
+        'minimum_payments': round(float(minimums.sum()), 2),
+        'loans': [
+            {'id': loan['id'], 'name': loan.get('name'), 'balance': loan['balance'],
+             'rate': loan['rate'], 'min_payment': round(float(loan['min_payment']), 2)}
+            for loan in loans
+        ],
+        'strategies': strategies,
+        'recommended': 'optimal',
+        'search_rounds': rounds
+    }
+    if include_schedule:
+        detail = simulate(balances, rates, minimums, budget, orders['optimal'], record=True)
+        plan['schedule'] = {
+            'month': list(range(1, len(detail['payments']) + 1)),
+            'payments': {str(ids[i]): np.round(detail['payments'][:, i], 2).tolist() for i in range(len(ids))},
+            'balances': {str(ids[i]): np.round(detail['balances'][:, i], 2).tolist() for i in range(len(ids))}
+        }
+    return plan
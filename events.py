@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Change notifications for the Personal Finance Tracker
+Every committed write is published as a 'change' event (table, month, row
+id, its owner and the owner's new totals for the month) to the dashboards
+subscribed to /api/events, which update in place instead of polling.
+
+Each subscriber has its own bounded queue. Publishing never blocks: when a
+slow client's queue is full it is emptied and replaced by one 'resync'
+event, telling the client to reload everything; the writer and the other
+clients are unaffected. The last EVENT_HISTORY events are kept so a client
+that reconnects with Last-Event-ID gets what it missed, or a 'resync' if
+that is no longer possible.
+
+Events are published in the process that handled the write. With several
+worker processes a poller also watches the data_versions counters while
+anyone is subscribed, and announces writes made by other processes (with
+the table only: month, id, owner and totals are unknown there).
+
+A stream served by the WSGI servers holds a worker thread until it ends,
+so streams are closed after EVENT_STREAM_SECONDS and the browser
+reconnects; the ASGI server (asgi_app.py) holds them on its event loop.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', 100))
+EVENT_HISTORY = int(os.environ.get('EVENT_HISTORY', 500))
+MAX_EVENT_CLIENTS = int(os.environ.get('MAX_EVENT_CLIENTS', 1000))
+EVENT_POLL_SECONDS = float(os.environ.get('EVENT_POLL_SECONDS', 1.0))
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get('EVENT_HEARTBEAT_SECONDS', 15))
+# A stream is closed after this long; the browser reconnects with Last-Event-ID
+EVENT_STREAM_SECONDS = float(os.environ.get('EVENT_STREAM_SECONDS', 300))
+# Milliseconds EventSource waits before reconnecting
+EVENT_RETRY_MS = 3000
+
+
+def format_event(event):
+    """One event in text/event-stream framing"""
+    data = json.dumps(event['data'], separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n".encode('utf-8')
+
+
+STREAM_PREAMBLE = f'retry: {EVENT_RETRY_MS}\n\n'.encode('ascii')
+HEARTBEAT = b': keepalive\n\n'
+
+
+class Subscription:
+    """One client's bounded event queue
+
+    `wake` (optional) is called after every delivery, from the publishing
+    thread; the ASGI server uses it to wake the client's coroutine.
+    """
+
+    def __init__(self, maxsize=EVENT_QUEUE_SIZE, wake=None):
+        self.maxsize = maxsize
+        self.wake = wake
+        self.events = deque()
+        self.overflows = 0
+        self.ready = threading.Condition()
+
+    def deliver(self, event, make_resync):
+        with self.ready:
+            if len(self.events) >= self.maxsize:
+                # Backpressure: drop the backlog, the client reloads instead
+                self.events.clear()
+                self.events.append(make_resync())
+                self.overflows += 1
+            else:
+                self.events.append(event)
+            self.ready.notify()
+        if self.wake is not None:
+            self.wake()
+
+    def drain(self):
+        """Queued events, oldest first, without waiting"""
+        with self.ready:
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def get(self, timeout):
+        """Queued events, waiting up to `timeout` seconds for one; [] on timeout"""
+        with self.ready:
+            self.ready.wait_for(lambda: self.events, timeout)
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+
+def iter_stream(subscription, lifetime=EVENT_STREAM_SECONDS, heartbeat=EVENT_HEARTBEAT_SECONDS):
+    """text/event-stream chunks for a blocking (WSGI) response"""
+    yield STREAM_PREAMBLE
+    deadline = time.monotonic() + lifetime
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = subscription.get(min(heartbeat, remaining))
+        # Comments keep proxies from closing an idle connection
+        yield b''.join(format_event(e) for e in events) if events else HEARTBEAT
+
+
+class EventBroker:
+    """In-process pub/sub fanning events out to every subscription"""
+
+    def __init__(self, queue_size=EVENT_QUEUE_SIZE, history=EVENT_HISTORY, max_clients=MAX_EVENT_CLIENTS):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        # Event ids are only meaningful to the process that issued them
+        self.token = uuid.uuid4().hex[:8]
+        self.counter = itertools.count(1)
+        self.history = deque(maxlen=history)
+        self.subscribers = set()
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.published = 0
+        self.poller = None
+
+    def _event(self, kind, data):
+        return {'id': f'{self.token}-{next(self.counter)}', 'event': kind, 'data': data}
+
+    def subscribe(self, last_event_id=None, wake=None):
+        """A new subscription, primed with the events after `last_event_id`; None when full"""
+        with self.lock:
+            if len(self.subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self.queue_size, wake)
+            if last_event_id:
+                missed = self._since(last_event_id)
+                if missed is None:
+                    missed = [self._event('resync', {'reason': 'missed events'})]
+                subscription.events.extend(missed[-self.queue_size:])
+            self.subscribers.add(subscription)
+        return subscription
+
+    def _since(self, last_event_id):
+        token, _, number = last_event_id.partition('-')
+        if token != self.token or not number.isdigit():
+            return None
+        number = int(number)
+        missed = [e for e in self.history if int(e['id'].split('-')[1]) > number]
+        oldest = int(self.history[0]['id'].split('-')[1]) if self.history else number + 1
+        # Events between the client's last one and our oldest were dropped
+        return missed if oldest <= number + 1 else None
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, kind, data):
+        with self.lock:
+            event = self._event(kind, data)
+            self.history.append(event)
+            self.published += 1
+            subscribers = list(self.subscribers)
+        make_resync = lambda: self._event('resync', {'reason': 'client too slow'})
+        for subscription in subscribers:
+            subscription.deliver(event, make_resync)
+        return event
+
+    def publish_changes(self, changes):
+        """Publish one 'change' event per changed table; `changes` carry their new version"""
+        with self.lock:
+            for change in changes:
+                table = change['table']
+                self.versions[table] = max(self.versions.get(table, 0), change['version'])
+        return [self.publish('change', change) for change in changes]
+
+    def poll(self, versions):
+        """Announce tables whose counters moved past what this process has published
+
+        A table seen for the first time only sets the baseline.
+        """
+        with self.lock:
+            fresh = [
+                {'table': table, 'version': version, 'month': None, 'id': None, 'user_id': None, 'totals': None}
+                for table, version in sorted(versions.items())
+                if table in self.versions and version > self.versions[table]
+            ]
+            for table, version in versions.items():
+                self.versions[table] = max(self.versions.get(table, 0), version)
+        return [self.publish('change', change) for change in fresh]
+
+    def start_polling(self, read_versions, interval=EVENT_POLL_SECONDS):
+        """Poll read_versions() while there are subscribers (one thread per process)"""
+        with self.lock:
+            if self.poller is not None and self.poller.is_alive():
+                return
+            self.poller = threading.Thread(target=self._poll_loop, args=(read_versions, interval),
+                                           name='event-poller', daemon=True)
+            self.poller.start()
+
+    def _poll_loop(self, read_versions, interval):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.poller = None
+                    return
+            try:
+                self.poll(read_versions())
+            except Exception:
+                # A busy or missing database only delays the next poll
+                pass
+            time.sleep(interval)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'subscribers': len(self.subscribers),
+                'published': self.published,
+                'history': len(self.history),
+                'overflows': sum(s.overflows for s in self.subscribers),
+                'polling': self.poller is not None
+            }
+
+
+broker = EventBroker()
+
+
+def reset_after_fork():
+    """Subscribers and the poller thread belong to the parent process"""
+    global broker
+    broker = EventBroker()
+
+
+def get_broker():
+    return broker
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Gold price history for the Personal Finance Tracker
+Prices come from a local CSV file (GOLD_PRICE_CSV, default gold_prices.csv
+next to this module) with one row per day:
+
+    date,price_per_gram
+    2024-01-01,6320.50
+
+The history is held as two sorted NumPy arrays (datetime64[D] dates and
+float prices), so looking up the price on any number of dates is a single
+np.searchsorted call. A date without a quote uses the latest earlier quote
+(weekends, holidays). The file is reloaded when it changes on disk.
+
+Usage: python gold_prices.py [path]   (checks a file and prints its range)
+"""
+
+import csv
+import os
+import sys
+import threading
+
+import numpy as np
+
+GOLD_PRICE_CSV = os.environ.get(
+    'GOLD_PRICE_CSV', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gold_prices.csv')
+)
+PRICE_COLUMNS = ('price_per_gram', 'price')
+
+
+class GoldPriceHistory:
+    """Daily gold prices (rupees per gram) as sorted parallel arrays"""
+
+    def __init__(self, dates, prices, version=None):
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        prices = np.asarray(prices, dtype=float)
+        order = np.argsort(dates, kind='stable')
+        dates, prices = dates[order], prices[order]
+        # A date listed twice keeps its last quote
+        last = np.append(dates[1:] != dates[:-1], True)
+        self.dates = dates[last]
+        self.prices = prices[last]
+        self.version = version
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            column = next((name for name in PRICE_COLUMNS if name in fields), None)
+            if 'date' not in fields or column is None:
+                raise ValueError(f'{path} needs a date column and a price_per_gram column')
+            dates, prices = [], []
+            for line, row in enumerate(reader, start=2):
+                try:
+                    dates.append(np.datetime64(row['date'].strip(), 'D'))
+                    prices.append(float(row[column]))
+                except (AttributeError, ValueError):
+                    raise ValueError(f'{path}, line {line}: bad date or price')
+        if not dates:
+            raise ValueError(f'{path} has no prices')
+        if min(prices) <= 0:
+            raise ValueError(f'{path} has a price that is not positive')
+        stat = os.stat(path)
+        return cls(dates, prices, version=(stat.st_mtime_ns, stat.st_size))
+
+    def price_on(self, dates):
+        """Price on each date (latest quote on or before it); NaN before the history starts"""
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        index = np.searchsorted(self.dates, dates, side='right') - 1
+        prices = self.prices[np.maximum(index, 0)]
+        return np.where(index >= 0, prices, np.nan)
+
+    def summary(self):
+        return {
+            'first_date': str(self.dates[0]),
+            'last_date': str(self.dates[-1]),
+            'days': len(self),
+            'latest_price': float(self.prices[-1])
+        }
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history(path=None):
+    """The loaded history, re-read when the file changed; None when there is no file"""
+    global _history
+    path = path or GOLD_PRICE_CSV
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _history_lock:
+        if _history is None or _history[0] != path or _history[1].version != (stat.st_mtime_ns, stat.st_size):
+            _history = (path, GoldPriceHistory.from_csv(path))
+        return _history[1]
+
+
+def history_version(path=None):
+    """Changes whenever the price file does; part of ETags and cache keys"""
+    try:
+        history = get_history(path)
+    except ValueError:
+        return 'invalid'
+    return history.version if history is not None else None
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else GOLD_PRICE_CSV
+    try:
+        history = GoldPriceHistory.from_csv(source)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    info = history.summary()
+    print(f"✅ {info['days']} prices from {info['first_date']} to {info['last_date']} "
+          f"(latest ₹{info['latest_price']:.2f}/g)")
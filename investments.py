@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Investment scheme valuation for the Personal Finance Tracker
+Recurring deposits compound quarterly, as Indian banks compute them: an
+instalment that has been in the account for m months is worth
+P * (1 + r/4) ** (m / 3). Maturity dates are calendar months from the
+start date (a 31 January start matures on the last day of February, not
+30 days later).
+
+Valuations are vectorized: every payment of every RD is one array element,
+and per-RD totals are summed with np.bincount.
+"""
+
+import calendar
+from datetime import date, datetime
+
+import numpy as np
+
+from xirr import xirr, xirr_series, year_fractions
+
+# Average month length, for the part of a month between two day-of-month positions
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def add_months(start, months):
+    """Calendar month arithmetic; the day is clamped to the target month's length"""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def months_between(start, end):
+    """Fractional months from `start` to `end` (datetime64[D] arrays, broadcast)"""
+    start = np.asarray(start, dtype='datetime64[D]')
+    end = np.asarray(end, dtype='datetime64[D]')
+    start_month = start.astype('datetime64[M]')
+    end_month = end.astype('datetime64[M]')
+    whole = (end_month - start_month).astype(int)
+    start_day = (start - start_month.astype('datetime64[D]')).astype(int)
+    end_day = (end - end_month.astype('datetime64[D]')).astype(int)
+    return whole + (end_day - start_day) / DAYS_PER_MONTH
+
+
+def quarterly_growth(annual_rate, months):
+    """Growth factor of money deposited for `months` at quarterly compounding"""
+    return (1 + np.asarray(annual_rate, dtype=float) / 400) ** (np.asarray(months, dtype=float) / 3)
+
+
+def rd_maturity_amount(monthly_amount, annual_rate, tenure):
+    """Maturity value of an RD paid on schedule; broadcasts over arrays
+
+    Instalment k (k = 0 .. n-1) earns for n - k months, so the total is the
+    geometric series sum(P * q ** j, j = 1 .. n) with q = (1 + r/4) ** (1/3).
+    """
+    amount = np.asarray(monthly_amount, dtype=float)
+    tenure = np.asarray(tenure, dtype=float)
+    q = quarterly_growth(annual_rate, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = np.where(q > 1, amount * q * (q ** tenure - 1) / (q - 1), amount * tenure)
+    return float(total) if total.ndim == 0 else total
+
+
+def rd_terms(monthly_amount, annual_rate, tenure, start_date):
+    """Maturity date and amount for a new RD"""
+    maturity_date = add_months(parse_date(start_date), int(tenure))
+    return maturity_date.strftime('%Y-%m-%d'), rd_maturity_amount(monthly_amount, annual_rate, tenure)
+
+
+def value_rds(rds, payments, as_of):
+    """Accrued value of every RD on `as_of` from its actual payments
+
+    rds        rows with id, monthly_amount, interest_rate, tenure, start_date
+    payments   rows with rd_id, payment_date, amount
+    Payments made after `as_of` are ignored; interest stops at maturity.
+    Returns one dict per RD, in the order of `rds`.
+    """
+    as_of = np.datetime64(as_of, 'D')
+    ids = [rd['id'] for rd in rds]
+    position = {rd_id: index for index, rd_id in enumerate(ids)}
+    rates = np.array([float(rd['interest_rate']) for rd in rds])
+    maturity = np.array(
+        [add_months(parse_date(rd['start_date']), int(rd['tenure'])) for rd in rds], dtype='datetime64[D]'
+    )
+    scheduled = rd_maturity_amount(
+        [rd['monthly_amount'] for rd in rds], rates, [rd['tenure'] for rd in rds]
+    ) if rds else np.zeros(0)
+
+    payments = [p for p in payments if p['rd_id'] in position]
+    owner = np.array([position[p['rd_id']] for p in payments], dtype=int)
+    paid_on = np.array([p['payment_date'] for p in payments], dtype='datetime64[D]')
+    amounts = np.array([float(p['amount']) for p in payments])
+    counted = paid_on <= as_of
+    owner, paid_on, amounts = owner[counted], paid_on[counted], amounts[counted]
+
+    held = months_between(paid_on, np.minimum(as_of, maturity[owner]))
+    values = amounts * quarterly_growth(rates[owner], np.maximum(held, 0))
+    deposited = np.bincount(owner, weights=amounts, minlength=len(rds))
+    accrued = np.bincount(owner, weights=values, minlength=len(rds))
+    count = np.bincount(owner, minlength=len(rds))
+
+    return [
+        {
+            'id': rd_id,
+            'payments_made': int(count[i]),
+            'deposited': round(float(deposited[i]), 2),
+            'accrued_value': round(float(accrued[i]), 2),
+            'accrued_interest': round(float(accrued[i] - deposited[i]), 2),
+            'maturity_date': str(maturity[i]),
+            'scheduled_maturity_amount': round(float(scheduled[i]), 2),
+            'matured': bool(as_of >= maturity[i])
+        }
+        for i, rd_id in enumerate(ids)
+    ]
+
+
+# Chit funds
+# One member takes the pot each month. The winning bid is the discount the
+# winner gives up; the foreman keeps a commission out of it and the rest is
+# shared by all members as a dividend that reduces that month's instalment.
+FOREMAN_COMMISSION_PCT = 5.0
+DEFAULT_MAX_DISCOUNT_PCT = 30.0
+
+
+def chit_discounts(total_value, members, recorded=None, max_discount_pct=DEFAULT_MAX_DISCOUNT_PCT,
+                   min_discount_pct=FOREMAN_COMMISSION_PCT):
+    """Auction discount for every month
+
+    Months with a recorded auction use it; the rest follow a straight line
+    from max_discount_pct in the first month (when members who need the
+    money bid hardest) down to min_discount_pct in the last.
+    """
+    if not 0 <= min_discount_pct <= max_discount_pct <= 100:
+        raise ValueError('need 0 <= min_discount_pct <= max_discount_pct <= 100')
+    discounts = np.linspace(max_discount_pct, min_discount_pct, members) / 100 * total_value
+    known = np.zeros(members, dtype=bool)
+    for month, discount in (recorded or {}).items():
+        discounts[month - 1] = discount
+        known[month - 1] = True
+    return discounts, known
+
+
+def chit_schedule(total_value, monthly_amount, discounts, commission_pct=FOREMAN_COMMISSION_PCT):
+    """Per-month dividend, net instalment and prize for the given discounts"""
+    members = len(discounts)
+    commission = total_value * commission_pct / 100
+    dividend = np.maximum(discounts - commission, 0) / members
+    return {
+        'discount': discounts,
+        'dividend': dividend,
+        'net_instalment': monthly_amount - dividend,
+        'prize': total_value - discounts
+    }
+
+
+def chit_prize_sweep(start_date, schedule):
+    """Cash flows and XIRR of a member taking the prize in each possible month
+
+    Row k of the flow matrix is one member's position: every net instalment
+    paid out, plus the prize received in month k + 1. All rows share the
+    same dates, so every k is solved in one vectorized XIRR call.
+    """
+    net = schedule['net_instalment']
+    members = len(net)
+    start = parse_date(start_date)
+    dates = np.array([add_months(start, month) for month in range(members)], dtype='datetime64[D]')
+    flows = np.tile(-net, (members, 1))
+    flows[np.arange(members), np.arange(members)] += schedule['prize']
+
+    paid_in = net.sum()
+    # Early winners owe most of their instalments after taking the prize (the
+    # XIRR is their borrowing cost); late winners have mostly saved (it is
+    # their return)
+    paid_before = np.cumsum(net) - net
+    owed_after = paid_in - np.cumsum(net)
+    return {
+        'prize_month': np.arange(1, members + 1),
+        'date': dates,
+        'flows': flows,
+        'total_contribution': np.full(members, paid_in),
+        'net_gain': schedule['prize'] - paid_in,
+        'position': np.where(owed_after > paid_before, 'borrower', 'saver'),
+        'xirr': xirr(flows, year_fractions(dates))
+    }
+
+
+# Realized returns
+# Each scheme becomes a dated cash flow series: payments are outflows and
+# the position's value on the valuation date is the closing inflow.
+
+def rd_cash_flows(rds, payments, as_of):
+    """(amounts, dates) and valuation of every RD; the value is dated at maturity once matured"""
+    valuations = value_rds(rds, payments, as_of)
+    by_rd = {}
+    for payment in payments:
+        if payment['payment_date'] <= as_of:
+            by_rd.setdefault(payment['rd_id'], []).append(payment)
+    series = []
+    for rd, valuation in zip(rds, valuations):
+        paid = by_rd.get(rd['id'], [])
+        amounts = [-float(p['amount']) for p in paid] + [valuation['accrued_value']]
+        dates = [p['payment_date'] for p in paid] + [min(as_of, valuation['maturity_date'])]
+        series.append((amounts, dates))
+    return series, valuations
+
+
+def chit_cash_flows(chit, payments, won_auction, as_of):
+    """(amounts, dates) of a chit the member has won, or None before the prize is taken
+
+    Instalments still due after `as_of` are an obligation of the position,
+    counted at the full monthly amount on the valuation date.
+    """
+    if won_auction is None:
+        return None
+    prize_date = won_auction['auction_date'] or str(
+        add_months(parse_date(chit['start_date']), won_auction['month_number'] - 1)
+    )
+    amounts = [-float(p['amount']) for p in payments] + [chit['total_value'] - won_auction['discount']]
+    dates = [p['payment_date'] for p in payments] + [prize_date]
+    due = max(chit['total_months'] - len(payments), 0)
+    if due:
+        amounts.append(-due * float(chit['monthly_amount']))
+        dates.append(max(as_of, prize_date))
+    return amounts, dates
+
+
+def series_returns(series):
+    """Invested amount, closing value and XIRR (percent, None when unsolvable) of each series"""
+    rates = xirr_series(series)
+    results = []
+    for (amounts, _), rate in zip(series, rates):
+        amounts = np.asarray(amounts, dtype=float)
+        invested = -amounts[amounts < 0].sum()
+        received = amounts[amounts > 0].sum()
+        results.append({
+            'invested': round(float(invested), 2),
+            'value': round(float(received), 2),
+            'gain': round(float(amounts.sum()), 2),
+            'xirr_pct': None if np.isnan(rate) else round(float(rate) * 100, 2)
+        })
+    return results
+
+
+# Gold chits
+# Every rupee payment buys gold at that day's price; the chit is worth the
+# grams bought so far at the price on the valuation date.
+
+def value_gold_chits(chits, payments, history, as_of):
+    """Grams bought and current value of every gold chit, one pass over all payments
+
+    chits      rows with id, gold_weight (target grams)
+    payments   rows with gold_chit_id, payment_date, amount
+    history    a gold_prices.GoldPriceHistory
+    Payments made after `as_of` are ignored. Returns (valuations, per-chit
+    payment columns). A payment older than the price history buys an
+    unknown weight of gold: ValueError names the first date with a price.
+    """
+    ids = [chit['id'] for chit in chits]
+    position = {chit_id: index for index, chit_id in enumerate(ids)}
+    payments = sorted(
+        (p for p in payments if p['gold_chit_id'] in position and p['payment_date'] <= as_of),
+        key=lambda p: (position[p['gold_chit_id']], p['payment_date'])
+    )
+    owner = np.array([position[p['gold_chit_id']] for p in payments], dtype=int)
+    paid_on = np.array([p['payment_date'] for p in payments], dtype='datetime64[D]')
+    amounts = np.array([float(p['amount']) for p in payments])
+
+    prices = history.price_on(paid_on)
+    unpriced = np.flatnonzero(np.isnan(prices))
+    if len(unpriced):
+        payment = payments[unpriced[0]]
+        raise ValueError(f"gold chit {payment['gold_chit_id']} has a payment on {payment['payment_date']}, "
+                         f"before the first gold price ({history.dates[0]})")
+    grams = amounts / prices
+    total_grams = np.bincount(owner, weights=grams, minlength=len(ids))
+    paid = np.bincount(owner, weights=amounts, minlength=len(ids))
+    current_price = float(history.price_on(np.datetime64(as_of, 'D')))
+    cumulative = np.cumsum(grams)
+    # Running grams restart at each chit's first payment
+    starts = np.searchsorted(owner, np.arange(len(ids)))
+    ends = np.append(starts[1:], len(owner)).astype(int)
+    offsets = np.concatenate(([0.0], cumulative))[starts]
+
+    valuations, detail = [], []
+    for i, chit in enumerate(chits):
+        rows = slice(int(starts[i]), int(ends[i]))
+        value = total_grams[i] * current_price if not np.isnan(current_price) else None
+        target = float(chit['gold_weight'] or 0)
+        valuations.append({
+            'id': chit['id'],
+            'payments_made': rows.stop - rows.start,
+            'paid': round(float(paid[i]), 2),
+            'grams': round(float(total_grams[i]), 4),
+            'target_grams': target,
+            'progress_pct': round(float(total_grams[i]) / target * 100, 2) if target else None,
+            'current_value': round(float(value), 2) if value is not None else None,
+            'gain': round(float(value - paid[i]), 2) if value is not None else None
+        })
+        detail.append({
+            'date': [str(d) for d in paid_on[rows]],
+            'amount': np.round(amounts[rows], 2).tolist(),
+            'price': np.round(prices[rows], 2).tolist(),
+            'grams': np.round(grams[rows], 4).tolist(),
+            'cumulative_grams': np.round(cumulative[rows] - offsets[i], 4).tolist()
+        })
+    return valuations, detail
+
+
+def gold_chit_cash_flows(payments, valuation, as_of):
+    """(amounts, dates) of a gold chit: payments out, current gold value in on `as_of`"""
+    if valuation['current_value'] is None:
+        return None
+    paid = [p for p in payments if p['payment_date'] <= as_of]
+    return ([-float(p['amount']) for p in paid] + [valuation['current_value']],
+            [p['payment_date'] for p in paid] + [as_of])
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Loan amortization engine for the Personal Finance Tracker
+Schedules are computed with NumPy instead of a month-by-month loop. Within
+a stretch of constant rate the balance recurrence
+
+    B[k] = B[k-1] * (1 + r) - P[k]
+
+has the closed form B[k] = G[k] * (B0 - cumsum(P / G)[k]) with
+G[k] = (1 + r) ** k, so a whole schedule is a few array operations per
+rate change. Extra monthly payments, lump sums and rate changes are
+supported; the loan is cut off in the month the balance reaches zero.
+"""
+
+import numpy as np
+
+# Schedules never run longer than this multiple of the contracted tenure
+# (a rate rise with a fixed EMI stretches the tenure, and may never repay)
+MAX_TENURE_FACTOR = 2
+
+# Balances below the larger of half a paisa and this fraction of the
+# principal are treated as repaid. Floating point residue at the contracted
+# tenure grows with the principal (about 1e-11 of it), so a fixed cut-off
+# would add a spurious extra month to large loans.
+PAID_OFF_EPSILON = 0.005
+PAID_OFF_RELATIVE = 1e-9
+
+
+def paid_off_tolerance(principal):
+    """Balance treated as zero for a loan of `principal`; broadcasts over arrays"""
+    tolerance = np.maximum(PAID_OFF_RELATIVE * np.asarray(principal, dtype=float), PAID_OFF_EPSILON)
+    return float(tolerance) if tolerance.ndim == 0 else tolerance
+
+
+def monthly_rate(annual_rate):
+    """Annual percentage rate -> monthly rate as a fraction"""
+    return np.asarray(annual_rate, dtype=float) / 1200.0
+
+
+def emi(principal, annual_rate, months):
+    """Equated monthly instalment; broadcasts over array arguments"""
+    principal = np.asarray(principal, dtype=float)
+    months = np.asarray(months, dtype=float)
+    rate = monthly_rate(annual_rate)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        growth = (1 + rate) ** months
+        payment = np.where(rate > 0, principal * rate * growth / (growth - 1), principal / months)
+    return float(payment) if payment.ndim == 0 else payment
+
+
+class Schedule:
+    """Month-by-month amortization schedule held as NumPy columns"""
+
+    def __init__(self, principal, emi, payment, interest, balance, rate):
+        self.principal = principal
+        self.emi = emi
+        self.payment = payment
+        self.interest = interest
+        self.balance = balance
+        self.rate = rate
+
+    @property
+    def months(self):
+        return len(self.payment)
+
+    @property
+    def total_interest(self):
+        return float(self.interest.sum())
+
+    @property
+    def total_payment(self):
+        return float(self.payment.sum())
+
+    @property
+    def outstanding(self):
+        """Balance left when the schedule hit its horizon without repaying"""
+        return float(self.balance[-1]) if self.months else self.principal
+
+    @property
+    def paid_off(self):
+        return self.outstanding <= paid_off_tolerance(self.principal)
+
+    def to_dict(self, include_rows=True):
+        result = {
+            'monthly_payment': round(self.emi, 2),
+            'months': self.months,
+            'total_payment': round(self.total_payment, 2),
+            'total_interest': round(self.total_interest, 2),
+            'paid_off': self.paid_off,
+            'outstanding_balance': round(max(self.outstanding, 0.0), 2)
+        }
+        if include_rows:
+            # Columnar: one list per field rather than one object per month
+            result['schedule'] = {
+                'month': list(range(1, self.months + 1)),
+                'payment': np.round(self.payment, 2).tolist(),
+                'principal': np.round(self.payment - self.interest, 2).tolist(),
+                'interest': np.round(self.interest, 2).tolist(),
+                'balance': np.round(np.maximum(self.balance, 0.0), 2).tolist(),
+                'rate': np.round(self.rate * 1200, 4).tolist()
+            }
+        return result
+
+
+def _month_index(month, what):
+    month = int(month)
+    if month < 1:
+        raise ValueError(f'{what} month must be 1 or later')
+    return month - 1
+
+
+def amortize(principal, annual_rate, months, extra_monthly=0.0, lump_sums=None,
+             rate_changes=None, adjust='tenure', max_months=None):
+    """Simulate a loan and return its Schedule
+
+    extra_monthly   amount paid on top of the EMI every month
+    lump_sums       [(month, amount), ...] one-off prepayments
+    rate_changes    [(month, annual_rate), ...] new rate from that month on
+    adjust          'tenure' keeps the EMI and lets the tenure move (the usual
+                    bank default); 'emi' recomputes the EMI over the remaining
+                    contracted tenure at each rate change
+    """
+    principal = float(principal)
+    months = int(months)
+    if principal <= 0:
+        raise ValueError('principal must be positive')
+    if months <= 0:
+        raise ValueError('months must be positive')
+    if annual_rate < 0:
+        raise ValueError('rate must not be negative')
+    if adjust not in ('tenure', 'emi'):
+        raise ValueError("adjust must be 'tenure' or 'emi'")
+    horizon = int(max_months or months * MAX_TENURE_FACTOR)
+
+    rates = np.full(horizon, float(monthly_rate(annual_rate)))
+    breaks = {0, horizon}
+    for month, rate in sorted(rate_changes or []):
+        if rate < 0:
+            raise ValueError('rate must not be negative')
+        start = _month_index(month, 'Rate change')
+        if start >= horizon:
+            continue
+        rates[start:] = float(monthly_rate(rate))
+        breaks.add(start)
+
+    extras = np.full(horizon, float(extra_monthly))
+    for month, amount in lump_sums or []:
+        index = _month_index(month, 'Lump sum')
+        if index < horizon:
+            extras[index] += float(amount)
+    if (extras < 0).any():
+        raise ValueError('extra payments must not be negative')
+
+    tolerance = paid_off_tolerance(principal)
+    first_emi = emi(principal, annual_rate, months)
+    instalment = first_emi
+    payment = np.empty(horizon)
+    balance = np.empty(horizon)
+    opening = principal
+    end = horizon
+    bounds = sorted(breaks)
+    for start, stop in zip(bounds, bounds[1:]):
+        rate = rates[start]
+        if adjust == 'emi' and start > 0:
+            instalment = emi(opening, rate * 1200, max(months - start, 1))
+        due = instalment + extras[start:stop]
+        if rate > 0:
+            growth = (1 + rate) ** np.arange(1, stop - start + 1)
+            closing = growth * (opening - np.cumsum(due / growth))
+        else:
+            closing = opening - np.cumsum(due)
+
+        repaid = np.flatnonzero(closing <= tolerance)
+        if repaid.size:
+            last = repaid[0]
+            before = closing[last - 1] if last else opening
+            due = due[:last + 1].copy()
+            due[last] = before * (1 + rate)  # final payment clears the balance exactly
+            closing = closing[:last + 1].copy()
+            closing[last] = 0.0
+            stop = start + last + 1
+            end = stop
+        payment[start:stop] = due
+        balance[start:stop] = closing
+        opening = closing[-1]
+        if repaid.size:
+            break
+
+    balance = balance[:end]
+    opening_balances = np.concatenate(([principal], balance[:-1]))
+    interest = opening_balances * rates[:end]
+    return Schedule(principal, first_emi, payment[:end], interest, balance, rates[:end])
+
+
+def savings(baseline, scenario):
+    """Interest and months a scenario saves against the baseline schedule"""
+    return {
+        'interest_saved': round(baseline.total_interest - scenario.total_interest, 2),
+        'months_saved': baseline.months - scenario.months
+    }
+
+
+# Scenario grids are evaluated in blocks of at most this many scenario-months
+GRID_BLOCK_CELLS = 2_000_000
+
+
+def _grid_block(principal, rate, tenure, emi_, due_extra, lump, lump_index, horizon):
+    """Payoff month and total paid for a block of fixed-rate scenarios (one row each)"""
+    rows = len(rate)
+    months = np.arange(1, horizon + 1)
+    due = np.repeat((emi_ + due_extra)[:, None], horizon, axis=1)
+    due[np.arange(rows), lump_index] += lump
+    with np.errstate(over='ignore'):
+        growth = (1 + rate[:, None]) ** months
+    closing = growth * (principal - np.cumsum(due / growth, axis=1))
+
+    # Scenarios with non-negative extras always repay by their tenure
+    closing[months > tenure[:, None]] = -np.inf
+    repaid = closing <= paid_off_tolerance(principal)
+    # argmax of a row with no repaid month is 0; such a row runs to the horizon
+    last = np.where(repaid.any(axis=1), np.argmax(repaid, axis=1), horizon - 1)
+    rows_index = np.arange(rows)
+    before = np.where(last > 0, closing[rows_index, np.maximum(last - 1, 0)], principal)
+    paid_before = np.where(last > 0, np.cumsum(due, axis=1)[rows_index, np.maximum(last - 1, 0)], 0.0)
+    total_paid = paid_before + before * (1 + rate)
+    return last + 1, total_paid
+
+
+def scenario_grid(principal, rates, tenures, extra_pcts=(0,), lump_sums=(0,), lump_months=(12,)):
+    """Evaluate every combination of rate, tenure, extra EMI %, lump sum and timing
+
+    Returns a dict of equal-length NumPy columns, one entry per scenario. All
+    scenarios are computed together as a (scenarios x months) array; savings
+    are measured against the same rate and tenure without prepayments.
+    """
+    principal = float(principal)
+    if principal <= 0:
+        raise ValueError('principal must be positive')
+    rates = np.asarray(rates, dtype=float)
+    tenures = np.asarray(tenures, dtype=int)
+    extra_pcts = np.asarray(extra_pcts, dtype=float)
+    lump_sums = np.asarray(lump_sums, dtype=float)
+    lump_months = np.asarray(lump_months, dtype=int)
+    if (rates < 0).any() or (extra_pcts < 0).any() or (lump_sums < 0).any():
+        raise ValueError('rates, extra percentages and lump sums must not be negative')
+    if (tenures <= 0).any() or (lump_months <= 0).any():
+        raise ValueError('tenures and lump sum months must be positive')
+
+    grid = np.meshgrid(rates, tenures, extra_pcts, lump_sums, lump_months, indexing='ij')
+    rate, tenure, extra_pct, lump, lump_month = (axis.ravel() for axis in grid)
+    # Without a lump sum its timing is irrelevant, and a lump sum after the
+    # tenure never happens: keep one scenario for each
+    keep = ((lump > 0) & (lump_month <= tenure)) | ((lump == 0) & (lump_month == lump_months.min()))
+    rate, tenure, extra_pct, lump, lump_month = (a[keep] for a in (rate, tenure, extra_pct, lump, lump_month))
+    lump_month = np.where(lump > 0, lump_month, 0)
+
+    monthly = monthly_rate(rate)
+    base_emi = emi(principal, rate, tenure)
+    base_interest = base_emi * tenure - principal
+    extra = base_emi * extra_pct / 100
+
+    horizon = int(tenure.max())
+    block = max(1, GRID_BLOCK_CELLS // horizon)
+    months = np.empty(len(rate), dtype=int)
+    total_paid = np.empty(len(rate))
+    for start in range(0, len(rate), block):
+        part = slice(start, start + block)
+        months[part], total_paid[part] = _grid_block(
+            principal, monthly[part], tenure[part], base_emi[part], extra[part],
+            lump[part], np.maximum(lump_month[part] - 1, 0), horizon
+        )
+
+    total_interest = total_paid - principal
+    return {
+        'rate': rate,
+        'tenure': tenure,
+        'extra_pct': extra_pct,
+        'lump_sum': lump,
+        'lump_month': lump_month,
+        'emi': base_emi,
+        'monthly_outlay': base_emi + extra,
+        'months': months,
+        'total_interest': total_interest,
+        'interest_saved': base_interest - total_interest,
+        'months_saved': tenure - months
+    }
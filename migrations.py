@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the Personal Finance Tracker database
+Each migration runs once, in order, and is recorded in schema_version.
+Append new migrations to MIGRATIONS; never edit one that has shipped.
+"""
+
+import calendar
+import hashlib
+import sys
+from datetime import datetime
+
+
+def _column_names(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+
+
+# Migrations never call application code: the helpers below are frozen
+# copies of what the application did when each migration shipped, so a
+# later change to application code cannot change what an old migration
+# does. A changed rule gets a new migration.
+
+# Rollup layout as of migration 3 (unchanged through migration 9):
+# (source table, column prefix, amount column, user expression, month expression)
+_ROLLUP_SOURCES_V3 = [
+    ('expenses', 'expense', 'amount', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('assets', 'asset', 'value', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('liabilities', 'liability', 'amount', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('income', 'income', 'amount', '0', 'substr({row}.date, 1, 7)')
+]
+_ROLLUP_PREFIXES_V3 = [source[1] for source in _ROLLUP_SOURCES_V3]
+
+_CREATE_ROLLUPS_SQL_V3 = '''
+    CREATE TABLE IF NOT EXISTS monthly_rollups (
+        user_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        category TEXT NOT NULL,
+        expense_total REAL NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        asset_total REAL NOT NULL DEFAULT 0,
+        asset_count INTEGER NOT NULL DEFAULT 0,
+        liability_total REAL NOT NULL DEFAULT 0,
+        liability_count INTEGER NOT NULL DEFAULT 0,
+        income_total REAL NOT NULL DEFAULT 0,
+        income_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, month, category)
+    )
+'''
+
+
+def _rollup_add_sql_v3(prefix, value, user, month, category):
+    return f'''
+        INSERT INTO monthly_rollups (user_id, month, category, {prefix}_total, {prefix}_count)
+        VALUES ({user}, {month}, {category}, {value}, 1)
+        ON CONFLICT (user_id, month, category) DO UPDATE SET
+            {prefix}_total = {prefix}_total + excluded.{prefix}_total,
+            {prefix}_count = {prefix}_count + 1;
+    '''
+
+
+def _rollup_remove_sql_v3(prefix, value, user, month, category):
+    key = f'user_id = {user} AND month = {month} AND category = {category}'
+    empty = ' AND '.join(f'{p}_count = 0' for p in _ROLLUP_PREFIXES_V3)
+    return f'''
+        UPDATE monthly_rollups
+        SET {prefix}_total = {prefix}_total - {value}, {prefix}_count = {prefix}_count - 1
+        WHERE {key};
+        DELETE FROM monthly_rollups WHERE {key} AND {empty};
+    '''
+
+
+def _rollup_trigger_sql_v3():
+    """CREATE TRIGGER statements that maintain monthly_rollups"""
+    statements = []
+    for table, prefix, column, user, month in _ROLLUP_SOURCES_V3:
+        new = dict(value=f'NEW.{column}', user=user.format(row='NEW'),
+                   month=month.format(row='NEW'), category='NEW.category')
+        old = dict(value=f'OLD.{column}', user=user.format(row='OLD'),
+                   month=month.format(row='OLD'), category='OLD.category')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_insert AFTER INSERT ON {table}
+            BEGIN {_rollup_add_sql_v3(prefix, **new)} END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_delete AFTER DELETE ON {table}
+            BEGIN {_rollup_remove_sql_v3(prefix, **old)} END
+        ''')
+        statements.append(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_rollup_update AFTER UPDATE ON {table}
+            BEGIN {_rollup_remove_sql_v3(prefix, **old)} {_rollup_add_sql_v3(prefix, **new)} END
+        ''')
+    return statements
+
+
+def _rebuild_rollups_v3(conn):
+    """Recompute monthly_rollups from the raw tables"""
+    columns = [f'{p}_{kind}' for p in _ROLLUP_PREFIXES_V3 for kind in ('total', 'count')]
+    expected = {}
+    for table, prefix, column, user, month in _ROLLUP_SOURCES_V3:
+        rows = conn.execute(f'''
+            SELECT {user.format(row=table)}, {month.format(row=table)}, category, SUM({column}), COUNT(*)
+            FROM {table}
+            GROUP BY 1, 2, 3
+        ''').fetchall()
+        for row in rows:
+            entry = expected.setdefault((row[0], row[1], row[2]), {})
+            entry[f'{prefix}_total'] = row[3]
+            entry[f'{prefix}_count'] = row[4]
+    conn.execute('DELETE FROM monthly_rollups')
+    conn.executemany(
+        f'INSERT INTO monthly_rollups (user_id, month, category, {", ".join(columns)}) '
+        f'VALUES ({", ".join("?" * (len(columns) + 3))})',
+        [key + tuple(values.get(c, 0) for c in columns) for key, values in expected.items()]
+    )
+
+
+# Write counters as of migration 5; migration 8 adds chit_auctions with the same triggers
+_VERSIONED_TABLES_V5 = [
+    'users', 'expenses', 'assets', 'liabilities', 'income',
+    'expense_templates', 'income_templates', 'asset_templates', 'liability_templates',
+    'recurring_deposits', 'rd_payments', 'chit_funds', 'chit_payments',
+    'gold_chits', 'gold_chit_payments'
+]
+
+_CREATE_DATA_VERSIONS_SQL_V5 = '''
+    CREATE TABLE IF NOT EXISTS data_versions (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+
+def _data_version_trigger_sql_v5(tables):
+    """Row and trigger statements that count writes to each table"""
+    statements = []
+    for table in tables:
+        statements.append(f"INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('{table}', 0)")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+    return statements
+
+
+def _rd_terms_v6(monthly_amount, annual_rate, tenure, start_date):
+    """RD maturity date (calendar months, day clamped) and amount (quarterly compounding)"""
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    month_index = start.month - 1 + int(tenure)
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    maturity = start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+    q = (1 + float(annual_rate) / 400) ** (1 / 3)
+    amount = float(monthly_amount) * q * (q ** tenure - 1) / (q - 1) if q > 1 else float(monthly_amount) * tenure
+    return maturity.strftime('%Y-%m-%d'), amount
+
+
+def _content_hash_v9(user_id, day, amount, description):
+    """Expense deduplication key: owner, date, amount and description (case and spacing ignored)"""
+    try:
+        amount = f'{float(amount):.2f}'
+    except (TypeError, ValueError):
+        amount = str(amount)
+    description = ' '.join(str(description or '').split()).casefold()
+    return hashlib.sha1(f'{user_id}|{day}|{amount}|{description}'.encode('utf-8')).hexdigest()[:16]
+
+
+def _add_owner_columns(conn):
+    """Databases created by older init_db() lack user_id/created_at on assets and liabilities"""
+    for table in ('assets', 'liabilities'):
+        columns = _column_names(conn, table)
+        if 'user_id' not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN user_id INTEGER REFERENCES users (id)')
+            conn.execute(f'UPDATE {table} SET user_id = 1')
+        if 'created_at' not in columns:
+            # ALTER TABLE cannot add a column with a CURRENT_TIMESTAMP default
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN created_at TIMESTAMP')
+            conn.execute(f'UPDATE {table} SET created_at = CURRENT_TIMESTAMP')
+
+
+def _revalue_rds(conn):
+    """Stored RD maturities used 30-day months and simple interest"""
+    rows = conn.execute('SELECT id, monthly_amount, interest_rate, tenure, start_date FROM recurring_deposits').fetchall()
+    for row in rows:
+        maturity_date, maturity_amount = _rd_terms_v6(row[1], row[2], row[3], row[4])
+        conn.execute(
+            'UPDATE recurring_deposits SET maturity_date = ?, maturity_amount = ? WHERE id = ?',
+            (maturity_date, round(maturity_amount, 2), row[0])
+        )
+
+
+def _create_monthly_rollups(conn):
+    conn.execute(_CREATE_ROLLUPS_SQL_V3)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_monthly_rollups_month ON monthly_rollups (month)')
+    for sql in _rollup_trigger_sql_v3():
+        conn.execute(sql)
+    _rebuild_rollups_v3(conn)
+
+
+def _add_expense_content_hash(conn):
+    """Deduplication key for CSV imports, backfilled for existing expenses"""
+    if 'content_hash' not in _column_names(conn, 'expenses'):
+        conn.execute('ALTER TABLE expenses ADD COLUMN content_hash TEXT')
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, user_id, date, amount, description FROM expenses WHERE id > ? ORDER BY id LIMIT 10000',
+            (last_id,)
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany('UPDATE expenses SET content_hash = ? WHERE id = ?',
+                         [(_content_hash_v9(row[1], row[2], row[3], row[4]), row[0]) for row in rows])
+        last_id = rows[-1][0]
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_expenses_content_hash ON expenses (user_id, content_hash)')
+    # The backfill went through the rollup UPDATE triggers; recompute the sums exactly
+    _rebuild_rollups_v3(conn)
+
+
+# (version, description, list of SQL statements or a callable taking the connection)
+MIGRATIONS = [
+    (1, 'Add user_id and created_at to assets and liabilities', _add_owner_columns),
+    (2, 'Indexes for the hot report, list and payment queries', [
+        # Per-user monthly totals and listings; amount/value make them covering
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_month ON expenses (user_id, month, amount)',
+        'CREATE INDEX IF NOT EXISTS idx_assets_user_month ON assets (user_id, month, value)',
+        'CREATE INDEX IF NOT EXISTS idx_liabilities_user_month ON liabilities (user_id, month, amount)',
+        # Report and AI endpoints filter by month across all users
+        'CREATE INDEX IF NOT EXISTS idx_expenses_month ON expenses (month, amount)',
+        'CREATE INDEX IF NOT EXISTS idx_assets_month ON assets (month, value)',
+        'CREATE INDEX IF NOT EXISTS idx_liabilities_month ON liabilities (month, amount)',
+        # Date ranges (weekly report) and date ordering
+        'CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)',
+        'CREATE INDEX IF NOT EXISTS idx_income_date ON income (date)',
+        # Payment histories are always read per scheme in month order
+        'CREATE INDEX IF NOT EXISTS idx_rd_payments_rd ON rd_payments (rd_id, month_number)',
+        'CREATE INDEX IF NOT EXISTS idx_chit_payments_chit ON chit_payments (chit_id, month_number)',
+        'CREATE INDEX IF NOT EXISTS idx_gold_chit_payments_chit ON gold_chit_payments (gold_chit_id, month_number)'
+    ]),
+    (3, 'Monthly rollup table maintained by triggers', _create_monthly_rollups),
+    (4, 'Keyset pagination indexes for the list endpoints', [
+        # Index entries end in the rowid, so (user_id, date) is also ordered by id
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS idx_assets_user_month_id ON assets (user_id, month, id)',
+        'CREATE INDEX IF NOT EXISTS idx_liabilities_user_month_id ON liabilities (user_id, month, id)'
+    ]),
+    (5, 'Per-table write counters for response caching',
+     [_CREATE_DATA_VERSIONS_SQL_V5] + _data_version_trigger_sql_v5(_VERSIONED_TABLES_V5)),
+    (6, 'Recompute RD maturity dates and amounts with calendar months and quarterly compounding', _revalue_rds),
+    (7, 'Index RD payments by date for point-in-time valuation', [
+        'CREATE INDEX IF NOT EXISTS idx_rd_payments_date ON rd_payments (payment_date)'
+    ]),
+    (8, 'Chit auction results', [
+        '''
+        CREATE TABLE IF NOT EXISTS chit_auctions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chit_id INTEGER NOT NULL,
+            month_number INTEGER NOT NULL,
+            discount REAL NOT NULL,
+            auction_date TEXT,
+            won_by_member INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (chit_id) REFERENCES chit_funds (id),
+            UNIQUE (chit_id, month_number)
+        )
+        '''
+    ] + _data_version_trigger_sql_v5(['chit_auctions'])),
+    (9, 'Content hash on expenses for import deduplication', _add_expense_content_hash),
+    (10, 'CSV import jobs and their progress', [
+        '''
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            total_bytes INTEGER NOT NULL DEFAULT 0,
+            bytes_read INTEGER NOT NULL DEFAULT 0,
+            rows_read INTEGER NOT NULL DEFAULT 0,
+            inserted INTEGER NOT NULL DEFAULT 0,
+            duplicates INTEGER NOT NULL DEFAULT 0,
+            invalid INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            errors TEXT NOT NULL DEFAULT '[]',
+            message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_import_jobs_user ON import_jobs (user_id, id)'
+    ])
+]
+
+
+def ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def current_version(conn):
+    """Highest applied migration version (0 for a fresh database)"""
+    ensure_version_table(conn)
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, target=None):
+    """Apply all pending migrations in order; returns the versions applied"""
+    applied = []
+    version = current_version(conn)
+    conn.commit()
+    for number, description, step in MIGRATIONS:
+        if number <= version or (target is not None and number > target):
+            continue
+        try:
+            conn.execute('BEGIN')
+            if callable(step):
+                step(conn)
+            else:
+                for sql in step:
+                    conn.execute(sql)
+            conn.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (number, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(number)
+    return applied
+
+
+if __name__ == '__main__':
+    import simple_backend
+
+    if len(sys.argv) > 1:
+        simple_backend.DB_PATH = sys.argv[1]
+    conn = simple_backend.get_db_connection()
+    before = current_version(conn)
+    conn.close()
+    simple_backend.init_db()
+    conn = simple_backend.get_db_connection()
+    print(f"Database: {simple_backend.DB_PATH}")
+    print(f"Schema version: {before} -> {current_version(conn)}")
+    conn.close()
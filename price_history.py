@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Offline daily price history for the Personal Finance Tracker
+A CSV of daily closes (date,symbol,close; one row per symbol per day) is
+built once into a store directory (PRICE_HISTORY_DIR, default price_history
+next to this module):
+
+    close.npy       float32 (symbols x dates) closing prices, one row per symbol
+    dates.npy       datetime64[D] trading dates
+    manifest.json   symbols and date range; written last, so a half-built
+                    store is never picked up
+
+The backend memory-maps close.npy, so nothing is parsed per request and
+only the pages a query touches are read. Gaps after a symbol's first quote
+are forward-filled at build time; before it the row is NaN. Indicators are
+computed for every requested symbol at once, one NumPy operation over the
+(symbols x days) slice.
+
+Usage:
+    python price_history.py build prices.csv [store_dir]
+    python price_history.py info [store_dir]
+"""
+
+import csv
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+PRICE_HISTORY_DIR = os.environ.get(
+    'PRICE_HISTORY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_history')
+)
+CLOSE_COLUMNS = ('close', 'adj_close', 'price')
+TRADING_DAYS = 252
+# Bars of history before the requested range used to settle the RSI average
+RSI_WARMUP_FACTOR = 10
+
+
+def forward_fill(close):
+    """Fill gaps in each row with the last earlier price; leading NaNs stay"""
+    valid = ~np.isnan(close)
+    last = np.where(valid, np.arange(close.shape[1]), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    return close[np.arange(close.shape[0])[:, None], last]
+
+
+def build_store(csv_path, store_dir=None):
+    """Parse the CSV once and write the memory-mappable store; returns the manifest"""
+    store_dir = store_dir or PRICE_HISTORY_DIR
+    symbols, dates, closes = [], [], []
+    with open(csv_path, newline='') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        column = next((name for name in CLOSE_COLUMNS if name in fields), None)
+        if 'date' not in fields or 'symbol' not in fields or column is None:
+            raise ValueError(f'{csv_path} needs date, symbol and close columns')
+        for line, row in enumerate(reader, start=2):
+            try:
+                dates.append(np.datetime64(row['date'].strip(), 'D'))
+                closes.append(float(row[column]))
+            except (AttributeError, ValueError):
+                raise ValueError(f'{csv_path}, line {line}: bad date or close')
+            symbols.append(row['symbol'].strip().upper())
+    if not closes:
+        raise ValueError(f'{csv_path} has no prices')
+
+    symbol_names, symbol_index = np.unique(np.array(symbols), return_inverse=True)
+    day_values, day_index = np.unique(np.array(dates, dtype='datetime64[D]'), return_inverse=True)
+    close = np.full((len(symbol_names), len(day_values)), np.nan, dtype=np.float32)
+    # A repeated (symbol, date) keeps the later row
+    close[symbol_index, day_index] = np.array(closes, dtype=np.float32)
+    close = forward_fill(close)
+
+    os.makedirs(store_dir, exist_ok=True)
+    for name, array in (('close', close), ('dates', day_values)):
+        temporary = os.path.join(store_dir, f'{name}.tmp.npy')
+        np.save(temporary, array)
+        os.replace(temporary, os.path.join(store_dir, f'{name}.npy'))
+    manifest = {
+        'symbols': symbol_names.tolist(),
+        'first_date': str(day_values[0]),
+        'last_date': str(day_values[-1]),
+        'days': len(day_values),
+        'built_at': datetime.now().isoformat(timespec='seconds')
+    }
+    temporary = os.path.join(store_dir, 'manifest.tmp.json')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temporary, os.path.join(store_dir, 'manifest.json'))
+    return manifest
+
+
+class PriceStore:
+    """Memory-mapped (symbols x dates) close matrix"""
+
+    def __init__(self, store_dir):
+        manifest_path = os.path.join(store_dir, 'manifest.json')
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        stat = os.stat(manifest_path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.symbols = self.manifest['symbols']
+        self.index = {symbol: row for row, symbol in enumerate(self.symbols)}
+        self.dates = np.load(os.path.join(store_dir, 'dates.npy'))
+        self.close = np.load(os.path.join(store_dir, 'close.npy'), mmap_mode='r')
+
+    def rows(self, symbols=None):
+        """Row numbers of the given symbols (all when None); unknown symbols raise KeyError"""
+        if not symbols:
+            return np.arange(len(self.symbols))
+        missing = [s for s in symbols if s not in self.index]
+        if missing:
+            raise KeyError(', '.join(missing))
+        return np.array([self.index[s] for s in symbols], dtype=int)
+
+    def day(self, date, side='right'):
+        """Index just past `date` (side='right') or of the first day on/after it (side='left')"""
+        return int(np.searchsorted(self.dates, np.datetime64(date, 'D'), side=side))
+
+    def window(self, rows, start, stop):
+        """float64 copy of close[rows, start:stop]"""
+        return np.asarray(self.close[rows, start:stop], dtype=float)
+
+
+def rolling_mean(close, window):
+    """Simple moving average along each row; NaN until `window` valid prices"""
+    valid = ~np.isnan(close)
+    total = np.cumsum(np.where(valid, close, 0.0), axis=1)
+    count = np.cumsum(valid, axis=1)
+    total = np.concatenate([np.zeros((len(close), 1)), total], axis=1)
+    count = np.concatenate([np.zeros((len(close), 1), dtype=int), count], axis=1)
+    days = close.shape[1]
+    start = np.maximum(np.arange(1, days + 1) - window, 0)
+    sums = total[:, 1:] - total[:, start]
+    full = (count[:, 1:] - count[:, start]) == window
+    with np.errstate(invalid='ignore'):
+        return np.where(full & (np.arange(1, days + 1) >= window), sums / window, np.nan)
+
+
+def volatility(close, window):
+    """Annualized standard deviation of the last `window` daily log returns"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(close[:, -(window + 1):]), axis=1)
+    if returns.shape[1] < window:
+        return np.full(len(close), np.nan)
+    return returns.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+
+
+def drawdown(close):
+    """Drop from the running peak at every day (0 at a new high, -0.2 for 20% below)"""
+    peak = np.fmax.accumulate(close, axis=1)
+    with np.errstate(invalid='ignore'):
+        return close / peak - 1
+
+
+def max_drawdown(close):
+    depth = drawdown(close)
+    worst = np.where(np.isnan(depth), np.inf, depth).min(axis=1)
+    return np.where(np.isfinite(worst), worst, np.nan)
+
+
+def rsi(close, window):
+    """Wilder's relative strength index at the last day of each row
+
+    The average gain and loss start as plain means of the first `window`
+    changes and are then smoothed with factor 1/window; the loop runs over
+    days, every symbol at once. Rows that start late begin at their first
+    price.
+    """
+    change = np.diff(close, axis=1)
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    symbols, days = change.shape
+    first = np.argmax(~np.isnan(change), axis=1)
+    avg_gain = np.full(symbols, np.nan)
+    avg_loss = np.full(symbols, np.nan)
+    for day in range(days):
+        seed = first + window - 1 == day
+        if seed.any():
+            span = slice(day - window + 1, day + 1)
+            avg_gain[seed] = gain[seed, span].mean(axis=1)
+            avg_loss[seed] = loss[seed, span].mean(axis=1)
+        running = first + window - 1 < day
+        avg_gain[running] += (gain[running, day] - avg_gain[running]) / window
+        avg_loss[running] += (loss[running, day] - avg_loss[running]) / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100 - 100 / (1 + avg_gain / avg_loss)
+    flat = np.where(avg_gain > 0, 100.0, 50.0)
+    return np.where(np.isnan(avg_loss), np.nan, np.where(avg_loss == 0, flat, value))
+
+
+def period_return(close, dates):
+    """Total and annualized return from each row's first to its last price in the slice"""
+    valid = ~np.isnan(close)
+    has_data = valid.any(axis=1)
+    first = np.argmax(valid, axis=1)
+    last = close.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    rows = np.arange(len(close))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total = close[rows, last] / close[rows, first] - 1
+        years = (dates[last] - dates[first]).astype(float) / 365.25
+        annualized = np.where(years > 0, (1 + total) ** (1 / np.where(years > 0, years, 1)) - 1, np.nan)
+    return np.where(has_data, total, np.nan), np.where(has_data, annualized, np.nan)
+
+
+def indicators(store, rows, start_date=None, end_date=None, sma_windows=(20, 50), volatility_window=20,
+               rsi_window=14):
+    """Indicator columns for the given store rows over [start_date, end_date]
+
+    Returns and drawdown cover the range; moving averages, volatility and
+    RSI are their values on the last day, computed from as much history
+    before the range as they need.
+    """
+    stop = store.day(end_date) if end_date else len(store.dates)
+    start = store.day(start_date, side='left') if start_date else max(stop - TRADING_DAYS, 0)
+    if stop <= start:
+        raise ValueError('no trading days in the requested range')
+    lookback = max(max(sma_windows, default=0), volatility_window + 1, rsi_window * RSI_WARMUP_FACTOR)
+    first = max(min(start, stop - lookback), 0)
+    close = store.window(rows, first, stop)
+    in_range = close[:, start - first:]
+
+    total, annualized = period_return(in_range, store.dates[start:stop])
+    result = {
+        'symbol': [store.symbols[row] for row in rows],
+        'close': close[:, -1],
+        'return_pct': total * 100,
+        'annualized_return_pct': annualized * 100,
+        'max_drawdown_pct': max_drawdown(in_range) * 100,
+        f'volatility_{volatility_window}_pct': volatility(close, volatility_window) * 100,
+        f'rsi_{rsi_window}': rsi(close[:, -rsi_window * RSI_WARMUP_FACTOR:], rsi_window)
+    }
+    for window in sma_windows:
+        tail = close[:, -window:]
+        result[f'sma_{window}'] = tail.mean(axis=1) if tail.shape[1] == window else np.full(len(rows), np.nan)
+    return {
+        'from': str(store.dates[start]),
+        'to': str(store.dates[stop - 1]),
+        'days': stop - start,
+        'columns': result
+    }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(store_dir=None):
+    """The memory-mapped store, reopened after a rebuild; None when nothing is built"""
+    global _store
+    store_dir = store_dir or PRICE_HISTORY_DIR
+    try:
+        stat = os.stat(os.path.join(store_dir, 'manifest.json'))
+    except OSError:
+        return None
+    with _store_lock:
+        if _store is None or _store[0] != store_dir or _store[1].version != (stat.st_mtime_ns, stat.st_size):
+            _store = (store_dir, PriceStore(store_dir))
+        return _store[1]
+
+
+def store_version(store_dir=None):
+    store = get_store(store_dir)
+    return store.version if store is not None else None
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'info') or (sys.argv[1] == 'build' and len(sys.argv) < 3):
+        print(__doc__.split('Usage:')[1])
+        sys.exit(1)
+    try:
+        if sys.argv[1] == 'build':
+            info = build_store(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        else:
+            store = get_store(sys.argv[2] if len(sys.argv) > 2 else None)
+            if store is None:
+                raise ValueError('no price history has been built')
+            info = store.manifest
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {len(info['symbols'])} symbols, {info['days']} days from {info['first_date']} to {info['last_date']}")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo floating-rate simulation for loan closure strategies
+Draws random paths for a floating annual rate that resets every few months.
+The rate reverts towards an anchor that starts at today's rate and moves
+by `drift` percentage points a year; `volatility` is in percentage points
+per square-root year. The simulator then runs every closure strategy across all paths at once. For rates that
+vary month to month the balance recurrence B[k] = B[k-1] * (1 + r[k]) - P[k]
+has the closed form B[k] = G[k] * (B0 - cumsum(P / G)[k]) with
+G = cumprod(1 + r), so a strategy costs a few (paths x months) array
+operations.
+
+Paths are simulated in fixed-size chunks, each with its own child seed, so
+a seed gives the same result whether the chunks run in this process or in
+the process pool used for large path counts.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from loan_engine import MAX_TENURE_FACTOR, emi, paid_off_tolerance
+
+STRATEGIES = {
+    'current': 'Keep the current EMI',
+    'increase_emi': 'Increase EMI by 20%',
+    'lump_sum': 'Lump sum of two months income now',
+    'balance_transfer': 'Balance transfer to a 20% lower rate',
+    'biweekly': 'Bi-weekly payments (one extra EMI a year)',
+    'annual_bonus': 'Two months income from the bonus every year'
+}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_PATHS = 2000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers):
+    """Shared process pool, started on first use
+
+    Workers are spawned rather than forked: the backend is multi-threaded
+    and a forked child could inherit locks held by other request threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def reset_after_fork():
+    """Forget a pool inherited from the parent process; its workers are not ours"""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def draw_rate_paths(rng, base_rate, horizon, paths, drift=0.0, volatility=1.0,
+                    mean_reversion=0.5, reset_months=3, floor=0.0):
+    """(paths x horizon) annual rates; the first reset period keeps base_rate
+
+    Each reset moves the rate by mean_reversion * (anchor - rate) per year
+    plus a normal shock, all paths at once; mean_reversion=0 gives a plain
+    random walk with drift.
+    """
+    periods = -(-horizon // reset_months)
+    step = reset_months / 12
+    shocks = rng.normal(0.0, volatility * np.sqrt(step), size=(paths, periods))
+    pull = min(mean_reversion * step, 1.0)
+    annual = np.empty((paths, periods))
+    annual[:, 0] = base_rate
+    for period in range(1, periods):
+        anchor = base_rate + drift * period * step
+        previous = annual[:, period - 1]
+        annual[:, period] = previous + pull * (anchor - previous) + shocks[:, period]
+        if not pull:
+            annual[:, period] += drift * step
+    annual = np.maximum(annual, floor)
+    return np.repeat(annual, reset_months, axis=1)[:, :horizon]
+
+
+def run_paths(principal, monthly_rates, growth, payments):
+    """Total interest and payoff month of one payment plan under every rate path
+
+    `growth` is cumprod(1 + monthly_rates) along each path. Paths that do not
+    repay within the horizon report the horizon as their payoff month and
+    count their outstanding balance as interest still due.
+    """
+    paths, horizon = monthly_rates.shape
+    closing = growth * (principal - np.cumsum(payments / growth, axis=1))
+    repaid = closing <= paid_off_tolerance(principal)
+    paid_off = repaid.any(axis=1)
+    last = np.where(paid_off, repaid.argmax(axis=1), horizon - 1)
+
+    rows = np.arange(paths)
+    previous = np.maximum(last - 1, 0)
+    paid_before = np.where(last > 0, np.cumsum(payments)[previous], 0.0)
+    before = np.where(last > 0, closing[rows, previous], principal)
+    final = before * (1 + monthly_rates[rows, last])
+    total_paid = np.where(paid_off, paid_before + final, np.cumsum(payments)[-1])
+    outstanding = np.where(paid_off, 0.0, closing[:, -1])
+    return total_paid + outstanding - principal, last + 1, paid_off
+
+
+def strategy_payments(loan, horizon):
+    """Monthly payment vector for every strategy (rates handled separately)"""
+    current_emi = emi(loan['principal'], loan['rate'], loan['months'])
+    base = np.full(horizon, current_emi)
+    lump = loan['monthly_income'] * 2
+
+    lump_sum = base.copy()
+    lump_sum[0] += min(lump, loan['principal'])
+    annual_bonus = base.copy()
+    annual_bonus[11::12] += lump
+    return {
+        'current': base,
+        'increase_emi': base * 1.2,
+        'lump_sum': lump_sum,
+        'balance_transfer': np.full(horizon, emi(loan['principal'], loan['rate'] * 0.8, loan['months'])),
+        'biweekly': base + current_emi / 12,
+        'annual_bonus': annual_bonus
+    }
+
+
+def simulate_chunk(loan, model, seed, paths):
+    """Simulate one chunk of paths; runs in-process or in a pool worker"""
+    rng = np.random.default_rng(seed)
+    horizon = loan['months'] * MAX_TENURE_FACTOR
+    annual = draw_rate_paths(rng, loan['rate'], horizon, paths, **model)
+    # A balance transfer keeps the floating benchmark but at a 20% lower spread
+    transfer = np.maximum(annual - loan['rate'] * 0.2, model.get('floor', 0.0))
+    floating = {}
+    for key, rates in (('floating', annual / 1200), ('transfer', transfer / 1200)):
+        floating[key] = (rates, np.cumprod(1 + rates, axis=1))
+
+    results = {}
+    for name, payments in strategy_payments(loan, horizon).items():
+        rates, growth = floating['transfer' if name == 'balance_transfer' else 'floating']
+        results[name] = run_paths(loan['principal'], rates, growth, payments)
+    return results
+
+
+def _bands(values):
+    return {f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def simulate_strategies(principal, rate, months, monthly_income, paths=2000, drift=0.0,
+                        volatility=1.0, mean_reversion=0.5, reset_months=3, floor=0.0, seed=None,
+                        workers=2, pool_threshold=20000):
+    """Percentile bands of total interest and payoff month for every strategy"""
+    if principal <= 0 or months <= 0:
+        raise ValueError('loan amount and remaining months must be positive')
+    if paths <= 0 or reset_months <= 0:
+        raise ValueError('paths and reset_months must be positive')
+    if volatility < 0 or mean_reversion < 0:
+        raise ValueError('volatility and mean_reversion must not be negative')
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**32)
+
+    loan = {'principal': float(principal), 'rate': float(rate), 'months': int(months),
+            'monthly_income': float(monthly_income)}
+    model = {'drift': float(drift), 'volatility': float(volatility), 'mean_reversion': float(mean_reversion),
+             'reset_months': int(reset_months), 'floor': float(floor)}
+    sizes = [min(CHUNK_PATHS, paths - start) for start in range(0, paths, CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    in_pool = paths >= pool_threshold and workers > 1
+    if in_pool:
+        executor = get_executor(workers)
+        chunks = list(executor.map(simulate_chunk, [loan] * len(sizes), [model] * len(sizes), seeds, sizes))
+    else:
+        chunks = [simulate_chunk(loan, model, s, n) for s, n in zip(seeds, sizes)]
+
+    horizon = loan['months'] * MAX_TENURE_FACTOR
+    strategies = {}
+    for name, label in STRATEGIES.items():
+        interest = np.concatenate([chunk[name][0] for chunk in chunks])
+        payoff = np.concatenate([chunk[name][1] for chunk in chunks])
+        paid_off = np.concatenate([chunk[name][2] for chunk in chunks])
+        strategies[name] = {
+            'strategy': label,
+            'total_interest': _bands(interest),
+            'mean_interest': round(float(interest.mean()), 2),
+            'payoff_month': _bands(payoff),
+            'unpaid_share': round(float(1 - paid_off.mean()), 4)
+        }
+
+    baseline = strategies['current']['mean_interest']
+    for result in strategies.values():
+        result['expected_interest_saved'] = round(baseline - result['mean_interest'], 2)
+
+    return {
+        'paths': paths,
+        'seed': seed,
+        'model': model,
+        'horizon_months': horizon,
+        'ran_in_process_pool': in_pool,
+        'strategies': strategies,
+        'best_strategy': max(strategies, key=lambda name: strategies[name]['expected_interest_saved'])
+    }
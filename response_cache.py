@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Response caching for the Personal Finance Tracker backend
+Report and AI endpoints are pure functions of the database, so their JSON
+is cached keyed by route, query string, user and the version counters of
+the tables they read. Triggers (created by migrations 5 and 8) bump a
+table's counter on every write, so a write makes exactly the dependent
+entries unreachable; LRU eviction then reclaims them.
+
+The same counters give every read endpoint a strong ETag that can be
+checked before running any query (conditional_get).
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, request
+
+
+def read_data_versions(conn):
+    """Current version counter of every versioned table"""
+    rows = conn.execute('SELECT table_name, version FROM data_versions').fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def request_key():
+    """The parts of the current request a cached response depends on
+
+    Today's date is included because several reports default to the
+    current month.
+    """
+    return (
+        request.path,
+        tuple(sorted(request.args.items(multi=True))),
+        request.headers.get('Authorization', ''),
+        datetime.now().strftime('%Y-%m-%d')
+    )
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def conditional_get(versions=None, cache_control='no-cache'):
+    """Decorator adding a strong ETag and If-None-Match handling to GET views
+
+    With `versions` (a callable returning the dependency version tuple) the
+    ETag is computed before the view runs, so a matching request gets a 304
+    without touching the data. Without it (static endpoints) the ETag is a
+    hash of the body. `cache_control` may be a string or a callable.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            header = cache_control() if callable(cache_control) else cache_control
+            etag = make_etag(request_key(), versions()) if versions is not None else None
+            if etag is not None and request.if_none_match.contains(etag):
+                return not_modified(etag, header)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            if etag is None:
+                etag = make_etag(response.get_data())
+                if request.if_none_match.contains(etag):
+                    return not_modified(etag, header)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = header
+            return response
+        return wrapper
+    return decorator
+
+
+def not_modified(etag, cache_control):
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses bounded by entry count and bytes"""
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, status, mimetype):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[0])
+            self._entries[key] = (body, status, mimetype)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0
+            }
+
+    def cached(self, versions):
+        """Decorator for GET views; `versions` returns the dependency version tuple"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = request_key() + (versions(),)
+                entry = self.get(key)
+                if entry is not None:
+                    body, status, mimetype = entry
+                    return current_app.response_class(body, status=status, mimetype=mimetype)
+
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.put(key, response.get_data(), response.status_code, response.mimetype)
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Monthly rollups for the Personal Finance Tracker
+monthly_rollups holds per user/month/category totals and row counts for
+expenses, assets, liabilities and income. SQLite triggers (created by
+migration 3) keep it current on every INSERT/UPDATE/DELETE, so report
+endpoints read a handful of rollup rows instead of summing raw rows on
+every request.
+
+Usage:
+    python rollups.py check [db_path]     Compare rollups with the raw tables
+    python rollups.py rebuild [db_path]   Recompute rollups from scratch
+"""
+
+import sys
+
+# (source table, column prefix in monthly_rollups, amount column, user expression, month expression)
+# income has no owner column yet; its rows roll up under user_id 0
+ROLLUP_SOURCES = [
+    ('expenses', 'expense', 'amount', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('assets', 'asset', 'value', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('liabilities', 'liability', 'amount', 'COALESCE({row}.user_id, 0)', '{row}.month'),
+    ('income', 'income', 'amount', '0', 'substr({row}.date, 1, 7)')
+]
+
+ROLLUP_PREFIXES = [source[1] for source in ROLLUP_SOURCES]
+
+
+def _expected_rows(conn):
+    """Rollup rows recomputed from the raw tables, keyed by (user_id, month, category)"""
+    expected = {}
+    for table, prefix, column, user, month in ROLLUP_SOURCES:
+        rows = conn.execute(f'''
+            SELECT {user.format(row=table)} as user_id, {month.format(row=table)} as month, category,
+                   SUM({column}) as total, COUNT(*) as count
+            FROM {table}
+            GROUP BY 1, 2, 3
+        ''').fetchall()
+        for row in rows:
+            entry = expected.setdefault((row[0], row[1], row[2]), {})
+            entry[f'{prefix}_total'] = row[3]
+            entry[f'{prefix}_count'] = row[4]
+    return expected
+
+
+def rebuild_rollups(conn):
+    """Recompute monthly_rollups from the raw tables; returns the row count
+
+    Reports are cached and ETagged by the write counters of the tables they
+    summarize, so those counters are bumped in the same transaction: the
+    repaired totals must not hide behind a stale cache entry or a 304.
+    """
+    expected = _expected_rows(conn)
+    columns = [f'{p}_{kind}' for p in ROLLUP_PREFIXES for kind in ('total', 'count')]
+    conn.execute('DELETE FROM monthly_rollups')
+    conn.executemany(
+        f'INSERT INTO monthly_rollups (user_id, month, category, {", ".join(columns)}) '
+        f'VALUES ({", ".join("?" * (len(columns) + 3))})',
+        [key + tuple(values.get(c, 0) for c in columns) for key, values in expected.items()]
+    )
+    tables = [source[0] for source in ROLLUP_SOURCES]
+    conn.execute(
+        f'UPDATE data_versions SET version = version + 1 WHERE table_name IN ({", ".join("?" * len(tables))})',
+        tables
+    )
+    return len(expected)
+
+
+def check_rollups(conn, tolerance=0.005):
+    """List every rollup row that disagrees with the raw tables"""
+    expected = _expected_rows(conn)
+    actual = {
+        (row['user_id'], row['month'], row['category']): dict(row)
+        for row in conn.execute('SELECT * FROM monthly_rollups').fetchall()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=lambda k: tuple(str(part) for part in k)):
+        want = expected.get(key, {})
+        have = actual.get(key, {})
+        for prefix in ROLLUP_PREFIXES:
+            want_total = want.get(f'{prefix}_total', 0)
+            have_total = have.get(f'{prefix}_total', 0)
+            want_count = want.get(f'{prefix}_count', 0)
+            have_count = have.get(f'{prefix}_count', 0)
+            if want_count != have_count or abs(want_total - have_total) > tolerance:
+                mismatches.append({
+                    'user_id': key[0],
+                    'month': key[1],
+                    'category': key[2],
+                    'kind': prefix,
+                    'expected_total': want_total,
+                    'actual_total': have_total,
+                    'expected_count': want_count,
+                    'actual_count': have_count
+                })
+    return mismatches
+
+
+def totals_by_month(conn, first_month, last_month, user_id=None):
+    """Expense, asset, liability and income totals for each month in a range
+
+    Months without any rows are absent from the result.
+    """
+    sql = '''
+        SELECT month,
+               SUM(expense_total) as expenses, SUM(asset_total) as assets,
+               SUM(liability_total) as liabilities, SUM(income_total) as income
+        FROM monthly_rollups
+        WHERE month BETWEEN ? AND ?
+    '''
+    params = [first_month, last_month]
+    if user_id is not None:
+        sql += ' AND user_id = ?'
+        params.append(user_id)
+    sql += ' GROUP BY month'
+    return {
+        row['month']: {
+            'expenses': row['expenses'] or 0,
+            'assets': row['assets'] or 0,
+            'liabilities': row['liabilities'] or 0,
+            'income': row['income'] or 0
+        }
+        for row in conn.execute(sql, params).fetchall()
+    }
+
+
+def month_totals(conn, month, user_id=None):
+    """Totals for a single month (zeros when the month has no rows)"""
+    return totals_by_month(conn, month, month, user_id).get(
+        month, {'expenses': 0, 'assets': 0, 'liabilities': 0, 'income': 0}
+    )
+
+
+if __name__ == '__main__':
+    import simple_backend
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('check', 'rebuild'):
+        print(__doc__)
+        sys.exit(2)
+    if len(sys.argv) > 2:
+        simple_backend.DB_PATH = sys.argv[2]
+
+    simple_backend.init_db()
+    conn = simple_backend.get_db_connection()
+    if sys.argv[1] == 'rebuild':
+        rows = rebuild_rollups(conn)
+        conn.commit()
+        print(f"Rebuilt monthly_rollups: {rows} rows")
+    else:
+        mismatches = check_rollups(conn)
+        for m in mismatches:
+            print(f"MISMATCH {m['kind']} user={m['user_id']} {m['month']} {m['category']}: "
+                  f"expected {m['expected_total']} ({m['expected_count']} rows), "
+                  f"found {m['actual_total']} ({m['actual_count']} rows)")
+        print(f"{len(mismatches)} mismatches")
+        conn.close()
+        sys.exit(1 if mismatches else 0)
+    conn.close()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Production server for the Personal Finance Tracker
+Runs the backend under gunicorn: a master process that pre-forks worker
+processes, each serving requests on a pool of threads (gthread workers).
+Workers are recycled after a number of requests (with jitter, so they do
+not all restart together), and the database is initialised and migrated
+once in the master before any worker starts. Server-sent events
+(/api/events) are turned off here, as each stream would pin a worker
+thread; pages fall back to polling. asgi_app.py serves them.
+
+Signals to the master process:
+    HUP         re-read settings and gracefully replace every worker
+    TERM        graceful shutdown (workers finish their requests)
+    TTIN/TTOU   add / remove one worker
+
+Without gunicorn (e.g. on Windows) it falls back to a threaded, single
+process server with debugging and the reloader off.
+
+Usage: python serve.py [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+                       [--max-requests N] [--backlog N] [--timeout S] [--fallback]
+Every option can also be set with an environment variable: SERVER_BIND,
+SERVER_WORKERS, SERVER_THREADS, SERVER_MAX_REQUESTS,
+SERVER_MAX_REQUESTS_JITTER, SERVER_BACKLOG, SERVER_TIMEOUT,
+SERVER_GRACEFUL_TIMEOUT, SERVER_KEEPALIVE.
+"""
+
+import argparse
+import os
+import sys
+
+import events
+import rate_simulator
+import simple_backend
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = None
+
+
+def cpu_count():
+    """CPUs this process may run on (respects taskset/cgroup affinity)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description='Serve the Personal Finance Tracker API')
+    parser.add_argument('--bind', default=env('SERVER_BIND', '0.0.0.0:5000'))
+    parser.add_argument('--workers', type=int, default=int(env('SERVER_WORKERS', cpu_count())))
+    parser.add_argument('--threads', type=int, default=int(env('SERVER_THREADS', 4)))
+    parser.add_argument('--max-requests', type=int, default=int(env('SERVER_MAX_REQUESTS', 5000)))
+    parser.add_argument('--max-requests-jitter', type=int, default=int(env('SERVER_MAX_REQUESTS_JITTER', 500)))
+    parser.add_argument('--backlog', type=int, default=int(env('SERVER_BACKLOG', 2048)))
+    parser.add_argument('--timeout', type=int, default=int(env('SERVER_TIMEOUT', 60)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(env('SERVER_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--keepalive', type=int, default=int(env('SERVER_KEEPALIVE', 5)))
+    parser.add_argument('--fallback', action='store_true',
+                        help='use the threaded single-process server even if gunicorn is installed')
+    parser.add_argument('--production', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def post_fork(server, worker):
+    """Per-worker state must not be shared with the master or other workers"""
+    simple_backend.reset_pool()
+    rate_simulator.reset_after_fork()
+    events.reset_after_fork()
+
+
+def gunicorn_options(args):
+    return {
+        'bind': args.bind,
+        'workers': max(args.workers, 1),
+        'worker_class': 'gthread',
+        'threads': max(args.threads, 1),
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'backlog': args.backlog,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': args.keepalive,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'accesslog': os.environ.get('SERVER_ACCESS_LOG'),
+        'errorlog': '-'
+    }
+
+
+if BaseApplication is not None:
+    class FinanceServer(BaseApplication):
+        """gunicorn application serving simple_backend.app"""
+
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            return simple_backend.app
+
+
+def prepare_database():
+    """Create and migrate the database once, then drop the connections before forking"""
+    simple_backend.init_db()
+    simple_backend.reset_pool()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prepare_database()
+    if BaseApplication is None or args.fallback:
+        host, _, port = args.bind.rpartition(':')
+        if BaseApplication is None:
+            print("gunicorn is not installed (pip install gunicorn); using the threaded single-process server")
+        simple_backend.app.run(host=host or '0.0.0.0', port=int(port), debug=False, use_reloader=False,
+                               threaded=True)
+        return
+    # Each event stream would pin one of the few gthread threads
+    simple_backend.EVENT_STREAMS = False
+    options = gunicorn_options(args)
+    print(f"Serving on {args.bind}: {options['workers']} workers x {options['threads']} threads, "
+          f"recycled every {args.max_requests} requests")
+    FinanceServer(options).run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
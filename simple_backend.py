@@ -4,12 +4,44 @@ Simple working backend for Personal Finance Tracker
 This is a minimal version that should work without issues
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g, has_app_context
 from flask_cors import CORS
 import sqlite3
 import os
+import re
+import sys
+import tempfile
+import threading
 from datetime import datetime, timedelta
 import json
+import base64
+
+import numpy as np
+from werkzeug.exceptions import HTTPException
+
+from db_pool import ConnectionPool, get_storage_profile
+from bulk_insert import (
+    MAX_BULK_ROWS, MAX_REPORTED_ERRORS, content_hash, insert_rows, parse_ndjson, validate_rows
+)
+from csv_import import create_job, job_summary, load_profiles, start_job
+from debt_optimizer import default_min_payment, loan_terms, optimize
+from events import get_broker as get_event_broker, iter_stream as iter_event_stream
+from gold_prices import get_history as get_gold_prices, history_version as gold_prices_version
+from investments import (
+    DEFAULT_MAX_DISCOUNT_PCT, FOREMAN_COMMISSION_PCT,
+    chit_cash_flows, chit_discounts, chit_prize_sweep, chit_schedule, gold_chit_cash_flows,
+    rd_cash_flows, rd_terms, series_returns, value_gold_chits, value_rds
+)
+from loan_engine import amortize, savings, scenario_grid
+from price_history import (
+    TRADING_DAYS, drawdown, get_store as get_price_store, indicators as price_indicators, rolling_mean,
+    store_version as price_store_version
+)
+from migrations import apply_migrations
+from rate_simulator import simulate_strategies
+from rollups import check_rollups, month_totals, rebuild_rollups, totals_by_month
+from response_cache import ResponseCache, conditional_get, read_data_versions
+from stock_universe import RANGE_FILTERS as STOCK_RANGE_FILTERS, get_universe as get_stock_universe
 
 # Create Flask app
 app = Flask(__name__)
@@ -18,10 +50,43 @@ CORS(app)
 # Database setup
 DB_PATH = 'finance_simple.db'
 
+# Connection pool settings (override with environment variables)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+DB_STATEMENT_CACHE = int(os.environ.get('DB_STATEMENT_CACHE', 256))
+
+# Storage profile: legacy, durable, balanced or fast (see db_pool.STORAGE_PROFILES).
+# Individual pragmas can be overridden, e.g. DB_SYNCHRONOUS=FULL
+DB_STORAGE_PROFILE = os.environ.get('DB_STORAGE_PROFILE', 'balanced')
+DB_PRAGMA_OVERRIDES = {
+    'journal_mode': os.environ.get('DB_JOURNAL_MODE'),
+    'synchronous': os.environ.get('DB_SYNCHRONOUS'),
+    'cache_size': os.environ.get('DB_CACHE_SIZE'),
+    'mmap_size': os.environ.get('DB_MMAP_SIZE'),
+    'temp_store': os.environ.get('DB_TEMP_STORE'),
+    'busy_timeout': os.environ.get('DB_BUSY_TIMEOUT')
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Response cache for report and AI endpoints
+RESPONSE_CACHE_ENTRIES = int(os.environ.get('RESPONSE_CACHE_ENTRIES', 512))
+RESPONSE_CACHE_BYTES = int(os.environ.get('RESPONSE_CACHE_BYTES', 32 * 1024 * 1024))
+response_cache = ResponseCache(max_entries=RESPONSE_CACHE_ENTRIES, max_bytes=RESPONSE_CACHE_BYTES)
+
+# Monte Carlo loan simulations: requests with at least SIMULATION_POOL_THRESHOLD
+# paths run in a process pool so they do not hold the GIL of request threads
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', min(4, os.cpu_count() or 1)))
+SIMULATION_POOL_THRESHOLD = int(os.environ.get('SIMULATION_POOL_THRESHOLD', 20000))
+MAX_SIMULATION_PATHS = int(os.environ.get('MAX_SIMULATION_PATHS', 200000))
+
+# Tables the monthly totals (and the rollups behind them) are derived from
+REPORT_TABLES = ('expenses', 'assets', 'liabilities')
+
 def init_db():
     """Initialize the database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     # Create users table
@@ -54,21 +119,27 @@ def init_db():
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS assets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            month TEXT NOT NULL,
+            user_id INTEGER,
             name TEXT NOT NULL,
+            category TEXT NOT NULL,
             value REAL NOT NULL,
-            category TEXT NOT NULL
+            month TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
     
+    # Create liabilities table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS liabilities (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            month TEXT NOT NULL,
+            user_id INTEGER,
             name TEXT NOT NULL,
             category TEXT NOT NULL,
             amount REAL NOT NULL,
-            type TEXT NOT NULL
+            month TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
         )
     ''')
     
@@ -328,13 +399,163 @@ def init_db():
         )
     
     conn.commit()
+    
+    # Bring older databases up to the current schema (indexes, new columns)
+    apply_migrations(conn)
     conn.close()
 
+def get_pool():
+    """Get the connection pool for DB_PATH, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close_all()
+            pragmas = get_storage_profile(DB_STORAGE_PROFILE, DB_PRAGMA_OVERRIDES)
+            _pool = ConnectionPool(DB_PATH, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                                   cached_statements=DB_STATEMENT_CACHE, pragmas=pragmas)
+        return _pool
+
+def reset_pool():
+    """Close all pooled connections (e.g. after forking a worker process)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
+
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get database connection
+
+    Inside a request every call returns the same pooled connection, which is
+    handed back to the pool when the request ends. Outside a request the
+    caller gets its own pooled connection and close() returns it.
+    """
+    if has_app_context():
+        if 'db_conn' not in g:
+            g.db_conn = get_pool().acquire(request_scoped=True)
+        return g.db_conn
+    return get_pool().acquire()
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        conn.release()
+
+MUTATING_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# POST routes that only compute or check credentials: they write no
+# versioned table, so the change hooks skip their two counter reads
+COMPUTE_ENDPOINTS = {
+    'login', 'admin_login', 'calculate_loan', 'loan_scenarios', 'quick_loan_closure', 'optimize_debt', 'batch'
+}
+MONTH_PATTERN = re.compile(r'\d{4}-\d{2}')
+
+@app.before_request
+def snapshot_data_versions():
+    """Write counters before a mutating request, so publish_changes can see what it wrote"""
+    if request.method not in MUTATING_METHODS or request.endpoint in COMPUTE_ENDPOINTS:
+        return
+    conn = get_db_connection()
+    g.versions_before = read_data_versions(conn)
+    # A deleted row's month and owner are gone after the delete
+    args = request.view_args or {}
+    if request.method == 'DELETE' and args.get('table') in REPORT_TABLES and 'item_id' in args:
+        row = conn.execute(
+            f"SELECT month, user_id FROM {args['table']} WHERE id = ?", (args['item_id'],)
+        ).fetchone()
+        if row:
+            g.event_month, g.event_owner = row['month'], row['user_id']
+    conn.close()
+
+def change_context(response):
+    """(month, row id) a mutating request touched, from its URL, request and response bodies"""
+    sent = request.get_json(silent=True)
+    sent = sent if isinstance(sent, dict) else {}
+    answer = response.get_json(silent=True) if response.is_json else None
+    answer = answer if isinstance(answer, dict) else {}
+    month = g.get('event_month')
+    for source in (sent, answer):
+        month = month or source.get('month') or str(source.get('date') or '')[:7]
+    row_id = answer.get('id') or next(
+        (value for name, value in (request.view_args or {}).items() if name.endswith('id')), None
+    )
+    return (month if isinstance(month, str) and MONTH_PATTERN.fullmatch(month) else None), row_id
+
+def change_owner(conn, changed, row_id):
+    """user_id of the report row a request wrote, or None when it cannot be told"""
+    if 'event_owner' in g:
+        return g.event_owner
+    tables = [table for table in changed if table in REPORT_TABLES]
+    if row_id is None or len(tables) != 1:
+        return None
+    row = conn.execute(f'SELECT user_id FROM {tables[0]} WHERE id = ?', (row_id,)).fetchone()
+    return row['user_id'] if row else None
+
+@app.after_request
+def publish_changes(response):
+    """Publish a change event for every table a successful mutating request wrote"""
+    before = g.pop('versions_before', None)
+    if before is None or not 200 <= response.status_code < 300:
+        return response
+    conn = get_db_connection()
+    after = read_data_versions(conn)
+    changed = sorted(table for table, version in after.items() if version != before.get(table))
+    if changed:
+        month, row_id = change_context(response)
+        owner = change_owner(conn, changed, row_id)
+        totals = None
+        if month and owner is not None:
+            totals = dict(month_totals(conn, month, user_id=owner))
+            totals['net_worth'] = totals['assets'] - totals['liabilities']
+        get_event_broker().publish_changes([
+            {'table': table, 'version': after[table], 'month': month, 'id': row_id, 'user_id': owner,
+             'totals': totals}
+            for table in changed
+        ])
+    conn.close()
+    return response
+
+def poll_data_versions():
+    """read_data_versions() on a connection of its own, for the event poller thread"""
+    conn = get_db_connection()
+    try:
+        return read_data_versions(conn)
+    finally:
+        conn.close()
+
+def data_versions(tables):
+    """Write counters of `tables`; they change whenever a row is written
+
+    The counters are read once per request and shared by the ETag check
+    and the response cache.
+    """
+    if 'data_versions' not in g:
+        conn = get_db_connection()
+        g.data_versions = read_data_versions(conn)
+        conn.close()
+    return tuple(g.data_versions.get(table, 0) for table in tables)
+
+def cached(*tables):
+    """Cache a GET route's response until one of `tables` is written"""
+    return response_cache.cached(lambda: data_versions(tables))
+
+def etagged(*tables, cache_control='no-cache'):
+    """Strong ETag from the write counters of `tables`; If-None-Match gets a 304
+
+    'no-cache' lets browsers keep the body but revalidate on every use,
+    which costs one tiny query instead of re-running the view.
+    """
+    return conditional_get(lambda: data_versions(tables), cache_control)
+
+def etagged_with_gold_prices(*tables):
+    """etagged() for views that also read the gold price file"""
+    return conditional_get(lambda: data_versions(tables) + (gold_prices_version(),))
+
+def seconds_until_next_month():
+    now = datetime.now()
+    next_month = datetime(now.year + (now.month == 12), now.month % 12 + 1, 1)
+    return max(60, int((next_month - now).total_seconds()))
 
 # Routes
 @app.route('/')
@@ -412,7 +633,104 @@ def login():
     else:
         return jsonify({'error': 'Invalid credentials'}), 401
 
+# Keyset pagination for the list endpoints
+# table -> (sort key column, whether rows are filtered by user_id)
+# assets and liabilities have no date column, so they page on month
+PAGED_TABLES = {
+    'expenses': ('date', True),
+    'income': ('date', False),
+    'assets': ('month', True),
+    'liabilities': ('month', True)
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def wants_paging():
+    """Legacy clients get the full array unless they ask for a page or projection"""
+    return any(k in request.args for k in ('limit', 'cursor', 'from', 'to', 'fields'))
+
+def encode_cursor(key, row_id):
+    raw = json.dumps([key, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key, row_id = json.loads(raw)
+        return str(key), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def paged_list(conn, table, user_id=None):
+    """One page of `table`, newest first, ordered by (sort key, id)
+
+    Query parameters: limit, cursor (from a previous next_cursor), from/to
+    (inclusive bounds on the sort key) and fields (comma separated columns).
+    Each page is a single index range read, so deep pages cost the same as
+    the first one.
+    """
+    key, user_scoped = PAGED_TABLES[table]
+    columns = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+    
+    fields = request.args.get('fields')
+    if fields:
+        selected = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in selected if f not in columns]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    else:
+        selected = columns
+    
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be a number')
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
+    where = []
+    params = []
+    if user_scoped:
+        where.append('user_id = ?')
+        params.append(user_id)
+    if request.args.get('from'):
+        where.append(f'{key} >= ?')
+        params.append(request.args['from'])
+    if request.args.get('to'):
+        where.append(f'{key} <= ?')
+        params.append(request.args['to'])
+    if request.args.get('cursor'):
+        where.append(f'({key}, id) < (?, ?)')
+        params.extend(decode_cursor(request.args['cursor']))
+    
+    select = list(dict.fromkeys(selected + [key, 'id']))
+    sql = f'SELECT {", ".join(select)} FROM {table}'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += f' ORDER BY {key} DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+    
+    rows = conn.execute(sql, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    return {
+        'items': [{f: row[f] for f in selected} for row in rows],
+        'limit': limit,
+        'next_cursor': encode_cursor(rows[-1][key], rows[-1]['id']) if has_more else None
+    }
+
+def paged_response(table, user_id=None):
+    conn = get_db_connection()
+    try:
+        page = paged_list(conn, table, user_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        conn.close()
+    return jsonify(page)
+
 @app.route('/api/expenses', methods=['GET', 'POST'])
+@etagged('expenses')
 def expenses():
     if request.method == 'POST':
         data = request.get_json()
@@ -425,8 +743,10 @@ def expenses():
         
         conn = get_db_connection()
         cursor = conn.execute(
-            'INSERT INTO expenses (user_id, category, description, amount, date, month) VALUES (?, ?, ?, ?, ?, ?)',
-            (1, data['category'], data['description'], data['amount'], data['date'], month)  # Using user_id = 1 for demo
+            'INSERT INTO expenses (user_id, category, description, amount, date, month, content_hash) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (1, data['category'], data['description'], data['amount'], data['date'], month,  # Using user_id = 1 for demo
+             content_hash(1, data['date'], data['amount'], data['description']))
         )
         expense_id = cursor.lastrowid
         
@@ -441,6 +761,9 @@ def expenses():
         return jsonify(dict(expense)), 201
     
     else:  # GET
+        if wants_paging():
+            return paged_response('expenses', user_id=1)
+        
         conn = get_db_connection()
         expenses = conn.execute(
             'SELECT * FROM expenses WHERE user_id = ? ORDER BY date DESC',
@@ -451,6 +774,7 @@ def expenses():
         return jsonify([dict(expense) for expense in expenses])
 
 @app.route('/api/expenses/month/<string:month>')
+@etagged('expenses')
 def expenses_by_month(month):
     conn = get_db_connection()
     expenses = conn.execute(
@@ -462,6 +786,7 @@ def expenses_by_month(month):
     return jsonify([dict(expense) for expense in expenses])
 
 @app.route('/api/expenses/total/<string:month>')
+@etagged('expenses')
 def total_expenses_by_month(month):
     conn = get_db_connection()
     result = conn.execute(
@@ -473,7 +798,21 @@ def total_expenses_by_month(month):
     total = result['total'] if result['total'] else 0
     return jsonify({'total': total})
 
+@app.route('/api/expenses/category/<string:month>')
+@etagged('expenses')
+def expenses_by_category(month):
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT category, expense_total as total FROM monthly_rollups
+        WHERE user_id = ? AND month = ? AND expense_count > 0
+        ORDER BY total DESC
+    ''', (1, month)).fetchall()
+    conn.close()
+    
+    return jsonify([dict(row) for row in rows])
+
 @app.route('/api/assets', methods=['GET', 'POST'])
+@etagged('assets')
 def assets():
     if request.method == 'POST':
         data = request.get_json()
@@ -499,6 +838,9 @@ def assets():
         return jsonify(dict(asset)), 201
     
     else:  # GET
+        if wants_paging():
+            return paged_response('assets', user_id=1)
+        
         conn = get_db_connection()
         assets = conn.execute(
             'SELECT * FROM assets WHERE user_id = ? ORDER BY created_at DESC',
@@ -509,6 +851,7 @@ def assets():
         return jsonify([dict(asset) for asset in assets])
 
 @app.route('/api/liabilities', methods=['GET', 'POST'])
+@etagged('liabilities')
 def liabilities():
     if request.method == 'POST':
         data = request.get_json()
@@ -534,6 +877,9 @@ def liabilities():
         return jsonify(dict(liability)), 201
     
     else:  # GET
+        if wants_paging():
+            return paged_response('liabilities', user_id=1)
+        
         conn = get_db_connection()
         liabilities = conn.execute(
             'SELECT * FROM liabilities WHERE user_id = ? ORDER BY created_at DESC',
@@ -544,22 +890,14 @@ def liabilities():
         return jsonify([dict(liability) for liability in liabilities])
 
 @app.route('/api/networth/<string:month>')
+@etagged('assets', 'liabilities')
 def networth(month):
     conn = get_db_connection()
     
-    # Get total assets
-    assets_result = conn.execute(
-        'SELECT SUM(value) as total FROM assets WHERE user_id = ? AND month = ?',
-        (1, month)
-    ).fetchone()
-    total_assets = assets_result['total'] if assets_result['total'] else 0
-    
-    # Get total liabilities
-    liabilities_result = conn.execute(
-        'SELECT SUM(amount) as total FROM liabilities WHERE user_id = ? AND month = ?',
-        (1, month)
-    ).fetchone()
-    total_liabilities = liabilities_result['total'] if liabilities_result['total'] else 0
+    # Asset and liability totals come from the monthly rollups
+    totals = month_totals(conn, month, user_id=1)
+    total_assets = totals['assets']
+    total_liabilities = totals['liabilities']
     
     conn.close()
     
@@ -574,6 +912,7 @@ def networth(month):
 
 # Admin Routes
 @app.route('/api/admin/users')
+@etagged('users')
 def admin_users():
     conn = get_db_connection()
     users = conn.execute('SELECT * FROM users ORDER BY created_at DESC').fetchall()
@@ -581,30 +920,28 @@ def admin_users():
     return jsonify([dict(user) for user in users])
 
 @app.route('/api/admin/reports')
+@etagged('users', *REPORT_TABLES)
 def admin_reports():
     conn = get_db_connection()
     
     # Get summary statistics
     total_users = conn.execute('SELECT COUNT(*) as count FROM users').fetchone()['count']
-    total_expenses = conn.execute('SELECT COUNT(*) as count FROM expenses').fetchone()['count']
-    total_assets = conn.execute('SELECT COUNT(*) as count FROM assets').fetchone()['count']
-    total_liabilities = conn.execute('SELECT COUNT(*) as count FROM liabilities').fetchone()['count']
+    counts = conn.execute('''
+        SELECT SUM(expense_count) as expenses, SUM(asset_count) as assets, SUM(liability_count) as liabilities
+        FROM monthly_rollups
+    ''').fetchone()
     
     # Get monthly data
     monthly_data = conn.execute('''
         SELECT 
             month,
-            SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) as expenses,
-            SUM(CASE WHEN type = 'asset' THEN amount ELSE 0 END) as assets,
-            SUM(CASE WHEN type = 'liability' THEN amount ELSE 0 END) as liabilities
-        FROM (
-            SELECT month, amount, 'expense' as type FROM expenses
-            UNION ALL
-            SELECT month, value as amount, 'asset' as type FROM assets
-            UNION ALL
-            SELECT month, amount, 'liability' as type FROM liabilities
-        ) 
-        GROUP BY month ORDER BY month DESC
+            SUM(expense_total) as expenses,
+            SUM(asset_total) as assets,
+            SUM(liability_total) as liabilities
+        FROM monthly_rollups
+        GROUP BY month
+        HAVING SUM(expense_count) + SUM(asset_count) + SUM(liability_count) > 0
+        ORDER BY month DESC
     ''').fetchall()
     
     conn.close()
@@ -612,13 +949,28 @@ def admin_reports():
     return jsonify({
         'summary': {
             'total_users': total_users,
-            'total_expenses': total_expenses,
-            'total_assets': total_assets,
-            'total_liabilities': total_liabilities
+            'total_expenses': counts['expenses'] or 0,
+            'total_assets': counts['assets'] or 0,
+            'total_liabilities': counts['liabilities'] or 0
         },
         'monthly_data': [dict(row) for row in monthly_data]
     })
 
+@app.route('/api/admin/rollups/check')
+def admin_check_rollups():
+    conn = get_db_connection()
+    mismatches = check_rollups(conn)
+    conn.close()
+    return jsonify({'consistent': not mismatches, 'mismatches': mismatches})
+
+@app.route('/api/admin/rollups/rebuild', methods=['POST'])
+def admin_rebuild_rollups():
+    conn = get_db_connection()
+    rows = rebuild_rollups(conn)
+    conn.commit()
+    conn.close()
+    return jsonify({'message': 'Rollups rebuilt successfully', 'rows': rows})
+
 @app.route('/api/admin/delete/<string:table>/<int:item_id>', methods=['DELETE'])
 def admin_delete(table, item_id):
     if table not in ['expenses', 'assets', 'liabilities', 'users']:
@@ -637,12 +989,16 @@ def admin_edit_expense(expense_id):
     data = request.get_json()
     
     conn = get_db_connection()
+    owner = conn.execute('SELECT user_id FROM expenses WHERE id = ?', (expense_id,)).fetchone()
     conn.execute('''
         UPDATE expenses 
-        SET category = ?, description = ?, amount = ?, date = ?, month = ?
+        SET category = ?, description = ?, amount = ?, date = ?, month = ?,
+            content_hash = ?
         WHERE id = ?
     ''', (data['category'], data['description'], data['amount'], 
-          data['date'], data['date'][:7], expense_id))
+          data['date'], data['date'][:7],
+          content_hash(owner['user_id'] if owner else 1, data['date'], data['amount'], data['description']),
+          expense_id))
     conn.commit()
     conn.close()
     
@@ -678,6 +1034,41 @@ def admin_edit_liability(liability_id):
     
     return jsonify({'message': 'Liability updated successfully'})
 
+@app.route('/api/admin/db-pool')
+def admin_db_pool():
+    return jsonify(get_pool().stats())
+
+@app.route('/api/admin/cache-stats')
+def admin_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/admin/event-stats')
+def admin_event_stats():
+    return jsonify(get_event_broker().stats())
+
+# A WSGI stream holds a server thread for up to EVENT_STREAM_SECONDS. serve.py
+# turns streams off for its gthread workers, whose few threads a handful of
+# open tabs would exhaust: /api/events then answers 204 and the pages poll.
+# asgi_app.py serves streams on its event loop instead.
+EVENT_STREAMS = os.environ.get('EVENT_STREAMS', '1') != '0'
+
+@app.route('/api/events')
+def event_stream():
+    """Server-sent change events; reconnecting browsers resume from Last-Event-ID"""
+    if not EVENT_STREAMS:
+        # EventSource does not reconnect after a 204
+        return Response(status=204, headers={'Cache-Control': 'no-store'})
+    broker = get_event_broker()
+    subscription = broker.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    if subscription is None:
+        return jsonify({'error': 'Too many event subscribers, retry shortly'}), 503, {'Retry-After': '5'}
+    broker.start_polling(poll_data_versions)
+    response = Response(iter_event_stream(subscription), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs even if the stream is never iterated
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
+
 # Admin Login
 @app.route('/api/admin/login', methods=['POST'])
 def admin_login():
@@ -697,77 +1088,101 @@ def admin_login():
         }), 401
 
 # Loan Calculator and Tips
+def parse_loan_request(data):
+    """Loan terms and optional prepayments/rate changes from a JSON body"""
+    lump_sums = [(item['month'], float(item['amount'])) for item in data.get('lump_sums') or []]
+    rate_changes = [(item['month'], float(item['rate'])) for item in data.get('rate_changes') or []]
+    return {
+        'principal': float(data.get('principal', 0)),
+        'annual_rate': float(data.get('rate', 0)),
+        'months': int(data.get('months', 0)),
+        'extra_monthly': float(data.get('extra_monthly', 0) or 0),
+        'lump_sums': lump_sums,
+        'rate_changes': rate_changes,
+        'adjust': data.get('adjust', 'tenure')
+    }
+
 @app.route('/api/loan/calculate', methods=['POST'])
 def calculate_loan():
-    data = request.get_json()
+    data = request.get_json() or {}
     
-    principal = float(data.get('principal', 0))
-    rate = float(data.get('rate', 0)) / 100 / 12  # Monthly rate
-    months = int(data.get('months', 0))
+    try:
+        terms = parse_loan_request(data)
+        # The contracted loan, then the same loan with the requested prepayments and rate changes
+        baseline = amortize(terms['principal'], terms['annual_rate'], terms['months'])
+        plan = amortize(**terms)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid loan details: {e}'}), 400
     
-    if rate == 0:
-        monthly_payment = principal / months
-        total_payment = principal
-        total_interest = 0
-    else:
-        monthly_payment = principal * (rate * (1 + rate)**months) / ((1 + rate)**months - 1)
-        total_payment = monthly_payment * months
-        total_interest = total_payment - principal
+    result = plan.to_dict(include_rows=data.get('include_schedule', True) is not False)
+    if terms['extra_monthly'] or terms['lump_sums'] or terms['rate_changes']:
+        result['baseline'] = baseline.to_dict(include_rows=False)
+        result.update(savings(baseline, plan))
     
     # Calculate closure tips
-    tips = generate_loan_tips(principal, monthly_payment, total_interest, months)
-    
-    return jsonify({
-        'monthly_payment': round(monthly_payment, 2),
-        'total_payment': round(total_payment, 2),
-        'total_interest': round(total_interest, 2),
-        'tips': tips
-    })
+    result['tips'] = generate_loan_tips(baseline, terms['annual_rate'], terms['months'])
+    return jsonify(result)
 
-def generate_loan_tips(principal, monthly_payment, total_interest, months):
+def generate_loan_tips(baseline, annual_rate, months):
+    """Closure tips, each priced by simulating the strategy against the baseline"""
     tips = []
+    principal = baseline.principal
+    monthly_payment = baseline.emi
+    total_interest = baseline.total_interest
     
     # Tip 1: Extra payment impact
     extra_payment = monthly_payment * 0.1  # 10% extra
-    if extra_payment > 0:
+    if extra_payment > 0 and total_interest > 0:
+        saved = savings(baseline, amortize(principal, annual_rate, months, extra_monthly=extra_payment))
         tips.append({
             'type': 'extra_payment',
             'title': '💡 Pay 10% Extra Monthly',
-            'description': f'Adding ${extra_payment:.2f} extra per month could save you thousands in interest',
-            'savings': round(total_interest * 0.15, 2)
+            'description': f'Adding ${extra_payment:.2f} extra per month closes the loan {saved["months_saved"]} months early',
+            'savings': saved['interest_saved'],
+            'months_saved': saved['months_saved']
         })
     
     # Tip 2: Bi-weekly payments
+    # 26 half payments a year add up to one extra EMI a year, spread over the months
     biweekly_payment = monthly_payment / 2
+    saved = savings(baseline, amortize(principal, annual_rate, months, extra_monthly=monthly_payment / 12))
     tips.append({
         'type': 'biweekly',
         'title': '📅 Switch to Bi-Weekly Payments',
         'description': f'Pay ${biweekly_payment:.2f} every 2 weeks instead of monthly',
-        'savings': round(total_interest * 0.25, 2)
+        'savings': saved['interest_saved'],
+        'months_saved': saved['months_saved']
     })
     
     # Tip 3: Refinancing suggestion
-    if total_interest > principal * 0.2:
+    if total_interest > principal * 0.2 and annual_rate > 1:
+        refinanced = amortize(principal, annual_rate - 1, months)
         tips.append({
             'type': 'refinance',
             'title': '🏦 Consider Refinancing',
-            'description': 'Your interest is high. Shop for better rates to reduce total cost',
-            'potential_savings': round(total_interest * 0.3, 2)
+            'description': f'Your interest is high. A rate 1% lower ({annual_rate - 1:.2f}%) cuts your EMI to ${refinanced.emi:.2f}',
+            'potential_savings': savings(baseline, refinanced)['interest_saved']
         })
     
     # Tip 4: Lump sum payment
     lump_sum = monthly_payment * 3
+    yearly = [(month, lump_sum) for month in range(12, months + 1, 12)]
+    saved = savings(baseline, amortize(principal, annual_rate, months, lump_sums=yearly))
     tips.append({
         'type': 'lump_sum',
         'title': '💰 Annual Lump Sum Payment',
         'description': f'Make a ${lump_sum:.2f} payment once a year to reduce principal faster',
-        'impact': 'Could reduce loan term by 2-3 years'
+        'savings': saved['interest_saved'],
+        'months_saved': saved['months_saved'],
+        'impact': f'Reduces loan term by {saved["months_saved"] // 12} years {saved["months_saved"] % 12} months'
     })
     
     return tips
 
 # AI Investment Suggestions
 @app.route('/api/ai/investment-suggestions', methods=['GET'])
+@etagged(*REPORT_TABLES)
+@cached(*REPORT_TABLES)
 def ai_investment_suggestions():
     conn = get_db_connection()
     
@@ -775,13 +1190,10 @@ def ai_investment_suggestions():
     current_month = datetime.now().strftime('%Y-%m')
     
     # Calculate financial metrics
-    assets = conn.execute('SELECT SUM(value) as total FROM assets WHERE month = ?', (current_month,)).fetchone()
-    liabilities = conn.execute('SELECT SUM(amount) as total FROM liabilities WHERE month = ?', (current_month,)).fetchone()
-    expenses = conn.execute('SELECT SUM(amount) as total FROM expenses WHERE month = ?', (current_month,)).fetchone()
-    
-    total_assets = assets['total'] if assets['total'] else 0
-    total_liabilities = liabilities['total'] if liabilities['total'] else 0
-    total_expenses = expenses['total'] if expenses['total'] else 0
+    totals = month_totals(conn, current_month)
+    total_assets = totals['assets']
+    total_liabilities = totals['liabilities']
+    total_expenses = totals['expenses']
     
     net_worth = total_assets - total_liabilities
     monthly_income = total_assets * 0.05  # Estimate 5% monthly income
@@ -887,6 +1299,8 @@ def ai_investment_suggestions():
 
 # Monthly Report with Predictions
 @app.route('/api/ai/monthly-report', methods=['GET'])
+@etagged(*REPORT_TABLES)
+@cached(*REPORT_TABLES)
 def ai_monthly_report():
     conn = get_db_connection()
     
@@ -894,17 +1308,14 @@ def ai_monthly_report():
     reports = []
     predictions = []
     
-    for i in range(6, -1, -1):
-        date = datetime.now() - timedelta(days=30*i)
-        month = date.strftime('%Y-%m')
-        
-        expenses = conn.execute('SELECT SUM(amount) as total FROM expenses WHERE month = ?', (month,)).fetchone()
-        assets = conn.execute('SELECT SUM(value) as total FROM assets WHERE month = ?', (month,)).fetchone()
-        liabilities = conn.execute('SELECT SUM(amount) as total FROM liabilities WHERE month = ?', (month,)).fetchone()
-        
-        total_expenses = expenses['total'] if expenses['total'] else 0
-        total_assets = assets['total'] if assets['total'] else 0
-        total_liabilities = liabilities['total'] if liabilities['total'] else 0
+    months = [(datetime.now() - timedelta(days=30*i)).strftime('%Y-%m') for i in range(6, -1, -1)]
+    totals = totals_by_month(conn, months[0], months[-1])
+    
+    for month in months:
+        month_data = totals.get(month, {})
+        total_expenses = month_data.get('expenses', 0)
+        total_assets = month_data.get('assets', 0)
+        total_liabilities = month_data.get('liabilities', 0)
         
         reports.append({
             'month': month,
@@ -978,6 +1389,7 @@ def ai_monthly_report():
 
 # Seasonal Stock Suggestions
 @app.route('/api/ai/seasonal-stocks', methods=['GET'])
+@conditional_get(cache_control=lambda: f'public, max-age={seconds_until_next_month()}')
 def seasonal_stocks():
     current_month = datetime.now().month
     
@@ -1109,6 +1521,92 @@ def seasonal_stocks():
         ]
     })
 
+# Loan scenario grid: every combination of the requested values in one pass
+MAX_LOAN_SCENARIOS = 50000
+MAX_SCENARIO_RESULTS = 1000
+SCENARIO_SORT_KEYS = ('interest_saved', 'months_saved', 'total_interest', 'monthly_outlay')
+
+def grid_values(spec, name, default, whole=False):
+    """A list of values, a single value or {"start", "stop", "step"} (stop inclusive)
+
+    whole: the values count months, so fractions are refused rather than truncated
+    """
+    if spec is None:
+        return [default]
+    if isinstance(spec, dict):
+        start, stop, step = float(spec['start']), float(spec['stop']), float(spec.get('step', 1))
+        if step <= 0 or stop < start:
+            raise ValueError(f'{name}: need start <= stop and a positive step')
+        if (stop - start) / step >= MAX_LOAN_SCENARIOS:
+            raise ValueError(f'{name}: too many values in range')
+        values = list(np.arange(start, stop + step / 2, step))
+    elif isinstance(spec, list):
+        values = [float(value) for value in spec]
+    else:
+        values = [float(spec)]
+    if not values:
+        raise ValueError(f'{name} must not be empty')
+    if whole and any(value != int(value) for value in values):
+        raise ValueError(f'{name} must be whole numbers of months')
+    return values
+
+@app.route('/api/loan/scenarios', methods=['POST'])
+def loan_scenarios():
+    """Rank every combination of rate, tenure, extra EMI %, lump sum and lump sum month"""
+    data = request.get_json() or {}
+    
+    try:
+        principal = float(data.get('principal', 0))
+        axes = {
+            'rates': grid_values(data.get('rates'), 'rates', 0),
+            'tenures': grid_values(data.get('tenures'), 'tenures', 0, whole=True),
+            'extra_pcts': grid_values(data.get('extra_pcts'), 'extra_pcts', 0),
+            'lump_sums': grid_values(data.get('lump_sums'), 'lump_sums', 0),
+            'lump_months': grid_values(data.get('lump_months'), 'lump_months', 12, whole=True)
+        }
+        limit = min(int(data.get('limit', 100)), MAX_SCENARIO_RESULTS)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid scenario ranges: {e}'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    
+    combinations = int(np.prod([len(values) for values in axes.values()]))
+    if combinations > MAX_LOAN_SCENARIOS:
+        return jsonify({'error': f'{combinations} combinations requested; at most {MAX_LOAN_SCENARIOS} allowed'}), 400
+    sort_by = data.get('sort_by', 'interest_saved')
+    if sort_by not in SCENARIO_SORT_KEYS:
+        return jsonify({'error': f"sort_by must be one of {', '.join(SCENARIO_SORT_KEYS)}"}), 400
+    
+    try:
+        grid = scenario_grid(principal, **axes)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Savings rank highest first, costs lowest first; ties go to the cheaper monthly outlay
+    descending = sort_by in ('interest_saved', 'months_saved')
+    primary = -grid[sort_by] if descending else grid[sort_by]
+    order = np.lexsort((grid['monthly_outlay'], primary))[:limit]
+    
+    columns = {
+        'rate': 2, 'tenure': None, 'extra_pct': 2, 'lump_sum': 2, 'lump_month': None, 'emi': 2,
+        'monthly_outlay': 2, 'months': None, 'total_interest': 2, 'interest_saved': 2, 'months_saved': None
+    }
+    ranked = [
+        {
+            name: (round(float(grid[name][i]), digits) if digits is not None else int(grid[name][i]))
+            for name, digits in columns.items()
+        }
+        for i in order
+    ]
+    
+    return jsonify({
+        'principal': principal,
+        'evaluated': len(grid['rate']),
+        'sort_by': sort_by,
+        'scenarios': ranked,
+        'best': ranked[0] if ranked else None
+    })
+
 # Quick Loan Closure Strategies
 @app.route('/api/ai/quick-loan-closure', methods=['POST'])
 def quick_loan_closure():
@@ -1212,7 +1710,7 @@ def quick_loan_closure():
     # Best strategy recommendation
     best_strategy = min(strategies[:3], key=lambda x: x.get('new_tenure', remaining_months) if 'new_tenure' in x else remaining_months)
     
-    return jsonify({
+    result = {
         'current_situation': {
             'loan_amount': loan_amount,
             'current_emi': round(current_emi, 2),
@@ -1228,51 +1726,189 @@ def quick_loan_closure():
             'Set up auto-debit to avoid late fees',
             'Review loan annually for better rates'
         ]
-    })
+    }
+    
+    # Simulation mode: the same strategies under thousands of floating-rate paths
+    # e.g. "simulate": {"paths": 5000, "drift": 0.25, "volatility": 1.0, "seed": 42}
+    simulate = data.get('simulate')
+    if simulate:
+        options = simulate if isinstance(simulate, dict) else {}
+        try:
+            paths = int(options.get('paths', 2000))
+            if paths > MAX_SIMULATION_PATHS:
+                raise ValueError(f'at most {MAX_SIMULATION_PATHS} paths')
+            result['simulation'] = simulate_strategies(
+                loan_amount, interest_rate, remaining_months, monthly_income,
+                paths=paths,
+                drift=float(options.get('drift', 0)),
+                volatility=float(options.get('volatility', 1.0)),
+                mean_reversion=float(options.get('mean_reversion', 0.5)),
+                reset_months=int(options.get('reset_months', 3)),
+                floor=float(options.get('floor', 0)),
+                seed=int(options['seed']) if options.get('seed') is not None else None,
+                workers=SIMULATION_WORKERS,
+                pool_threshold=SIMULATION_POOL_THRESHOLD
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid simulation settings: {e}'}), 400
+    
+    return jsonify(result)
 
-# Financial Reports API
-@app.route('/api/reports/yearly', methods=['GET'])
-def yearly_report():
+# Debt Payoff Optimizer
+# user_id -> (plan inputs, plan). Identical inputs reuse the plan; when a
+# liability changes the search restarts from the previous best order.
+debt_plans = {}
+debt_plans_lock = threading.Lock()
+
+def current_liabilities(conn, user_id):
+    """Liabilities in the user's latest month (each month is a full snapshot)"""
+    return conn.execute('''
+        SELECT * FROM liabilities
+        WHERE user_id = ? AND month = (SELECT MAX(month) FROM liabilities WHERE user_id = ?)
+        ORDER BY id
+    ''', (user_id, user_id)).fetchall()
+
+def plan_loans(rows, overrides):
+    """Liability rows -> optimizer loans, with category default rates and minimums"""
+    loans = []
+    for row in rows:
+        terms = overrides.get(str(row['id']), {})
+        default_rate, default_tenure = loan_terms(row['category'])
+        rate = float(terms.get('rate', default_rate))
+        tenure = int(terms.get('tenure', default_tenure))
+        if tenure <= 0:
+            raise ValueError('tenure must be positive')
+        min_payment = terms.get('min_payment')
+        loans.append({
+            'id': row['id'],
+            'name': row['name'],
+            'balance': row['amount'],
+            'rate': rate,
+            'min_payment': float(min_payment) if min_payment is not None
+                           else default_min_payment(row['amount'], rate, tenure)
+        })
+    return loans
+
+@app.route('/api/debt/optimize', methods=['POST'])
+def optimize_debt():
+    """Payoff order and schedule across all current liabilities for a monthly budget
+
+    Body: {"budget": 60000, "loans": {"<liability id>": {"rate": 11.5, "min_payment": 9000}}}
+    Rates and minimums default from the liability category.
+    """
+    data = request.get_json() or {}
+    user_id = 1  # Using user_id = 1 for demo
+    
     conn = get_db_connection()
-    year = request.args.get('year', datetime.now().year)
+    rows = current_liabilities(conn, user_id)
+    conn.close()
     
-    # Get all months in the year
+    try:
+        budget = float(data.get('budget', 0))
+        loans = plan_loans(rows, data.get('loans') or {})
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid loan terms: {e}'}), 400
+    if not loans:
+        return jsonify({'error': 'No liabilities to plan'}), 404
+    
+    include_schedule = data.get('include_schedule', True) is not False
+    inputs = (budget, include_schedule, tuple(tuple(sorted(loan.items())) for loan in loans))
+    with debt_plans_lock:
+        previous = debt_plans.get(user_id)
+    if previous and previous[0] == inputs:
+        return jsonify(dict(previous[1], replanned=False))
+    
+    warm_start = previous[1]['strategies']['optimal']['order'] if previous else None
+    try:
+        plan = optimize(loans, budget, warm_start=warm_start, include_schedule=include_schedule)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    plan['month'] = rows[0]['month']
+    with debt_plans_lock:
+        debt_plans[user_id] = (inputs, plan)
+    return jsonify(dict(plan, replanned=True))
+
+# Financial Reports API
+MAX_REPORT_YEARS = 50
+
+def build_monthly_data(totals, first_year, last_year):
+    """Twelve entries per year, filling months without data with zeros"""
     monthly_data = []
-    for month in range(1, 13):
-        month_str = f"{year}-{str(month).zfill(2)}"
-        
-        expenses = conn.execute('SELECT SUM(amount) as total FROM expenses WHERE month = ?', (month_str,)).fetchone()
-        assets = conn.execute('SELECT SUM(value) as total FROM assets WHERE month = ?', (month_str,)).fetchone()
-        liabilities = conn.execute('SELECT SUM(amount) as total FROM liabilities WHERE month = ?', (month_str,)).fetchone()
-        
-        monthly_data.append({
-            'month': month_str,
-            'month_name': datetime(int(year), month, 1).strftime('%B'),
-            'expenses': expenses['total'] if expenses['total'] else 0,
-            'assets': assets['total'] if assets['total'] else 0,
-            'liabilities': liabilities['total'] if liabilities['total'] else 0,
-            'net_worth': (assets['total'] if assets['total'] else 0) - (liabilities['total'] if liabilities['total'] else 0)
-        })
-    
+    for year in range(first_year, last_year + 1):
+        for month in range(1, 13):
+            month_str = f"{year}-{str(month).zfill(2)}"
+            month_totals = totals.get(month_str, {'expenses': 0, 'assets': 0, 'liabilities': 0})
+            monthly_data.append({
+                'month': month_str,
+                'month_name': datetime(year, month, 1).strftime('%B'),
+                'expenses': month_totals['expenses'],
+                'assets': month_totals['assets'],
+                'liabilities': month_totals['liabilities'],
+                'net_worth': month_totals['assets'] - month_totals['liabilities']
+            })
+    return monthly_data
+
+def summarize_months(monthly_data):
     total_expenses = sum([m['expenses'] for m in monthly_data])
     total_assets = monthly_data[-1]['assets'] if monthly_data else 0
     total_liabilities = monthly_data[-1]['liabilities'] if monthly_data else 0
+    return {
+        'total_expenses': total_expenses,
+        'final_assets': total_assets,
+        'final_liabilities': total_liabilities,
+        'final_net_worth': total_assets - total_liabilities,
+        'avg_monthly_expenses': total_expenses / len(monthly_data) if monthly_data else 0
+    }
+
+@app.route('/api/reports/yearly', methods=['GET'])
+@etagged(*REPORT_TABLES)
+@cached(*REPORT_TABLES)
+def yearly_report():
+    year = request.args.get('year', datetime.now().year)
+    year_from = request.args.get('from')
+    year_to = request.args.get('to')
     
+    try:
+        if year_from or year_to:
+            first_year = int(year_from or year_to)
+            last_year = int(year_to or year_from)
+        else:
+            first_year = last_year = int(year)
+    except ValueError:
+        return jsonify({'error': 'Years must be numbers'}), 400
+    
+    if first_year > last_year:
+        return jsonify({'error': "'from' must not be after 'to'"}), 400
+    if last_year - first_year + 1 > MAX_REPORT_YEARS:
+        return jsonify({'error': f'At most {MAX_REPORT_YEARS} years per report'}), 400
+    
+    conn = get_db_connection()
+    totals = totals_by_month(conn, f'{first_year}-01', f'{last_year}-12')
     conn.close()
     
+    monthly_data = build_monthly_data(totals, first_year, last_year)
+    
+    if not (year_from or year_to):
+        return jsonify({
+            'year': year,
+            'monthly_data': monthly_data,
+            'summary': summarize_months(monthly_data)
+        })
+    
     return jsonify({
-        'year': year,
+        'from': first_year,
+        'to': last_year,
         'monthly_data': monthly_data,
-        'summary': {
-            'total_expenses': total_expenses,
-            'final_assets': total_assets,
-            'final_liabilities': total_liabilities,
-            'final_net_worth': total_assets - total_liabilities,
-            'avg_monthly_expenses': total_expenses / 12
-        }
+        'yearly': [
+            dict(year=first_year + i, **summarize_months(monthly_data[i * 12:(i + 1) * 12]))
+            for i in range(last_year - first_year + 1)
+        ],
+        'summary': summarize_months(monthly_data)
     })
 
 @app.route('/api/reports/monthly', methods=['GET'])
+@etagged(*REPORT_TABLES)
+@cached(*REPORT_TABLES)
 def monthly_report():
     conn = get_db_connection()
     month = request.args.get('month', datetime.now().strftime('%Y-%m'))
@@ -1319,6 +1955,8 @@ def monthly_report():
     })
 
 @app.route('/api/reports/weekly', methods=['GET'])
+@etagged('expenses')
+@cached('expenses')
 def weekly_report():
     conn = get_db_connection()
     
@@ -1373,414 +2011,168 @@ def weekly_report():
 
 # AI Stock Analysis with P/E Ratio
 @app.route('/api/ai/stock-analysis', methods=['GET'])
+@conditional_get(lambda: (stock_universe_version(),), cache_control='public, max-age=3600')
 def stock_analysis():
-    # Top 20 Indian stocks under ₹1000 with comprehensive analysis (Updated prices as of Oct 2025)
-    stocks = [
-        {
-            'name': 'Tata Motors',
-            'symbol': 'TATAMOTORS',
-            'current_price': 920,
-            'pe_ratio': 10.2,
-            'market_cap': 338000,
-            'sector': 'Automobile',
-            'dividend_yield': 0.5,
-            'debt_to_equity': 0.38,
-            'roe': 22.5,
-            'revenue_growth': 18.2,
-            'profit_margin': 7.8,
-            'recommendation': 'Buy',
-            'target_price': 1100,
-            'risk': 'Medium',
-            'reasons': ['Strong EV portfolio', 'JLR profitability improved', 'Growing domestic demand', 'Debt reduction'],
-            'concerns': ['Commodity price volatility', 'Global slowdown risk', 'Competition in EV space']
-        },
-        {
-            'name': 'State Bank of India',
-            'symbol': 'SBIN',
-            'current_price': 785,
-            'pe_ratio': 9.5,
-            'market_cap': 700000,
-            'sector': 'Banking',
-            'dividend_yield': 1.8,
-            'debt_to_equity': 0.0,
-            'roe': 18.5,
-            'revenue_growth': 15.5,
-            'profit_margin': 24.3,
-            'recommendation': 'Strong Buy',
-            'target_price': 950,
-            'risk': 'Low',
-            'reasons': ['Largest PSU bank', 'Improving asset quality', 'Strong deposit growth', 'Digital transformation'],
-            'concerns': ['Government ownership', 'NPA concerns']
-        },
-        {
-            'name': 'Tata Steel',
-            'symbol': 'TATASTEEL',
-            'current_price': 148,
-            'pe_ratio': 38.5,
-            'market_cap': 185000,
-            'sector': 'Steel',
-            'dividend_yield': 2.8,
-            'debt_to_equity': 0.48,
-            'roe': 9.5,
-            'revenue_growth': 6.5,
-            'profit_margin': 5.2,
-            'recommendation': 'Hold',
-            'target_price': 165,
-            'risk': 'High',
-            'reasons': ['Integrated steel player', 'Global presence', 'Infrastructure demand', 'Debt reduction progress'],
-            'concerns': ['High P/E ratio', 'Commodity cycle risk', 'China slowdown', 'Steel price volatility']
-        },
-        {
-            'name': 'Power Grid Corporation',
-            'symbol': 'POWERGRID',
-            'current_price': 315,
-            'pe_ratio': 13.8,
-            'market_cap': 295000,
-            'sector': 'Power',
-            'dividend_yield': 3.2,
-            'debt_to_equity': 1.75,
-            'roe': 15.5,
-            'revenue_growth': 11.2,
-            'profit_margin': 19.5,
-            'recommendation': 'Buy',
-            'target_price': 370,
-            'risk': 'Low',
-            'reasons': ['Monopoly in transmission', 'Stable cash flows', 'Good dividend yield', 'Capex opportunities'],
-            'concerns': ['Regulatory risks', 'High debt levels']
-        },
-        {
-            'name': 'NTPC',
-            'symbol': 'NTPC',
-            'current_price': 365,
-            'pe_ratio': 10.8,
-            'market_cap': 355000,
-            'sector': 'Power',
-            'dividend_yield': 3.5,
-            'debt_to_equity': 1.15,
-            'roe': 14.8,
-            'revenue_growth': 10.5,
-            'profit_margin': 16.2,
-            'recommendation': 'Buy',
-            'target_price': 430,
-            'risk': 'Low',
-            'reasons': ['Largest power generator', 'Green energy push', 'Consistent dividends', 'Strong fundamentals'],
-            'concerns': ['Coal dependency', 'Regulatory changes']
-        },
-        {
-            'name': 'Tata Power',
-            'symbol': 'TATAPOWER',
-            'current_price': 425,
-            'pe_ratio': 20.5,
-            'market_cap': 136000,
-            'sector': 'Power',
-            'dividend_yield': 1.0,
-            'debt_to_equity': 1.35,
-            'roe': 13.5,
-            'revenue_growth': 20.5,
-            'profit_margin': 9.5,
-            'recommendation': 'Buy',
-            'target_price': 510,
-            'risk': 'Medium',
-            'reasons': ['Renewable energy focus', 'EV charging network', 'Diversified portfolio', 'Growth momentum'],
-            'concerns': ['High debt', 'Execution risk', 'Valuation premium']
-        },
-        {
-            'name': 'Vedanta',
-            'symbol': 'VEDL',
-            'current_price': 465,
-            'pe_ratio': 7.8,
-            'market_cap': 173000,
-            'sector': 'Mining',
-            'dividend_yield': 4.2,
-            'debt_to_equity': 0.32,
-            'roe': 24.5,
-            'revenue_growth': 14.8,
-            'profit_margin': 19.5,
-            'recommendation': 'Strong Buy',
-            'target_price': 575,
-            'risk': 'Medium',
-            'reasons': ['Low P/E ratio', 'High dividend yield', 'Commodity supercycle', 'Debt reduction'],
-            'concerns': ['Commodity price volatility', 'Environmental concerns', 'Regulatory issues']
-        },
-        {
-            'name': 'Coal India',
-            'symbol': 'COALINDIA',
-            'current_price': 485,
-            'pe_ratio': 6.8,
-            'market_cap': 299000,
-            'sector': 'Mining',
-            'dividend_yield': 4.8,
-            'debt_to_equity': 0.03,
-            'roe': 38.5,
-            'revenue_growth': 9.5,
-            'profit_margin': 29.5,
-            'recommendation': 'Buy',
-            'target_price': 570,
-            'risk': 'Low',
-            'reasons': ['Monopoly in coal', 'Very high ROE', 'Excellent dividend yield', 'Zero debt'],
-            'concerns': ['ESG concerns', 'Renewable energy shift', 'Government control']
-        },
-        {
-            'name': 'Indian Oil Corporation',
-            'symbol': 'IOC',
-            'current_price': 165,
-            'pe_ratio': 9.8,
-            'market_cap': 233000,
-            'sector': 'Oil & Gas',
-            'dividend_yield': 4.5,
-            'debt_to_equity': 1.08,
-            'roe': 13.5,
-            'revenue_growth': 16.5,
-            'profit_margin': 4.2,
-            'recommendation': 'Buy',
-            'target_price': 195,
-            'risk': 'Medium',
-            'reasons': ['Largest refiner', 'Strong retail network', 'Good dividend', 'Refining margins improving'],
-            'concerns': ['Crude price volatility', 'Subsidy burden', 'Competition']
-        },
-        {
-            'name': 'ONGC',
-            'symbol': 'ONGC',
-            'current_price': 285,
-            'pe_ratio': 6.2,
-            'market_cap': 359000,
-            'sector': 'Oil & Gas',
-            'dividend_yield': 6.2,
-            'debt_to_equity': 0.22,
-            'roe': 19.5,
-            'revenue_growth': 24.5,
-            'profit_margin': 27.8,
-            'recommendation': 'Strong Buy',
-            'target_price': 360,
-            'risk': 'Low',
-            'reasons': ['Very low P/E', 'Highest dividend yield', 'Strong cash flows', 'Exploration success'],
-            'concerns': ['Government control', 'Crude price dependency', 'Dividend payout policy']
-        },
-        {
-            'name': 'Bharat Electronics',
-            'symbol': 'BEL',
-            'current_price': 295,
-            'pe_ratio': 26.5,
-            'market_cap': 216000,
-            'sector': 'Defense',
-            'dividend_yield': 2.0,
-            'debt_to_equity': 0.0,
-            'roe': 24.5,
-            'revenue_growth': 20.5,
-            'profit_margin': 23.5,
-            'recommendation': 'Buy',
-            'target_price': 360,
-            'risk': 'Medium',
-            'reasons': ['Defense modernization', 'Export potential', 'Zero debt', 'Strong order book'],
-            'concerns': ['High P/E', 'Government dependent', 'Execution delays']
-        },
-        {
-            'name': 'Ashok Leyland',
-            'symbol': 'ASHOKLEY',
-            'current_price': 215,
-            'pe_ratio': 16.5,
-            'market_cap': 63000,
-            'sector': 'Automobile',
-            'dividend_yield': 1.0,
-            'debt_to_equity': 0.12,
-            'roe': 17.5,
-            'revenue_growth': 24.5,
-            'profit_margin': 7.5,
-            'recommendation': 'Buy',
-            'target_price': 270,
-            'risk': 'Medium',
-            'reasons': ['CV cycle upturn', 'Defense orders', 'EV foray', 'Market share gains'],
-            'concerns': ['Competition', 'Economic slowdown', 'Margin pressure']
-        },
-        {
-            'name': 'Jindal Steel & Power',
-            'symbol': 'JINDALSTEL',
-            'current_price': 925,
-            'pe_ratio': 14.2,
-            'market_cap': 93000,
-            'sector': 'Steel',
-            'dividend_yield': 1.6,
-            'debt_to_equity': 0.38,
-            'roe': 19.5,
-            'revenue_growth': 13.5,
-            'profit_margin': 16.5,
-            'recommendation': 'Buy',
-            'target_price': 1100,
-            'risk': 'Medium',
-            'reasons': ['Integrated operations', 'Capacity expansion', 'Debt reduction', 'Strong fundamentals'],
-            'concerns': ['Commodity cycle', 'Competition', 'Valuation near ₹1000']
-        },
-        {
-            'name': 'Adani Power',
-            'symbol': 'ADANIPOWER',
-            'current_price': 575,
-            'pe_ratio': 11.5,
-            'market_cap': 224000,
-            'sector': 'Power',
-            'dividend_yield': 0.4,
-            'debt_to_equity': 2.65,
-            'roe': 24.5,
-            'revenue_growth': 30.5,
-            'profit_margin': 19.5,
-            'recommendation': 'Hold',
-            'target_price': 640,
-            'risk': 'High',
-            'reasons': ['Capacity addition', 'Power demand growth', 'Improved operations', 'Strong cash flows'],
-            'concerns': ['Very high debt', 'Regulatory risks', 'Group concerns', 'Governance issues']
-        },
-        {
-            'name': 'Suzlon Energy',
-            'symbol': 'SUZLON',
-            'current_price': 68,
-            'pe_ratio': 72.5,
-            'market_cap': 92000,
-            'sector': 'Renewable Energy',
-            'dividend_yield': 0.0,
-            'debt_to_equity': 0.75,
-            'roe': 9.5,
-            'revenue_growth': 48.5,
-            'profit_margin': 3.5,
-            'recommendation': 'Speculative Buy',
-            'target_price': 85,
-            'risk': 'Very High',
-            'reasons': ['Wind energy boom', 'Order book growth', 'Turnaround story', 'Debt reduction'],
-            'concerns': ['Very high P/E', 'Execution risk', 'Past track record', 'Profitability concerns']
-        },
-        {
-            'name': 'Vodafone Idea',
-            'symbol': 'IDEA',
-            'current_price': 14,
-            'pe_ratio': -1,
-            'market_cap': 99000,
-            'sector': 'Telecom',
-            'dividend_yield': 0.0,
-            'debt_to_equity': 14.5,
-            'roe': -42.5,
-            'revenue_growth': -6.5,
-            'profit_margin': -23.5,
-            'recommendation': 'Avoid',
-            'target_price': 12,
-            'risk': 'Very High',
-            'reasons': ['Turnaround potential', 'Government support', 'Tariff hikes possible'],
-            'concerns': ['Massive debt', 'Negative earnings', 'Subscriber loss', 'Dilution risk', 'Survival concerns']
-        },
-        {
-            'name': 'Bank of Baroda',
-            'symbol': 'BANKBARODA',
-            'current_price': 245,
-            'pe_ratio': 6.2,
-            'market_cap': 127000,
-            'sector': 'Banking',
-            'dividend_yield': 2.3,
-            'debt_to_equity': 0.0,
-            'roe': 16.5,
-            'revenue_growth': 15.5,
-            'profit_margin': 29.5,
-            'recommendation': 'Strong Buy',
-            'target_price': 315,
-            'risk': 'Low',
-            'reasons': ['Very low P/E', 'Asset quality improvement', 'Strong capital position', 'Digital push'],
-            'concerns': ['PSU bank challenges', 'NPA risks', 'Government control']
-        },
-        {
-            'name': 'Punjab National Bank',
-            'symbol': 'PNB',
-            'current_price': 108,
-            'pe_ratio': 7.8,
-            'market_cap': 121000,
-            'sector': 'Banking',
-            'dividend_yield': 1.7,
-            'debt_to_equity': 0.0,
-            'roe': 13.5,
-            'revenue_growth': 12.5,
-            'profit_margin': 23.5,
-            'recommendation': 'Buy',
-            'target_price': 140,
-            'risk': 'Medium',
-            'reasons': ['Low P/E', 'Turnaround story', 'Branch network', 'Improving asset quality'],
-            'concerns': ['Past NPA issues', 'Governance concerns', 'Competition']
-        },
-        {
-            'name': 'Canara Bank',
-            'symbol': 'CANBK',
-            'current_price': 105,
-            'pe_ratio': 5.8,
-            'market_cap': 94000,
-            'sector': 'Banking',
-            'dividend_yield': 2.8,
-            'debt_to_equity': 0.0,
-            'roe': 14.5,
-            'revenue_growth': 13.5,
-            'profit_margin': 26.5,
-            'recommendation': 'Strong Buy',
-            'target_price': 135,
-            'risk': 'Low',
-            'reasons': ['Lowest P/E in sector', 'High dividend yield', 'Strong fundamentals', 'Asset quality improving'],
-            'concerns': ['PSU bank risks', 'Government ownership', 'Slower growth']
-        },
-        {
-            'name': 'Union Bank of India',
-            'symbol': 'UNIONBANK',
-            'current_price': 125,
-            'pe_ratio': 7.2,
-            'market_cap': 94000,
-            'sector': 'Banking',
-            'dividend_yield': 2.0,
-            'debt_to_equity': 0.0,
-            'roe': 12.8,
-            'revenue_growth': 11.8,
-            'profit_margin': 24.8,
-            'recommendation': 'Buy',
-            'target_price': 160,
-            'risk': 'Medium',
-            'reasons': ['Low P/E', 'Merger synergies', 'Branch network', 'Capital adequacy'],
-            'concerns': ['Integration challenges', 'NPA legacy', 'Competition']
-        }
-    ]
-    
-    # Analyze and categorize
-    strong_buy = [s for s in stocks if s['recommendation'] == 'Strong Buy']
-    buy = [s for s in stocks if s['recommendation'] == 'Buy']
-    hold = [s for s in stocks if s['recommendation'] == 'Hold']
-    speculative = [s for s in stocks if s['recommendation'] == 'Speculative Buy']
-    avoid = [s for s in stocks if s['recommendation'] == 'Avoid']
-    
-    # Filter stocks under ₹1000
-    under_1000 = [s for s in stocks if s['current_price'] < 1000]
-    
-    # Best P/E ratios (excluding negative)
-    best_pe = sorted([s for s in under_1000 if s['pe_ratio'] > 0], key=lambda x: x['pe_ratio'])[:5]
-    
-    # Best dividend yields
-    best_dividend = sorted(under_1000, key=lambda x: x['dividend_yield'], reverse=True)[:5]
-    
-    # Best ROE
-    best_roe = sorted([s for s in under_1000 if s['roe'] > 0], key=lambda x: x['roe'], reverse=True)[:5]
-    
+    # Stocks under ₹1000 with comprehensive analysis, precomputed when stock_universe.json is loaded
+    return jsonify(get_stock_universe().analysis)
+
+SCREENER_MAX_LIMIT = 500
+
+def stock_universe_version():
+    return get_stock_universe().version
+
+def list_param(name):
+    """Comma-separated or repeated query parameter -> list of values"""
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(v.strip() for v in value.split(',') if v.strip())
+    return values
+
+@app.route('/api/stocks/screener', methods=['GET'])
+@conditional_get(lambda: (stock_universe_version(),), cache_control='public, max-age=3600')
+def stock_screener():
+    """Filter and rank the stock universe
+
+    ?sector=Banking,Power&pe_max=12&dividend_min=2&roe_min=15&de_max=1
+    &recommendation=Buy&risk=Low&sort=dividend_yield&order=desc&limit=10
+    """
+    universe = get_stock_universe()
+    try:
+        bounds = {}
+        for param, (field, end) in STOCK_RANGE_FILTERS.items():
+            if param in request.args:
+                low, high = bounds.get(field, (None, None))
+                value = float(request.args[param])
+                bounds[field] = (value, high) if end == 'min' else (low, value)
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+        if not 1 <= limit <= SCREENER_MAX_LIMIT or offset < 0:
+            raise ValueError(f'limit must be 1-{SCREENER_MAX_LIMIT} and offset not negative')
+        rows, total = universe.screen(
+            bounds, sectors=list_param('sector'), recommendations=list_param('recommendation'),
+            risks=list_param('risk'), symbols=list_param('symbol'),
+            sort=request.args.get('sort', 'market_cap'), direction=request.args.get('order', 'desc'),
+            limit=limit, offset=offset
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    fields = list_param('fields')
+    stocks = []
+    for row in rows:
+        record = universe.records[row]
+        stock = {f: record[f] for f in fields if f in record} if fields else dict(record)
+        stock['upside_pct'] = round(float(universe.columns['upside'][row]), 2)
+        stocks.append(stock)
     return jsonify({
-        'total_stocks': len(under_1000),
-        'all_stocks': under_1000,
-        'by_recommendation': {
-            'strong_buy': strong_buy,
-            'buy': buy,
-            'hold': hold,
-            'speculative': speculative,
-            'avoid': avoid
-        },
-        'top_picks': {
-            'best_pe_ratio': best_pe,
-            'best_dividend_yield': best_dividend,
-            'best_roe': best_roe
-        },
-        'analysis_summary': {
-            'avg_pe_ratio': sum([s['pe_ratio'] for s in under_1000 if s['pe_ratio'] > 0]) / len([s for s in under_1000 if s['pe_ratio'] > 0]),
-            'avg_dividend_yield': sum([s['dividend_yield'] for s in under_1000]) / len(under_1000),
-            'avg_roe': sum([s['roe'] for s in under_1000 if s['roe'] > 0]) / len([s for s in under_1000 if s['roe'] > 0])
-        }
+        'total_matches': total,
+        'offset': offset,
+        'limit': limit,
+        'stocks': stocks,
+        'sectors': sorted(universe.categories['sector'])
     })
 
+# Price history indicators
+MAX_INDICATOR_WINDOW = 1000
+
+def json_floats(values, digits=2):
+    """Rounded floats for JSON, None where the value is NaN"""
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+def window_param(name, default):
+    values = [int(v) for v in list_param(name)] or list(default)
+    if any(not 1 <= v <= MAX_INDICATOR_WINDOW for v in values):
+        raise ValueError(f'{name} windows must be between 1 and {MAX_INDICATOR_WINDOW}')
+    return values
+
+def load_price_store():
+    """(store, None) or (None, error response) when no history has been built"""
+    store = get_price_store()
+    if store is None:
+        return None, (jsonify({'error': 'No price history built (run: python price_history.py build prices.csv)'}), 404)
+    return store, None
+
+@app.route('/api/prices/indicators', methods=['GET'])
+@conditional_get(lambda: (price_store_version(),))
+def price_indicators_view():
+    """Returns, drawdown, moving averages, volatility and RSI for many symbols at once
+
+    ?symbols=SBIN,NTPC (default all)&from=2024-01-01&to=2024-12-31&sma=20,50,200
+    &volatility=20&rsi=14&sort=return_pct&order=desc&limit=50
+    Columns are lists in symbol order, one entry per symbol.
+    """
+    store, error = load_price_store()
+    if error:
+        return error
+    try:
+        rows = store.rows([s.upper() for s in list_param('symbols')])
+        sma_windows = window_param('sma', (20, 50))
+        volatility_window = window_param('volatility', (20,))[0]
+        rsi_window = window_param('rsi', (14,))[0]
+        result = price_indicators(store, rows, request.args.get('from'), request.args.get('to'),
+                                  sma_windows, volatility_window, rsi_window)
+    except KeyError as e:
+        return jsonify({'error': f'Unknown symbols: {e.args[0]}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    columns = result['columns']
+    order = np.arange(len(rows))
+    sort = request.args.get('sort')
+    if sort:
+        if sort == 'symbol' or sort not in columns:
+            return jsonify({'error': f'sort must be one of {", ".join(c for c in columns if c != "symbol")}'}), 400
+        values = columns[sort] if request.args.get('order', 'desc') == 'asc' else -columns[sort]
+        order = np.argsort(values, kind='stable')  # NaN last either way
+    if 'limit' in request.args:
+        try:
+            order = order[:max(int(request.args['limit']), 0)]
+        except ValueError:
+            return jsonify({'error': 'limit must be a number'}), 400
+    
+    result['columns'] = {
+        name: [values[i] for i in order] if name == 'symbol' else json_floats(values[order])
+        for name, values in columns.items()
+    }
+    result['symbols'] = len(order)
+    return jsonify(result)
+
+@app.route('/api/prices/<symbol>', methods=['GET'])
+@conditional_get(lambda: (price_store_version(),))
+def price_series(symbol):
+    """Daily closes with moving averages and drawdown for one symbol over ?from=&to="""
+    store, error = load_price_store()
+    if error:
+        return error
+    try:
+        rows = store.rows([symbol.upper()])
+        sma_windows = window_param('sma', (20, 50))
+        stop = store.day(request.args['to']) if 'to' in request.args else len(store.dates)
+        start = store.day(request.args['from'], side='left') if 'from' in request.args else max(stop - TRADING_DAYS, 0)
+    except KeyError:
+        return jsonify({'error': f'Unknown symbol: {symbol}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if stop <= start:
+        return jsonify({'error': 'no trading days in the requested range'}), 400
+    
+    # Moving averages start from history before the range, so they are
+    # defined from its first day
+    first = max(start - max(sma_windows), 0)
+    close = store.window(rows, first, stop)
+    visible = slice(start - first, None)
+    series = {
+        'date': [str(d) for d in store.dates[start:stop]],
+        'close': json_floats(close[0, visible]),
+        'drawdown_pct': json_floats(drawdown(close[:, visible])[0] * 100)
+    }
+    for window in sma_windows:
+        series[f'sma_{window}'] = json_floats(rolling_mean(close, window)[0, visible])
+    return jsonify({'symbol': symbol.upper(), 'days': stop - start, 'series': series})
+
 # Expense and Income Templates
 @app.route('/api/templates/expense', methods=['GET'])
+@etagged('expense_templates')
 def get_expense_templates():
     conn = get_db_connection()
     templates = conn.execute('SELECT * FROM expense_templates ORDER BY category').fetchall()
@@ -1823,6 +2215,7 @@ def delete_expense_template(template_id):
     return jsonify({'message': 'Template deleted successfully'})
 
 @app.route('/api/templates/income', methods=['GET'])
+@etagged('income_templates')
 def get_income_templates():
     conn = get_db_connection()
     templates = conn.execute('SELECT * FROM income_templates ORDER BY category').fetchall()
@@ -1866,6 +2259,7 @@ def delete_income_template(template_id):
 
 # Get expense categories from templates
 @app.route('/api/templates/expense/categories', methods=['GET'])
+@etagged('expense_templates')
 def get_expense_categories():
     conn = get_db_connection()
     categories = conn.execute('SELECT DISTINCT category FROM expense_templates ORDER BY category').fetchall()
@@ -1874,6 +2268,7 @@ def get_expense_categories():
 
 # Asset Templates APIs
 @app.route('/api/templates/asset', methods=['GET'])
+@etagged('asset_templates')
 def get_asset_templates():
     conn = get_db_connection()
     templates = conn.execute('SELECT * FROM asset_templates ORDER BY category').fetchall()
@@ -1903,6 +2298,7 @@ def delete_asset_template(template_id):
     return jsonify({'message': 'Asset template deleted successfully'})
 
 @app.route('/api/templates/asset/categories', methods=['GET'])
+@etagged('asset_templates')
 def get_asset_categories():
     conn = get_db_connection()
     categories = conn.execute('SELECT DISTINCT category FROM asset_templates ORDER BY category').fetchall()
@@ -1911,6 +2307,7 @@ def get_asset_categories():
 
 # Liability Templates APIs
 @app.route('/api/templates/liability', methods=['GET'])
+@etagged('liability_templates')
 def get_liability_templates():
     conn = get_db_connection()
     templates = conn.execute('SELECT * FROM liability_templates ORDER BY category').fetchall()
@@ -1940,6 +2337,7 @@ def delete_liability_template(template_id):
     return jsonify({'message': 'Liability template deleted successfully'})
 
 @app.route('/api/templates/liability/categories', methods=['GET'])
+@etagged('liability_templates')
 def get_liability_categories():
     conn = get_db_connection()
     categories = conn.execute('SELECT DISTINCT category FROM liability_templates ORDER BY category').fetchall()
@@ -1947,6 +2345,7 @@ def get_liability_categories():
     return jsonify([dict(c) for c in categories])
 
 @app.route('/api/templates/income/categories', methods=['GET'])
+@etagged('income_templates')
 def get_income_categories():
     conn = get_db_connection()
     categories = conn.execute('SELECT DISTINCT category FROM income_templates ORDER BY category').fetchall()
@@ -1955,7 +2354,11 @@ def get_income_categories():
 
 # Income Data APIs
 @app.route('/api/income', methods=['GET'])
+@etagged('income')
 def get_income():
+    if wants_paging():
+        return paged_response('income')
+    
     conn = get_db_connection()
     income = conn.execute('SELECT * FROM income ORDER BY date DESC').fetchall()
     conn.close()
@@ -1995,20 +2398,162 @@ def delete_income(income_id):
     conn.close()
     return jsonify({'message': 'Income deleted successfully'})
 
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+@app.route('/api/<any(expenses, income, assets, liabilities):table>/bulk', methods=['POST'])
+def bulk_insert(table):
+    """Insert many rows at once: a JSON array, or NDJSON with one row per line
+
+    By default one invalid row rejects the whole batch; ?on_error=skip
+    inserts the valid rows and reports the rest.
+    """
+    on_error = request.args.get('on_error', 'reject')
+    if on_error not in ('reject', 'skip'):
+        return jsonify({'error': 'on_error must be reject or skip'}), 400
+    if request.mimetype in NDJSON_TYPES:
+        rows = parse_ndjson(request.stream)
+    else:
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            return jsonify({'error': 'Expected a JSON array of rows or an NDJSON body'}), 400
+    if len(rows) > MAX_BULK_ROWS:
+        return jsonify({'error': f'At most {MAX_BULK_ROWS} rows per request'}), 413
+    if not rows:
+        return jsonify({'error': 'No rows to insert'}), 400
+
+    values, errors = validate_rows(table, rows, user_id=1)
+    report = {'invalid': len(errors), 'errors': errors[:MAX_REPORTED_ERRORS]}
+    if errors and (on_error == 'reject' or not values):
+        return jsonify(dict(report, error=f'{len(errors)} of {len(rows)} rows are invalid; nothing was inserted')), 400
+
+    # One transaction: a failure leaves nothing behind (the pool rolls it back)
+    conn = get_db_connection()
+    first_id, last_id = insert_rows(conn, table, values)
+    conn.commit()
+    conn.close()
+    return jsonify(dict(report, inserted=len(values), first_id=first_id, last_id=last_id)), 201
+
+IMPORT_UPLOAD_CHUNK_BYTES = 1 << 20
+
+@app.route('/api/import/profiles', methods=['GET'])
+def get_import_profiles():
+    """Bank statement layouts the CSV import understands"""
+    try:
+        profiles = load_profiles()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({name: profile.get('description', '') for name, profile in sorted(profiles.items())})
+
+@app.route('/api/import/csv', methods=['POST'])
+def import_statement():
+    """Start importing a bank statement: a multipart 'file' field, or a text/csv body
+
+    The upload is spooled to a temporary file and imported in the
+    background; poll the returned job for progress.
+    """
+    profile = request.args.get('profile', 'generic')
+    if profile not in load_profiles():
+        return jsonify({'error': f'Unknown profile {profile!r}'}), 400
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return jsonify({'error': 'Missing file field'}), 400
+        stream, filename = upload.stream, upload.filename or 'statement.csv'
+    else:
+        stream, filename = request.stream, request.args.get('filename', 'statement.csv')
+
+    fd, path = tempfile.mkstemp(prefix='finance_import_', suffix='.csv')
+    with os.fdopen(fd, 'wb') as f:
+        while True:
+            chunk = stream.read(IMPORT_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            f.write(chunk)
+    size = os.path.getsize(path)
+    if not size:
+        os.remove(path)
+        return jsonify({'error': 'Empty statement'}), 400
+
+    conn = get_db_connection()
+    job_id = create_job(conn, filename, profile, user_id=1, total_bytes=size)
+    conn.close()
+    # The job runs on its own connection, committing batch by batch
+    start_job(get_db_connection, path, profile, job_id, user_id=1, remove_file=True)
+    return jsonify({'job_id': job_id, 'status': 'queued', 'url': f'/api/import/jobs/{job_id}'}), 202
+
+@app.route('/api/import/jobs', methods=['GET'])
+def list_import_jobs():
+    conn = get_db_connection()
+    jobs = conn.execute(
+        'SELECT * FROM import_jobs WHERE user_id = ? ORDER BY id DESC LIMIT 50', (1,)
+    ).fetchall()
+    conn.close()
+    return jsonify([job_summary(job) for job in jobs])
+
+@app.route('/api/import/jobs/<int:job_id>', methods=['GET'])
+def get_import_job(job_id):
+    conn = get_db_connection()
+    job = conn.execute('SELECT * FROM import_jobs WHERE id = ?', (job_id,)).fetchone()
+    conn.close()
+    if job is None:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(job_summary(job))
+
+
+# Investment schemes and their payment tables: (scheme table, payment table, foreign key)
+SCHEME_PAYMENT_TABLES = {
+    'rd': ('recurring_deposits', 'rd_payments', 'rd_id'),
+    'chit': ('chit_funds', 'chit_payments', 'chit_id'),
+    'gold_chit': ('gold_chits', 'gold_chit_payments', 'gold_chit_id')
+}
+
+def list_schemes_with_payments(conn, scheme, include_payments=True):
+    """All schemes of one kind with paid_months/total_paid and (optionally) their payments
+
+    Uses two queries in total instead of one payment query per scheme:
+    the scheme rows, then either every payment in (scheme, month) order or
+    one aggregate row per scheme.
+    """
+    table, payment_table, fk = SCHEME_PAYMENT_TABLES[scheme]
+    schemes = conn.execute(f'SELECT * FROM {table} ORDER BY start_date DESC').fetchall()
+    result = [dict(row) for row in schemes]
+    for item in result:
+        item['paid_months'] = 0
+        item['total_paid'] = 0
+        if include_payments:
+            item['payments'] = []
+    by_id = {item['id']: item for item in result}
+    
+    if include_payments:
+        payments = conn.execute(f'SELECT * FROM {payment_table} ORDER BY {fk}, month_number').fetchall()
+        for payment in payments:
+            item = by_id.get(payment[fk])
+            if item is not None:
+                item['payments'].append(dict(payment))
+                item['paid_months'] += 1
+                item['total_paid'] += payment['amount']
+    else:
+        totals = conn.execute(
+            f'SELECT {fk} as scheme_id, COUNT(*) as paid_months, SUM(amount) as total_paid '
+            f'FROM {payment_table} GROUP BY {fk}'
+        ).fetchall()
+        for row in totals:
+            item = by_id.get(row['scheme_id'])
+            if item is not None:
+                item['paid_months'] = row['paid_months']
+                item['total_paid'] = row['total_paid']
+    return result
+
+def wants_payments():
+    """False when the client asked for aggregates only (?summary=true)"""
+    return request.args.get('summary', 'false').lower() not in ('1', 'true', 'yes')
 
 # Recurring Deposits APIs
 @app.route('/api/rd', methods=['GET'])
+@etagged('recurring_deposits', 'rd_payments')
 def get_rds():
     conn = get_db_connection()
-    rds = conn.execute('SELECT * FROM recurring_deposits ORDER BY start_date DESC').fetchall()
-    result = []
-    for rd in rds:
-        rd_dict = dict(rd)
-        payments = conn.execute('SELECT * FROM rd_payments WHERE rd_id = ? ORDER BY month_number', (rd['id'],)).fetchall()
-        rd_dict['payments'] = [dict(p) for p in payments]
-        rd_dict['paid_months'] = len(payments)
-        rd_dict['total_paid'] = sum([p['amount'] for p in payments])
-        result.append(rd_dict)
+    result = list_schemes_with_payments(conn, 'rd', include_payments=wants_payments())
     conn.close()
     return jsonify(result)
 
@@ -2017,32 +2562,55 @@ def add_rd():
     data = request.get_json()
     conn = get_db_connection()
     
-    # Calculate maturity date and amount
-    start_date = datetime.strptime(data['start_date'], '%Y-%m-%d')
-    tenure = int(data['tenure'])
-    # Simple month addition (approximate)
-    maturity_date = start_date + timedelta(days=tenure * 30)
-    
-    # Simple RD maturity calculation
+    # Calendar maturity date and quarterly compounded maturity amount
     monthly_amount = float(data['monthly_amount'])
     tenure = int(data['tenure'])
-    rate = float(data['interest_rate']) / 100
-    
-    # RD maturity formula: M = P * n * (n+1) / 2 * (r/12)
-    total_deposit = monthly_amount * tenure
-    interest = monthly_amount * tenure * (tenure + 1) / 2 * (rate / 12)
-    maturity_amount = total_deposit + interest
+    try:
+        maturity_date, maturity_amount = rd_terms(monthly_amount, float(data['interest_rate']), tenure, data['start_date'])
+    except ValueError:
+        conn.close()
+        return jsonify({'error': 'start_date must be YYYY-MM-DD'}), 400
+    maturity_amount = round(maturity_amount, 2)
     
     cursor = conn.execute(
         'INSERT INTO recurring_deposits (bank_name, account_number, monthly_amount, interest_rate, tenure, start_date, maturity_date, maturity_amount) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
         (data['bank_name'], data.get('account_number', ''), monthly_amount, data['interest_rate'], 
-         tenure, data['start_date'], maturity_date.strftime('%Y-%m-%d'), maturity_amount)
+         tenure, data['start_date'], maturity_date, maturity_amount)
     )
     rd_id = cursor.lastrowid
     conn.commit()
     conn.close()
     return jsonify({'id': rd_id, 'message': 'RD added successfully', 'maturity_amount': maturity_amount})
 
+@app.route('/api/rd/valuation', methods=['GET'])
+@etagged('recurring_deposits', 'rd_payments')
+def rd_valuation():
+    """Accrued value of every RD as of a date (default today) from its recorded payments"""
+    as_of = request.args.get('as_of', datetime.now().strftime('%Y-%m-%d'))
+    try:
+        datetime.strptime(as_of, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'as_of must be YYYY-MM-DD'}), 400
+    
+    conn = get_db_connection()
+    rds = conn.execute('SELECT * FROM recurring_deposits ORDER BY id').fetchall()
+    payments = conn.execute(
+        'SELECT rd_id, payment_date, amount FROM rd_payments WHERE payment_date <= ?', (as_of,)
+    ).fetchall()
+    conn.close()
+    
+    valuations = value_rds(rds, payments, as_of)
+    for rd, valuation in zip(rds, valuations):
+        valuation['bank_name'] = rd['bank_name']
+        valuation['account_number'] = rd['account_number']
+        valuation['status'] = rd['status']
+    return jsonify({
+        'as_of': as_of,
+        'rds': valuations,
+        'total_deposited': round(sum(v['deposited'] for v in valuations), 2),
+        'total_value': round(sum(v['accrued_value'] for v in valuations), 2)
+    })
+
 @app.route('/api/rd/<int:rd_id>/payment', methods=['POST'])
 def add_rd_payment(rd_id):
     data = request.get_json()
@@ -2071,17 +2639,10 @@ def delete_rd(rd_id):
 
 # Chit Fund APIs
 @app.route('/api/chit', methods=['GET'])
+@etagged('chit_funds', 'chit_payments')
 def get_chits():
     conn = get_db_connection()
-    chits = conn.execute('SELECT * FROM chit_funds ORDER BY start_date DESC').fetchall()
-    result = []
-    for chit in chits:
-        chit_dict = dict(chit)
-        payments = conn.execute('SELECT * FROM chit_payments WHERE chit_id = ? ORDER BY month_number', (chit['id'],)).fetchall()
-        chit_dict['payments'] = [dict(p) for p in payments]
-        chit_dict['paid_months'] = len(payments)
-        chit_dict['total_paid'] = sum([p['amount'] for p in payments])
-        result.append(chit_dict)
+    result = list_schemes_with_payments(conn, 'chit', include_payments=wants_payments())
     conn.close()
     return jsonify(result)
 
@@ -2116,10 +2677,107 @@ def add_chit_payment(chit_id):
     conn.close()
     return jsonify({'message': 'Payment added successfully'})
 
+@app.route('/api/chit/<int:chit_id>/auction', methods=['POST'])
+def record_chit_auction(chit_id):
+    """Record (or correct) the winning discount of one month's auction"""
+    data = request.get_json() or {}
+    conn = get_db_connection()
+    chit = conn.execute('SELECT * FROM chit_funds WHERE id = ?', (chit_id,)).fetchone()
+    if chit is None:
+        conn.close()
+        return jsonify({'error': 'Chit fund not found'}), 404
+    
+    try:
+        month_number = int(data['month_number'])
+        discount = float(data['discount'])
+    except (KeyError, TypeError, ValueError):
+        conn.close()
+        return jsonify({'error': 'month_number and discount are required numbers'}), 400
+    if not 1 <= month_number <= chit['total_months'] or not 0 <= discount <= chit['total_value']:
+        conn.close()
+        return jsonify({'error': 'month_number or discount out of range for this chit'}), 400
+    
+    conn.execute('''
+        INSERT INTO chit_auctions (chit_id, month_number, discount, auction_date, won_by_member)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (chit_id, month_number) DO UPDATE SET
+            discount = excluded.discount,
+            auction_date = excluded.auction_date,
+            won_by_member = excluded.won_by_member
+    ''', (chit_id, month_number, discount, data.get('auction_date'), 1 if data.get('won_by_member') else 0))
+    conn.commit()
+    conn.close()
+    return jsonify({'message': 'Auction recorded successfully'})
+
+@app.route('/api/chit/<int:chit_id>/simulation', methods=['GET'])
+@etagged('chit_funds', 'chit_auctions')
+def simulate_chit(chit_id):
+    """Cash flows and XIRR of taking the prize in every month of a chit
+
+    Recorded auctions are used as-is; other months assume discounts falling
+    from max_discount_pct to min_discount_pct of the chit value.
+    """
+    conn = get_db_connection()
+    chit = conn.execute('SELECT * FROM chit_funds WHERE id = ?', (chit_id,)).fetchone()
+    auctions = conn.execute(
+        'SELECT month_number, discount, won_by_member FROM chit_auctions WHERE chit_id = ? ORDER BY month_number',
+        (chit_id,)
+    ).fetchall()
+    conn.close()
+    if chit is None:
+        return jsonify({'error': 'Chit fund not found'}), 404
+    
+    try:
+        commission_pct = float(request.args.get('commission_pct', FOREMAN_COMMISSION_PCT))
+        max_discount_pct = float(request.args.get('max_discount_pct', DEFAULT_MAX_DISCOUNT_PCT))
+        min_discount_pct = float(request.args.get('min_discount_pct', commission_pct))
+        recorded = {row['month_number']: row['discount'] for row in auctions
+                    if row['month_number'] <= chit['total_months']}
+        discounts, known = chit_discounts(chit['total_value'], chit['total_months'], recorded,
+                                          max_discount_pct, min_discount_pct)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    schedule = chit_schedule(chit['total_value'], chit['monthly_amount'], discounts, commission_pct)
+    sweep = chit_prize_sweep(chit['start_date'], schedule)
+    rates = [None if np.isnan(rate) else round(float(rate) * 100, 2) for rate in sweep['xirr']]
+    won = [row['month_number'] for row in auctions if row['won_by_member']]
+    
+    result = {
+        'chit_id': chit_id,
+        'chit_name': chit['chit_name'],
+        'members': chit['total_months'],
+        'commission_pct': commission_pct,
+        'months': {
+            'month': sweep['prize_month'].tolist(),
+            'date': [str(d) for d in sweep['date']],
+            'discount': np.round(schedule['discount'], 2).tolist(),
+            'recorded': known.tolist(),
+            'dividend': np.round(schedule['dividend'], 2).tolist(),
+            'net_instalment': np.round(schedule['net_instalment'], 2).tolist(),
+            'prize': np.round(schedule['prize'], 2).tolist()
+        },
+        # One row per possible prize month
+        'sweep': {
+            'prize_month': sweep['prize_month'].tolist(),
+            'net_gain': np.round(sweep['net_gain'], 2).tolist(),
+            'position': sweep['position'].tolist(),
+            'xirr_pct': rates
+        },
+        'total_contribution': round(float(sweep['total_contribution'][0]), 2),
+        'won_month': won[0] if won else None
+    }
+    savers = [i for i, rate in enumerate(rates) if rate is not None and sweep['position'][i] == 'saver']
+    borrowers = [i for i, rate in enumerate(rates) if rate is not None and sweep['position'][i] == 'borrower']
+    result['best_month_to_save'] = int(max(savers, key=lambda i: rates[i])) + 1 if savers else None
+    result['cheapest_month_to_borrow'] = int(min(borrowers, key=lambda i: rates[i])) + 1 if borrowers else None
+    return jsonify(result)
+
 @app.route('/api/chit/<int:chit_id>', methods=['DELETE'])
 def delete_chit(chit_id):
     conn = get_db_connection()
     conn.execute('DELETE FROM chit_payments WHERE chit_id = ?', (chit_id,))
+    conn.execute('DELETE FROM chit_auctions WHERE chit_id = ?', (chit_id,))
     conn.execute('DELETE FROM chit_funds WHERE id = ?', (chit_id,))
     conn.commit()
     conn.close()
@@ -2127,17 +2785,10 @@ def delete_chit(chit_id):
 
 # Gold Chit APIs
 @app.route('/api/gold-chit', methods=['GET'])
+@etagged('gold_chits', 'gold_chit_payments')
 def get_gold_chits():
     conn = get_db_connection()
-    gold_chits = conn.execute('SELECT * FROM gold_chits ORDER BY start_date DESC').fetchall()
-    result = []
-    for gc in gold_chits:
-        gc_dict = dict(gc)
-        payments = conn.execute('SELECT * FROM gold_chit_payments WHERE gold_chit_id = ? ORDER BY month_number', (gc['id'],)).fetchall()
-        gc_dict['payments'] = [dict(p) for p in payments]
-        gc_dict['paid_months'] = len(payments)
-        gc_dict['total_paid'] = sum([p['amount'] for p in payments])
-        result.append(gc_dict)
+    result = list_schemes_with_payments(conn, 'gold_chit', include_payments=wants_payments())
     conn.close()
     return jsonify(result)
 
@@ -2158,6 +2809,19 @@ def add_gold_chit():
 @app.route('/api/gold-chit/<int:gc_id>/payment', methods=['POST'])
 def add_gold_chit_payment(gc_id):
     data = request.get_json()
+    # An installment must be priced to know how much gold it bought
+    try:
+        history = get_gold_prices()
+    except ValueError:
+        history = None
+    if history is not None:
+        try:
+            price = history.price_on(np.datetime64(data['payment_date'], 'D'))
+        except ValueError:
+            return jsonify({'error': 'payment_date must be YYYY-MM-DD'}), 400
+        if np.isnan(price):
+            return jsonify({'error': f"No gold price before {history.dates[0]}; "
+                                     f"cannot value a payment on {data['payment_date']}"}), 400
     conn = get_db_connection()
     
     # Get current payment count
@@ -2172,6 +2836,73 @@ def add_gold_chit_payment(gc_id):
     conn.close()
     return jsonify({'message': 'Payment added successfully'})
 
+def load_gold_prices():
+    """(price history, None) or (None, error response) when there is no usable price file"""
+    try:
+        history = get_gold_prices()
+    except ValueError as e:
+        return None, (jsonify({'error': f'Gold price file is invalid: {e}'}), 500)
+    if history is None:
+        return None, (jsonify({'error': 'No gold price history loaded (set GOLD_PRICE_CSV)'}), 404)
+    return history, None
+
+@app.route('/api/gold-prices', methods=['GET'])
+@etagged_with_gold_prices()
+def gold_prices():
+    """Range of the loaded price history, and the price on ?date= if given"""
+    history, error = load_gold_prices()
+    if error:
+        return error
+    result = history.summary()
+    if 'date' in request.args:
+        try:
+            price = history.price_on(np.datetime64(request.args['date'], 'D'))
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+        result['date'] = request.args['date']
+        result['price_per_gram'] = None if np.isnan(price) else float(price)
+    return jsonify(result)
+
+@app.route('/api/gold-chit/valuation', methods=['GET'])
+@etagged_with_gold_prices('gold_chits', 'gold_chit_payments')
+def gold_chit_valuation():
+    """Grams bought with every payment and the current value of each gold chit"""
+    as_of = request.args.get('as_of', datetime.now().strftime('%Y-%m-%d'))
+    try:
+        datetime.strptime(as_of, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'as_of must be YYYY-MM-DD'}), 400
+    history, error = load_gold_prices()
+    if error:
+        return error
+    
+    conn = get_db_connection()
+    chits = conn.execute('SELECT * FROM gold_chits ORDER BY id').fetchall()
+    payments = conn.execute(
+        'SELECT gold_chit_id, payment_date, amount FROM gold_chit_payments ORDER BY gold_chit_id, month_number'
+    ).fetchall()
+    conn.close()
+    
+    try:
+        valuations, detail = value_gold_chits(chits, payments, history, as_of)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    for chit, valuation, payment_columns in zip(chits, valuations, detail):
+        valuation['chit_name'] = chit['chit_name']
+        valuation['jeweller'] = chit['jeweller']
+        valuation['status'] = chit['status']
+        valuation['payments'] = payment_columns
+    current_price = history.price_on(np.datetime64(as_of, 'D'))
+    valued = [v for v in valuations if v['current_value'] is not None]
+    return jsonify({
+        'as_of': as_of,
+        'price_per_gram': None if np.isnan(current_price) else float(current_price),
+        'gold_chits': valuations,
+        'total_grams': round(sum(v['grams'] for v in valued), 4),
+        'total_paid': round(sum(v['paid'] for v in valuations), 2),
+        'total_value': round(sum(v['current_value'] for v in valued), 2)
+    })
+
 @app.route('/api/gold-chit/<int:gc_id>', methods=['DELETE'])
 def delete_gold_chit(gc_id):
     conn = get_db_connection()
@@ -2181,8 +2912,151 @@ def delete_gold_chit(gc_id):
     conn.close()
     return jsonify({'message': 'Gold chit deleted successfully'})
 
+# Realized investment returns
+# (scheme kind, id) -> (signature, result, cash flows). A scheme is re-solved
+# only when its row, its payments, its winning auction or the valuation
+# date changed since the last request.
+scheme_returns = {}
+scheme_returns_lock = threading.Lock()
+
+RETURNS_TABLES = ('recurring_deposits', 'rd_payments', 'chit_funds', 'chit_payments', 'chit_auctions',
+                  'gold_chits', 'gold_chit_payments')
+SCHEME_NAME_COLUMNS = {'rd': 'bank_name', 'chit': 'chit_name', 'gold_chit': 'chit_name'}
+
+def payment_signatures(conn, scheme):
+    """scheme id -> (payment count, last payment id, amount paid); changes with any new payment"""
+    _, payment_table, fk = SCHEME_PAYMENT_TABLES[scheme]
+    rows = conn.execute(
+        f'SELECT {fk} as scheme_id, COUNT(*), MAX(id), SUM(amount) FROM {payment_table} GROUP BY {fk}'
+    ).fetchall()
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+def scheme_payments(conn, scheme, ids, as_of):
+    """Payments up to `as_of` of the given schemes, grouped by scheme id"""
+    _, payment_table, fk = SCHEME_PAYMENT_TABLES[scheme]
+    grouped = {scheme_id: [] for scheme_id in ids}
+    if ids:
+        placeholders = ','.join('?' * len(ids))
+        rows = conn.execute(
+            f'SELECT * FROM {payment_table} WHERE {fk} IN ({placeholders}) ORDER BY {fk}, month_number',
+            list(ids)
+        ).fetchall()
+        for row in rows:
+            if row['payment_date'] <= as_of:
+                grouped[row[fk]].append(row)
+    return grouped
+
+@app.route('/api/investments/returns', methods=['GET'])
+@etagged_with_gold_prices(*RETURNS_TABLES)
+def investment_returns():
+    """XIRR of every RD, chit and gold chit from its recorded payments, as of a date (default today)"""
+    as_of = request.args.get('as_of', datetime.now().strftime('%Y-%m-%d'))
+    try:
+        datetime.strptime(as_of, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'as_of must be YYYY-MM-DD'}), 400
+    
+    conn = get_db_connection()
+    schemes, signatures = {}, {}
+    for scheme, (table, _, _) in SCHEME_PAYMENT_TABLES.items():
+        schemes[scheme] = conn.execute(f'SELECT * FROM {table} ORDER BY id').fetchall()
+        signatures[scheme] = payment_signatures(conn, scheme)
+    try:
+        gold_history = get_gold_prices()
+    except ValueError:
+        gold_history = None
+    won = {row['chit_id']: row for row in conn.execute(
+        'SELECT * FROM chit_auctions WHERE won_by_member = 1 ORDER BY chit_id, month_number'
+    ).fetchall()}
+    
+    current = {}
+    for scheme, rows in schemes.items():
+        for row in rows:
+            if scheme == 'chit':
+                depends_on = tuple(won[row['id']]) if row['id'] in won else None
+            elif scheme == 'gold_chit':
+                depends_on = gold_history.version if gold_history is not None else None
+            else:
+                depends_on = None
+            current[(scheme, row['id'])] = (as_of, tuple(row), signatures[scheme].get(row['id']), depends_on)
+    with scheme_returns_lock:
+        cached = {key: scheme_returns[key] for key in current
+                  if key in scheme_returns and scheme_returns[key][0] == current[key]}
+    stale = {scheme: [row for row in rows if (scheme, row['id']) not in cached]
+             for scheme, rows in schemes.items()}
+    payments = {scheme: scheme_payments(conn, scheme, [row['id'] for row in rows], as_of)
+                for scheme, rows in stale.items()}
+    conn.close()
+    
+    # Cash flows of every stale scheme, solved together in one XIRR call
+    flows = {}
+    rd_series, _ = rd_cash_flows(stale['rd'], [p for paid in payments['rd'].values() for p in paid], as_of)
+    for rd, series in zip(stale['rd'], rd_series):
+        flows[('rd', rd['id'])] = series
+    for chit in stale['chit']:
+        flows[('chit', chit['id'])] = chit_cash_flows(chit, payments['chit'][chit['id']], won.get(chit['id']), as_of)
+    gold_valuations = [None] * len(stale['gold_chit'])
+    if gold_history is not None:
+        gold_payments = [p for paid in payments['gold_chit'].values() for p in paid]
+        try:
+            gold_valuations, _ = value_gold_chits(stale['gold_chit'], gold_payments, gold_history, as_of)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    for gold_chit, valuation in zip(stale['gold_chit'], gold_valuations):
+        flows[('gold_chit', gold_chit['id'])] = valuation and gold_chit_cash_flows(
+            payments['gold_chit'][gold_chit['id']], valuation, as_of
+        )
+    
+    solvable = [key for key, series in flows.items() if series is not None]
+    solved = dict(zip(solvable, series_returns([flows[key] for key in solvable])))
+    fresh = {}
+    for scheme, rows in stale.items():
+        for row in rows:
+            key = (scheme, row['id'])
+            result = solved.get(key)
+            if result is None:
+                paid = sum(p['amount'] for p in payments[scheme][row['id']])
+                if scheme == 'chit':
+                    note = 'prize not taken yet'
+                elif gold_history is None:
+                    note = 'no gold price history loaded'
+                else:
+                    note = 'payments predate the gold price history'
+                result = {'invested': round(paid, 2), 'value': None, 'gain': None, 'xirr_pct': None, 'note': note}
+            fresh[key] = (current[key], result, flows[key])
+    with scheme_returns_lock:
+        # Deleted schemes drop out of the cache here
+        scheme_returns.clear()
+        scheme_returns.update(cached)
+        scheme_returns.update(fresh)
+    
+    entries = {**cached, **fresh}
+    results = []
+    for scheme, rows in schemes.items():
+        for row in rows:
+            entry = entries[(scheme, row['id'])]
+            results.append(dict(entry[1], type=scheme, id=row['id'], name=row[SCHEME_NAME_COLUMNS[scheme]],
+                                status=row['status']))
+    
+    # The whole portfolio as one series
+    portfolio_flows = [entry[2] for entry in entries.values() if entry[2] is not None]
+    portfolio = {'invested': 0, 'value': 0, 'gain': 0, 'xirr_pct': None}
+    if portfolio_flows:
+        combined = ([a for amounts, _ in portfolio_flows for a in amounts],
+                    [d for _, dates in portfolio_flows for d in dates])
+        portfolio = series_returns([combined])[0]
+    
+    return jsonify({
+        'as_of': as_of,
+        'schemes': results,
+        'portfolio': portfolio,
+        'recomputed': len(fresh)
+    })
+
 # Financial Health Score
 @app.route('/api/financial-health', methods=['GET'])
+@etagged(*REPORT_TABLES)
+@cached(*REPORT_TABLES)
 def financial_health():
     conn = get_db_connection()
     
@@ -2190,13 +3064,10 @@ def financial_health():
     current_month = datetime.now().strftime('%Y-%m')
     
     # Calculate metrics
-    assets = conn.execute('SELECT SUM(value) as total FROM assets WHERE month = ?', (current_month,)).fetchone()
-    liabilities = conn.execute('SELECT SUM(amount) as total FROM liabilities WHERE month = ?', (current_month,)).fetchone()
-    expenses = conn.execute('SELECT SUM(amount) as total FROM expenses WHERE month = ?', (current_month,)).fetchone()
-    
-    total_assets = assets['total'] if assets['total'] else 0
-    total_liabilities = liabilities['total'] if liabilities['total'] else 0
-    total_expenses = expenses['total'] if expenses['total'] else 0
+    totals = month_totals(conn, current_month)
+    total_assets = totals['assets']
+    total_liabilities = totals['liabilities']
+    total_expenses = totals['expenses']
     
     # Calculate scores
     net_worth = total_assets - total_liabilities
@@ -2237,11 +3108,136 @@ def financial_health():
         }
     })
 
+# Batched reads
+# Sub-requests run in-process against the request's pooled connection inside
+# one read transaction, so every section comes from the same snapshot
+MAX_BATCH_REQUESTS = 50
+# The dashboard is itself a batch; the event stream never ends
+UNBATCHABLE_ENDPOINTS = {'dashboard', 'event_stream'}
+DASHBOARD_TREND_MONTHS = 6
+TEMPLATE_KINDS = ('expense', 'income', 'asset', 'liability')
+
+def dispatch_read(path):
+    """Run one GET sub-request through the normal view stack; returns (status, body)"""
+    headers = {}
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+    with app.test_request_context(path, method='GET', headers=headers):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            return 500, {'error': str(e)}
+        try:
+            # Never iterate a stream here; closing it releases what it holds
+            if response.status_code < 400 and not response.is_json:
+                return 400, {'error': f'{path} does not return JSON and cannot be batched'}
+            return response.status_code, response.get_json(silent=True)
+        finally:
+            response.close()
+
+def read_snapshot(paths):
+    """Dispatch GET sub-requests on one connection and one read transaction"""
+    conn = get_db_connection()
+    conn.execute('BEGIN')
+    try:
+        # The first read pins the snapshot; the counters read here are the
+        # ones every sub-request's cache and ETag lookups then see
+        g.pop('data_versions', None)
+        data_versions(())
+        return [dispatch_read(path) for path in paths]
+    finally:
+        conn.rollback()
+
+def recent_months(month, count):
+    """`count` months ending with `month` (YYYY-MM), oldest first"""
+    year, number = int(month[:4]), int(month[5:7])
+    months = []
+    for _ in range(count):
+        months.append(f"{year:04d}-{number:02d}")
+        year, number = (year - 1, 12) if number == 1 else (year, number - 1)
+    return months[::-1]
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """Run several GET requests in one round trip
+
+    Body: {"requests": ["/api/networth/2024-01", {"path": "/api/income?limit=10"}]}
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_REQUESTS:
+        return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests per batch'}), 400
+
+    paths = []
+    for item in items:
+        path = item.get('path') if isinstance(item, dict) else item
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return jsonify({'error': f'Invalid request path: {path!r}'}), 400
+        try:
+            endpoint, _ = app.url_map.bind('').match(path.split('?')[0], method='GET')
+        except HTTPException:
+            endpoint = None  # answered by the sub-request, e.g. with a 404
+        if endpoint in UNBATCHABLE_ENDPOINTS:
+            return jsonify({'error': f'{path} cannot be batched'}), 400
+        paths.append(path)
+
+    results = read_snapshot(paths)
+    return jsonify({
+        'responses': [
+            {'path': path, 'status': status, 'body': body}
+            for path, (status, body) in zip(paths, results)
+        ]
+    })
+
+@app.route('/api/dashboard', methods=['GET'])
+@etagged(*REPORT_TABLES, *(f'{kind}_templates' for kind in TEMPLATE_KINDS))
+def dashboard():
+    """Everything the dashboard and the template forms load, from one snapshot"""
+    month = request.args.get('month', datetime.now().strftime('%Y-%m'))
+    try:
+        datetime.strptime(month, '%Y-%m')
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM'}), 400
+
+    sections = {
+        'networth': f'/api/networth/{month}',
+        'expenses_total': f'/api/expenses/total/{month}',
+        'expenses_by_category': f'/api/expenses/category/{month}',
+        'financial_health': '/api/financial-health'
+    }
+    for kind in TEMPLATE_KINDS:
+        sections[f'{kind}_templates'] = f'/api/templates/{kind}'
+        sections[f'{kind}_categories'] = f'/api/templates/{kind}/categories'
+    trend_months = recent_months(month, DASHBOARD_TREND_MONTHS)
+    trend_paths = [f'/api/networth/{m}' for m in trend_months]
+
+    results = read_snapshot(list(sections.values()) + trend_paths)
+    payload = {'month': month}
+    errors = {}
+    for name, (status, body) in zip(sections, results):
+        payload[name] = body
+        if status != 200:
+            errors[name] = status
+    payload['networth_trend'] = [
+        {'month': m, 'net_worth': (body or {}).get('net_worth', 0)}
+        for m, (status, body) in zip(trend_months, results[len(sections):])
+    ]
+    if errors:
+        payload['errors'] = errors
+    return jsonify(payload)
+
 if __name__ == '__main__':
+    # Pre-forked multi-worker server instead of the development server
+    if '--production' in sys.argv or os.environ.get('FINANCE_SERVER_MODE') == 'production':
+        import serve
+        sys.exit(serve.main([arg for arg in sys.argv[1:] if arg != '--production']))
+    
     print("Personal Finance Tracker - Simple Backend Starting...")
     print("=" * 50)
     print("Backend URL: http://localhost:5000")
-    print("Database: SQLite (finance_simple.db)")
+    print(f"Database: SQLite (finance_simple.db, {DB_STORAGE_PROFILE} storage profile)")
     print("Environment: Development")
     print("-" * 50)
     # Initialize database
@@ -2,6 +2,7 @@
 """
 Start the Complete Personal Finance Tracker with Admin Panel
 This launches the backend and opens both user and admin interfaces
+Run with --production to serve the API with multiple worker processes
 """
 
 import subprocess
@@ -21,7 +22,8 @@ def main():
     # Start the backend server
     print("🐍 Starting enhanced backend server...")
     backend_process = subprocess.Popen([
-        sys.executable, 'simple_backend.py'
+        # --production: pre-forked worker processes (serve.py) instead of the debug server
+        sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
     ], cwd=Path(__file__).parent)
     
     # Wait for backend to start
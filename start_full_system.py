@@ -3,6 +3,7 @@
 Start the Complete Personal Finance System
 - User Dashboard (View Only) with Rich Charts
 - Admin Panel with Login, Edit, Delete functionality
+Run with --production to serve the API with multiple worker processes
 """
 
 import subprocess
@@ -22,7 +23,8 @@ def main():
     # Start the backend server
     print("🐍 Starting enhanced backend server...")
     backend_process = subprocess.Popen([
-        sys.executable, 'simple_backend.py'
+        # --production: pre-forked worker processes (serve.py) instead of the debug server
+        sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
     ], cwd=Path(__file__).parent)
     
     # Wait for backend to start
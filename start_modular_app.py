@@ -2,6 +2,7 @@
 """
 Professional Finance Manager - Modular Version Launcher
 Starts the backend server and opens the modular frontend
+Run with --production to serve the API with multiple worker processes
 """
 
 import subprocess
@@ -47,7 +48,8 @@ def main():
         # Start the Flask backend server
         print("Starting backend server...")
         backend_process = subprocess.Popen([
-            sys.executable, 'simple_backend.py'
+            # --production: pre-forked worker processes (serve.py) instead of the debug server
+            sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
         ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         
         # Wait a moment for the server to start
@@ -2,6 +2,7 @@
 """
 🚀 Professional Personal Finance Application
 Complete system with intelligent features, current date handling, and loan calculator
+Run with --production to serve the API with multiple worker processes
 """
 
 import subprocess
@@ -29,7 +30,8 @@ def main():
     # Start the enhanced backend server
     print("🐍 Starting professional backend with AI features...")
     backend_process = subprocess.Popen([
-        sys.executable, 'simple_backend.py'
+        # --production: pre-forked worker processes (serve.py) instead of the debug server
+        sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
     ], cwd=Path(__file__).parent)
     
     # Wait for backend to start
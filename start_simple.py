@@ -2,9 +2,12 @@
 """
 Simple startup script for Personal Finance Tracker
 This script starts only the backend server for testing
+Run with --production (or FINANCE_SERVER_MODE=production) to serve the API
+with multiple worker processes
 """
 
 import os
+import subprocess
 import sys
 from pathlib import Path
 
@@ -12,41 +15,28 @@ def start_backend():
     """Start the Flask backend server"""
     print("🚀 Starting Personal Finance Tracker Backend")
     print("=" * 50)
-    
-    # Change to backend directory
-    backend_dir = Path(__file__).parent / 'backend'
-    os.chdir(backend_dir)
-    
-    # Add backend to Python path
-    sys.path.insert(0, str(backend_dir))
-    
+
+    production = '--production' in sys.argv[1:] or os.environ.get('FINANCE_SERVER_MODE') == 'production'
+    print("📍 Backend URL: http://localhost:5000")
+    print(f"🔧 Environment: {'Production (pre-forked workers)' if production else 'Development'}")
+    print("💾 Database: SQLite (finance_simple.db, auto-created)")
+    print("Press Ctrl+C to stop the server")
+    print("-" * 50)
+
+    # The backend lives in simple_backend.py (the old backend/ package is gone);
+    # it creates and migrates the database itself
+    backend_process = subprocess.Popen([
+        # --production: pre-forked worker processes (serve.py) instead of the debug server
+        sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
+    ], cwd=Path(__file__).parent)
+
     try:
-        # Import and run the Flask app
-        from app import app, db
-        
-        print("📍 Backend URL: http://localhost:5000")
-        print("🔧 Environment: Development")
-        print("💾 Database: SQLite (auto-created)")
-        print("-" * 50)
-        
-        # Create database tables
-        with app.app_context():
-            db.create_all()
-            print("✅ Database tables created/verified")
-        
-        print("🚀 Starting Flask server...")
-        print("Press Ctrl+C to stop the server")
-        print("-" * 50)
-        
-        # Run the Flask development server
-        app.run(debug=True, host='0.0.0.0', port=5000)
-        
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        print("Please install backend dependencies:")
-        print("cd backend && pip install -r requirements.txt")
-    except Exception as e:
-        print(f"❌ Error starting backend: {e}")
+        backend_process.wait()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down...")
+        backend_process.terminate()
+        backend_process.wait()
+        print("✅ Backend server stopped")
 
 if __name__ == '__main__':
     start_backend()
@@ -2,6 +2,7 @@
 """
 Start the working Personal Finance Tracker
 This launches the simple backend and opens the frontend in your browser
+Run with --production to serve the API with multiple worker processes
 """
 
 import subprocess
@@ -20,7 +21,8 @@ def main():
     # Start the backend server
     print("🐍 Starting backend server...")
     backend_process = subprocess.Popen([
-        sys.executable, 'simple_backend.py'
+        # --production: pre-forked worker processes (serve.py) instead of the debug server
+        sys.executable, 'simple_backend.py', *[arg for arg in sys.argv[1:] if arg == '--production']
     ], cwd=Path(__file__).parent)
     
     # Wait for backend to start
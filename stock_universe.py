@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Stock universe for the Personal Finance Tracker
+The stocks behind /api/ai/stock-analysis and the screener live in a JSON
+data file (STOCK_UNIVERSE_JSON, default stock_universe.json next to this
+module). It is loaded once into columns: NumPy arrays for the numeric
+fields, integer codes for sector, recommendation and risk, and for every
+sortable field its ascending and descending sort orders. A screener query
+is then one boolean mask over the columns and one pass over a precomputed
+order, with no per-request sorting. The file is reloaded when it changes.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+STOCK_UNIVERSE_JSON = os.environ.get(
+    'STOCK_UNIVERSE_JSON', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stock_universe.json')
+)
+
+NUMERIC_FIELDS = (
+    'current_price', 'pe_ratio', 'market_cap', 'dividend_yield', 'debt_to_equity', 'roe',
+    'revenue_growth', 'profit_margin', 'target_price'
+)
+CATEGORY_FIELDS = ('sector', 'recommendation', 'risk')
+SORT_FIELDS = NUMERIC_FIELDS + ('upside',)
+
+# Screener range parameters: query parameter -> (column, lower or upper bound)
+RANGE_FILTERS = {
+    'price_min': ('current_price', 'min'), 'price_max': ('current_price', 'max'),
+    'pe_min': ('pe_ratio', 'min'), 'pe_max': ('pe_ratio', 'max'),
+    'dividend_min': ('dividend_yield', 'min'), 'dividend_max': ('dividend_yield', 'max'),
+    'roe_min': ('roe', 'min'), 'roe_max': ('roe', 'max'),
+    'de_min': ('debt_to_equity', 'min'), 'de_max': ('debt_to_equity', 'max'),
+    'market_cap_min': ('market_cap', 'min'), 'market_cap_max': ('market_cap', 'max'),
+    'growth_min': ('revenue_growth', 'min'), 'margin_min': ('profit_margin', 'min'),
+    'upside_min': ('upside', 'min')
+}
+
+RECOMMENDATION_GROUPS = (
+    ('strong_buy', 'Strong Buy'), ('buy', 'Buy'), ('hold', 'Hold'),
+    ('speculative', 'Speculative Buy'), ('avoid', 'Avoid')
+)
+ANALYSIS_PRICE_LIMIT = 1000
+TOP_PICKS = 5
+
+
+class StockUniverse:
+    """Columnar, pre-sorted view of a list of stock records"""
+
+    def __init__(self, stocks, version=None):
+        self.records = stocks
+        self.version = version
+        self.symbols = np.array([s['symbol'] for s in stocks], dtype=object)
+        self.columns = {field: np.array([float(s[field]) for s in stocks]) for field in NUMERIC_FIELDS}
+        # A non-positive P/E means losses: it has no meaningful rank
+        pe = self.columns['pe_ratio']
+        self.columns['pe_ratio'] = np.where(pe > 0, pe, np.nan)
+        price = self.columns['current_price']
+        self.columns['upside'] = (self.columns['target_price'] - price) / price * 100
+
+        self.categories = {}
+        self.codes = {}
+        for field in CATEGORY_FIELDS:
+            labels, codes = np.unique(np.array([s[field] for s in stocks], dtype=str), return_inverse=True)
+            self.categories[field] = {label: code for code, label in enumerate(labels.tolist())}
+            self.codes[field] = codes
+
+        # Stable orders; stocks without a value (NaN) sort last either way
+        self.orders = {}
+        for field in SORT_FIELDS:
+            values = self.columns[field]
+            self.orders[(field, 'asc')] = np.argsort(values, kind='stable')
+            self.orders[(field, 'desc')] = np.argsort(-values, kind='stable')
+        self.analysis = self._analysis()
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        stocks = data['stocks'] if isinstance(data, dict) else data
+        missing = [f for f in NUMERIC_FIELDS + CATEGORY_FIELDS + ('symbol', 'name') if any(f not in s for s in stocks)]
+        if missing:
+            raise ValueError(f'{path}: stocks are missing {", ".join(missing)}')
+        stat = os.stat(path)
+        return cls(stocks, version=(stat.st_mtime_ns, stat.st_size))
+
+    def _top(self, field, direction, mask, count):
+        order = self.orders[(field, direction)]
+        return order[mask[order]][:count]
+
+    def _analysis(self):
+        """The /api/ai/stock-analysis payload, built once per load"""
+        under = self.columns['current_price'] < ANALYSIS_PRICE_LIMIT
+        raw_pe = np.array([float(s['pe_ratio']) for s in self.records])
+        roe = self.columns['roe']
+        pick = lambda rows: [self.records[i] for i in rows]
+        by_recommendation = {}
+        for key, label in RECOMMENDATION_GROUPS:
+            code = self.categories['recommendation'].get(label)
+            by_recommendation[key] = pick(np.flatnonzero(self.codes['recommendation'] == code)) if code is not None else []
+
+        # Averages summed in record order, as a plain loop would
+        positive_pe = raw_pe[under & (raw_pe > 0)].tolist()
+        positive_roe = roe[under & (roe > 0)].tolist()
+        dividends = self.columns['dividend_yield'][under].tolist()
+        return {
+            'total_stocks': int(under.sum()),
+            'all_stocks': pick(np.flatnonzero(under)),
+            'by_recommendation': by_recommendation,
+            'top_picks': {
+                'best_pe_ratio': pick(self._top('pe_ratio', 'asc', under & (raw_pe > 0), TOP_PICKS)),
+                'best_dividend_yield': pick(self._top('dividend_yield', 'desc', under, TOP_PICKS)),
+                'best_roe': pick(self._top('roe', 'desc', under & (roe > 0), TOP_PICKS))
+            },
+            'analysis_summary': {
+                'avg_pe_ratio': sum(positive_pe) / len(positive_pe) if positive_pe else 0,
+                'avg_dividend_yield': sum(dividends) / len(dividends) if dividends else 0,
+                'avg_roe': sum(positive_roe) / len(positive_roe) if positive_roe else 0
+            }
+        }
+
+    def screen(self, bounds=None, sectors=None, recommendations=None, risks=None, symbols=None,
+               sort='market_cap', direction='desc', limit=20, offset=0):
+        """Indexes of the matching stocks in sort order, and the total match count
+
+        bounds  {column: (low, high)}, either end None for unbounded
+        """
+        if (sort, direction) not in self.orders:
+            raise ValueError(f'sort must be one of {", ".join(SORT_FIELDS)} and order asc or desc')
+        mask = np.ones(len(self), dtype=bool)
+        for field, (low, high) in (bounds or {}).items():
+            values = self.columns[field]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        for field, wanted in (('sector', sectors), ('recommendation', recommendations), ('risk', risks)):
+            if wanted:
+                codes = [self.categories[field][w] for w in wanted if w in self.categories[field]]
+                mask &= np.isin(self.codes[field], codes)
+        if symbols:
+            mask &= np.isin(self.symbols, list(symbols))
+        order = self.orders[(sort, direction)]
+        matches = order[mask[order]]
+        return matches[offset:offset + limit], len(matches)
+
+
+_universe = None
+_universe_lock = threading.Lock()
+
+
+def get_universe(path=None):
+    """The loaded universe, re-read when the data file changed"""
+    global _universe
+    path = path or STOCK_UNIVERSE_JSON
+    stat = os.stat(path)
+    with _universe_lock:
+        if _universe is None or _universe[0] != path or _universe[1].version != (stat.st_mtime_ns, stat.st_size):
+            _universe = (path, StockUniverse.from_json(path))
+        return _universe[1]
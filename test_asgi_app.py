@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+ASGI Variant Test
+Drives asgi_app directly with ASGI messages: lifespan, responses identical
+to the Flask test client, writes, conditional GETs, the 503 returned
+once the executors are saturated and the /api/events stream served on the
+event loop
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+
+import asgi_app
+import events
+import simple_backend
+
+
+async def request(app, method, path, body=b'', headers=()):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+        'headers': [(b'content-type', b'application/json'), *headers], 'http_version': '1.1',
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000), 'scheme': 'http', 'root_path': ''
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+
+async def lifespan(app, event):
+    messages = [{'type': f'lifespan.{event}'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    task = asyncio.ensure_future(app({'type': 'lifespan'}, receive, send))
+    while not sent:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    return sent[0]['type']
+
+
+def test_same_responses_as_flask(database):
+    # The lifespan startup migrates the database
+    client = simple_backend.app.test_client()
+    app = asgi_app.FinanceASGI(simple_backend.app, read_threads=2)
+
+    async def scenario():
+        assert await lifespan(app, 'startup') == 'lifespan.startup.complete'
+        expense = json.dumps({'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+        status, _, _ = await request(app, 'POST', '/api/expenses', expense.encode())
+        assert status == 201
+
+        for path in ('/api/expenses?limit=10', '/api/networth/2024-01', '/api/templates/expense'):
+            status, headers, body = await request(app, 'GET', path)
+            expected = client.get(path)
+            assert status == 200 and json.loads(body) == expected.get_json()
+            assert headers[b'etag'].decode() == expected.headers['ETag']
+            status, _, body = await request(app, 'GET', path, headers=[(b'if-none-match', headers[b'etag'])])
+            assert status == 304 and body == b''
+
+        # Many concurrent dashboards share two read threads
+        results = await asyncio.gather(*[request(app, 'GET', '/api/expenses/total/2024-01') for _ in range(50)])
+        assert {status for status, _, _ in results} == {200}
+        assert await lifespan(app, 'shutdown') == 'lifespan.shutdown.complete'
+
+    asyncio.run(scenario())
+
+
+def test_overload_returns_503(client):
+    app = asgi_app.FinanceASGI(simple_backend.app, read_threads=1, max_pending=2)
+
+    async def scenario():
+        results = await asyncio.gather(*[request(app, 'GET', '/api/expenses') for _ in range(6)])
+        statuses = sorted(status for status, _, _ in results)
+        assert statuses == [200, 200, 503, 503, 503, 503], statuses
+        busy = next(headers for status, headers, _ in results if status == 503)
+        assert busy[b'retry-after'] == b'1'
+        app.stop()
+
+    asyncio.run(scenario())
+
+
+def test_event_stream_on_the_loop(client):
+    events.reset_after_fork()
+    app = asgi_app.FinanceASGI(simple_backend.app, read_threads=1)
+
+    async def scenario():
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/events', 'query_string': b'', 'headers': []}
+        disconnect = asyncio.Event()
+        sent = []
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        stream = asyncio.ensure_future(app(scope, receive, send))
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        assert sent[0]['status'] == 200 and dict(sent[0]['headers'])[b'content-type'].startswith(b'text/event-stream')
+        assert events.get_broker().stats()['subscribers'] == 1
+
+        # The write runs on the write thread; its event wakes the stream's coroutine
+        expense = json.dumps({'category': 'Food', 'description': 'Tea', 'amount': 20, 'date': '2024-03-02'})
+        status, _, _ = await request(app, 'POST', '/api/expenses', expense.encode())
+        assert status == 201
+        for _ in range(100):
+            if len(sent) > 2:
+                break
+            await asyncio.sleep(0.01)
+        assert b'event: change' in sent[2]['body'] and sent[2]['more_body']
+
+        disconnect.set()
+        await asyncio.wait_for(stream, 1)
+        assert events.get_broker().stats()['subscribers'] == 0
+        app.stop()
+
+    asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ ASGI variant failure")
+        sys.exit(1)
+    print("✅ ASGI variant serves the Flask routes")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Batched Read Test
+Checks /api/batch and /api/dashboard return the same data as the individual
+endpoints and that all sections come from one database snapshot
+"""
+
+import sqlite3
+import sys
+
+import pytest
+
+import events
+import simple_backend
+
+
+@pytest.fixture
+def client(client):
+    """One expense, asset and liability in January 2024"""
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+    client.post('/api/assets', json={'name': 'Savings', 'category': 'Cash', 'value': 50000, 'month': '2024-01'})
+    client.post('/api/liabilities', json={'name': 'Car Loan', 'category': 'Car Loan', 'amount': 20000, 'month': '2024-01'})
+    return client
+
+
+def test_batch_matches_individual_requests(client):
+    paths = ['/api/networth/2024-01', '/api/expenses/total/2024-01', '/api/templates/asset/categories']
+    result = client.post('/api/batch', json={'requests': paths}).get_json()
+    for path, entry in zip(paths, result['responses']):
+        assert entry['status'] == 200, entry
+        assert entry['body'] == client.get(path).get_json(), path
+
+    missing = client.post('/api/batch', json={'requests': ['/api/no-such-route']}).get_json()
+    assert missing['responses'][0]['status'] == 404
+    assert client.post('/api/batch', json={'requests': ['/api/dashboard']}).status_code == 400
+    nested = client.post('/api/batch', json={'requests': ['/api/batch']}).get_json()
+    assert nested['responses'][0]['status'] == 405
+    assert client.post('/api/batch', json={'requests': []}).status_code == 400
+
+
+def test_streams_are_not_batched(client):
+    events.reset_after_fork()
+    for path in ('/api/events', '/api/events?last_event_id=3'):
+        assert client.post('/api/batch', json={'requests': [path]}).status_code == 400, path
+    assert events.get_broker().stats() == {'subscribers': 0, 'published': 0, 'history': 0, 'overflows': 0, 'polling': False}
+
+    # Dispatched anyway, the stream is refused and closed, which unsubscribes it
+    with simple_backend.app.test_request_context('/api/batch', method='POST'):
+        status, body = simple_backend.dispatch_read('/api/events')
+    assert status == 400 and 'cannot be batched' in body['error']
+    assert events.get_broker().stats()['subscribers'] == 0
+
+
+def test_dashboard_sections(client):
+    data = client.get('/api/dashboard?month=2024-01').get_json()
+    assert data['networth']['net_worth'] == 30000
+    assert data['expenses_total']['total'] == 250
+    assert data['expenses_by_category'] == [{'category': 'Food', 'total': 250}]
+    assert data['expense_categories'] == client.get('/api/templates/expense/categories').get_json()
+    assert data['expense_templates'] == client.get('/api/templates/expense').get_json()
+    assert [point['month'] for point in data['networth_trend']][-2:] == ['2023-12', '2024-01']
+    assert 'errors' not in data
+
+
+def test_sections_share_one_snapshot(client):
+    dispatch_read = simple_backend.dispatch_read
+    calls = []
+
+    def dispatch_with_concurrent_write(path):
+        # Another writer commits between the first and second sub-request
+        if calls:
+            writer = sqlite3.connect(simple_backend.DB_PATH)
+            writer.execute("UPDATE assets SET value = 90000")
+            writer.commit()
+            writer.close()
+        calls.append(path)
+        return dispatch_read(path)
+
+    simple_backend.dispatch_read = dispatch_with_concurrent_write
+    try:
+        result = client.post('/api/batch', json={'requests': ['/api/networth/2024-01'] * 2}).get_json()
+    finally:
+        simple_backend.dispatch_read = dispatch_read
+    first, second = (entry['body'] for entry in result['responses'])
+    assert first == second and first['total_assets'] == 50000
+    assert client.get('/api/networth/2024-01').get_json()['total_assets'] == 90000
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Batched read failure")
+        sys.exit(1)
+    print("✅ Batched reads behave correctly")
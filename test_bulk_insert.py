@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Bulk Insert Test
+Checks one-pass validation with per-row errors, the reject and skip modes,
+JSON array and NDJSON bodies, and that bulk rows reach the rollups like
+rows added one at a time
+"""
+
+import io
+import json
+import sys
+
+import pytest
+
+import simple_backend
+from bulk_insert import parse_ndjson, validate_rows
+from rollups import check_rollups
+
+
+def expense(day, amount, category='Food'):
+    return {'category': category, 'description': f'{category} on {day}', 'amount': amount, 'date': day}
+
+
+def test_validation_reports_every_bad_row():
+    rows = [
+        expense('2024-01-05', 100),
+        expense('2024-02-30', 100),
+        {'category': 'Food', 'amount': 'lots', 'date': '2024-01-05'},
+        {'category': '  ', 'amount': 5, 'date': '2024-01-05'},
+        {'category': 'Food', 'amount': True, 'date': '2024-01-05'},
+        ['not', 'an', 'object'],
+        {'category': 'Food', 'amount': '1,250.50', 'date': '2024-01-05'}
+    ]
+    values, errors = validate_rows('expenses', rows)
+    assert [e['row'] for e in errors] == [1, 2, 3, 4, 5]
+    assert 'date' in errors[0]['error'] and 'amount' in errors[1]['error'] and 'category' in errors[2]['error']
+    assert values[0][:6] == (1, 'Food', 'Food on 2024-01-05', 100.0, '2024-01-05', '2024-01')
+    assert values[1][3] == 1250.5 and values[1][2] == ''
+
+    _, errors = validate_rows('assets', [{'name': 'Gold', 'category': 'Metal', 'value': 10, 'month': '2024-13'}])
+    assert errors == [{'row': 0, 'error': 'month must be a YYYY-MM month'}]
+    rows = parse_ndjson(io.BytesIO(b'{"a": 1}\n\n{oops\n{"b": 2}'))
+    assert rows[0] == {'a': 1} and isinstance(rows[1], ValueError) and rows[2] == {'b': 2}
+
+
+def test_bulk_json_array(client):
+    rows = [expense(f'2024-{month:02d}-{day:02d}', month * 10 + day) for month in (3, 1, 2) for day in (9, 1)]
+    response = client.post('/api/expenses/bulk', json=rows)
+    assert response.status_code == 201
+    result = response.get_json()
+    assert result['inserted'] == 6 and result['invalid'] == 0
+    assert result['last_id'] - result['first_id'] == 5
+
+    listed = client.get('/api/expenses').get_json()
+    assert sorted(e['amount'] for e in listed) == sorted(r['amount'] for r in rows)
+    assert {e['id'] for e in listed} == set(range(result['first_id'], result['last_id'] + 1))
+    assert client.get('/api/expenses/total/2024-01').get_json()['total'] == 11 + 19
+    conn = simple_backend.get_db_connection()
+    assert check_rollups(conn) == []
+    conn.close()
+
+
+def test_reject_and_skip(client):
+    rows = [expense('2024-01-01', 10), expense('2024-01-02', -5), {'category': 'Food', 'date': '2024-01-03'}]
+    response = client.post('/api/expenses/bulk', json=rows)
+    assert response.status_code == 400
+    result = response.get_json()
+    assert result['invalid'] == 1 and result['errors'][0]['row'] == 2 and 'nothing was inserted' in result['error']
+    assert client.get('/api/expenses').get_json() == []
+
+    response = client.post('/api/expenses/bulk?on_error=skip', json=rows)
+    assert response.status_code == 201
+    assert response.get_json()['inserted'] == 2 and response.get_json()['errors'][0]['row'] == 2
+    assert len(client.get('/api/expenses').get_json()) == 2
+
+    assert client.post('/api/expenses/bulk', json={'rows': rows}).status_code == 400
+    assert client.post('/api/expenses/bulk', json=[]).status_code == 400
+    assert client.post('/api/expenses/bulk?on_error=maybe', json=rows).status_code == 400
+    assert client.post('/api/templates/bulk', json=rows).status_code == 404
+
+
+def test_bulk_ndjson_and_other_tables(client):
+    lines = [json.dumps({'source': 'Salary', 'category': 'Job', 'amount': 50000, 'date': f'2024-{m:02d}-01',
+                         'is_recurring': 1}) for m in range(1, 13)]
+    response = client.post('/api/income/bulk', data='\n'.join(lines) + '\n', content_type='application/x-ndjson')
+    assert response.status_code == 201 and response.get_json()['inserted'] == 12
+    assert len(client.get('/api/income').get_json()) == 12
+
+    response = client.post('/api/assets/bulk', data='{"name": "FD"}\nnot json\n', content_type='application/x-ndjson')
+    assert response.status_code == 400
+    assert [e['row'] for e in response.get_json()['errors']] == [0, 1]
+
+    assert client.post('/api/assets/bulk', json=[
+        {'name': 'FD', 'category': 'Deposit', 'value': 200000, 'month': '2024-06'}
+    ]).status_code == 201
+    assert client.post('/api/liabilities/bulk', json=[
+        {'name': 'Car loan', 'category': 'Loan', 'amount': 150000, 'month': '2024-06'}
+    ]).status_code == 201
+    assert client.get('/api/networth/2024-06').get_json()['net_worth'] == 50000
+
+    limit = simple_backend.MAX_BULK_ROWS
+    simple_backend.MAX_BULK_ROWS = 2
+    try:
+        response = client.post('/api/expenses/bulk', json=[expense('2024-01-01', 1)] * 3)
+    finally:
+        simple_backend.MAX_BULK_ROWS = limit
+    assert response.status_code == 413
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Bulk insert failure")
+        sys.exit(1)
+    print("✅ Bulk inserts validate and insert correctly")
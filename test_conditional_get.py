@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Conditional GET Test
+Checks that read endpoints answer a matching If-None-Match with 304 and
+that a write to a table changes the ETag of the endpoints reading it
+"""
+
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def client(client):
+    """One expense in January 2024"""
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+    return client
+
+
+def revalidate(client, path, etag):
+    return client.get(path, headers={'If-None-Match': etag})
+
+
+def test_unchanged_data_is_not_modified(client):
+    for path in ('/api/expenses', '/api/reports/monthly?month=2024-01', '/api/ai/seasonal-stocks'):
+        first = client.get(path)
+        assert first.status_code == 200 and first.headers.get('ETag'), path
+        second = revalidate(client, path, first.headers['ETag'])
+        assert second.status_code == 304, path
+        assert second.data == b''
+        assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_writes_change_only_dependent_etags(client):
+    expenses = client.get('/api/expenses').headers['ETag']
+    income = client.get('/api/income').headers['ETag']
+
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Dinner', 'amount': 400, 'date': '2024-01-20'})
+    assert revalidate(client, '/api/expenses', expenses).status_code == 200
+    assert revalidate(client, '/api/income', income).status_code == 304
+
+
+def test_etag_depends_on_query_string(client):
+    january = client.get('/api/reports/monthly?month=2024-01').headers['ETag']
+    assert revalidate(client, '/api/reports/monthly?month=2024-02', january).status_code == 200
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Conditional GET failure")
+        sys.exit(1)
+    print("✅ Conditional GETs behave correctly")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+CSV Import Test
+Checks bank profiles and header search, amount and date parsing, duplicate
+detection across re-imports and overlapping statements (while identical
+same-day purchases are kept), dry runs, the content hash backfill and the
+background import jobs behind /api/import
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+import simple_backend
+from bulk_insert import content_hash
+from csv_import import import_csv, parse_amount, split_amount
+from migrations import apply_migrations
+from rollups import check_rollups
+
+HDFC_STATEMENT = '''﻿HDFC BANK Ltd.,,,,,,
+Account No :,50100123456789,,,,,
+Statement From : 01/01/24 To : 31/01/24,,,,,,
+Date,Narration,Chq./Ref.No.,Value Dt,Withdrawal Amt.,Deposit Amt.,Closing Balance
+02/01/24,UPI-SWIGGY-FOOD ORDER,0000401234,02/01/24,450.00,,"49,550.00"
+02/01/24,UPI-SWIGGY-FOOD ORDER,0000401235,02/01/24,450.00,,"49,100.00"
+05/01/24,SALARY JAN 2024,,05/01/24,,"85,000.00","1,34,100.00"
+07/01/24,NEFT-RENT JANUARY,N007240001,07/01/24,"18,000.00",,"1,16,100.00"
+31/02/24,BAD DATE ROW,,31/02/24,100.00,,"1,16,000.00"
+12/01/24,ATM WDL,,12/01/24,abc,,"1,16,000.00"
+15/01/24,POS AMAZON  RETAIL,,15/01/24,"1,299.00",,"1,14,801.00"
+'''
+
+# Overlaps the HDFC statement from the 7th, spelled and cased differently
+GENERIC_STATEMENT = '''date,description,amount,category
+2024-01-07,NEFT-Rent January,18000,Housing
+2024-01-15,pos amazon retail,1299.00,Shopping
+2024-01-20,Electricity bill,2100.50,Utilities
+2024-01-21,Refund,-300,Shopping
+'''
+
+
+def statement(text):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def expense_rows(conn):
+    return conn.execute('SELECT date, description, amount, category FROM expenses ORDER BY date, id').fetchall()
+
+
+def test_parse_amount():
+    assert parse_amount('1,25,000.50') == 125000.5
+    assert parse_amount('₹ 99') == 99 and parse_amount('Rs. 12') == 12
+    assert parse_amount('(45.10)') == -45.1
+    assert parse_amount('300 Dr') == -300 and parse_amount('300Cr') == 300
+    assert parse_amount('') is None and parse_amount(' - ') is None
+    assert split_amount('1,250.00 Dr') == (1250.0, 'dr') and split_amount('(5)') == (-5.0, None)
+
+
+def test_hdfc_import_and_reimport(client):
+    path = statement(HDFC_STATEMENT)
+    conn = simple_backend.get_db_connection()
+    stats = import_csv(conn, path, 'hdfc', batch_rows=2)
+    assert stats['rows_read'] == 7 and stats['bytes_read'] == stats['total_bytes']
+    # Both Swiggy orders are kept; the salary credit is skipped
+    assert (stats['inserted'], stats['duplicates'], stats['skipped'], stats['invalid']) == (4, 0, 1, 2)
+    assert [e['line'] for e in stats['errors']] == [9, 10]
+    assert 'date' in stats['errors'][0]['error'] and 'amount' in stats['errors'][1]['error']
+
+    rows = [tuple(row) for row in expense_rows(conn)]
+    assert rows[0] == ('2024-01-02', 'UPI-SWIGGY-FOOD ORDER', 450.0, 'Uncategorized')
+    assert rows[0] == rows[1] and rows[2][2] == 18000.0 and rows[3][1] == 'POS AMAZON RETAIL'
+    assert conn.execute("SELECT COUNT(*) FROM expenses WHERE month = '2024-01'").fetchone()[0] == 4
+
+    again = import_csv(conn, path, 'hdfc')
+    assert again['inserted'] == 0 and again['duplicates'] == 4
+    assert check_rollups(conn) == []
+    conn.close()
+    os.remove(path)
+
+
+def test_overlapping_statement(client):
+    conn = simple_backend.get_db_connection()
+    hdfc, generic = statement(HDFC_STATEMENT), statement(GENERIC_STATEMENT)
+    import_csv(conn, hdfc, 'hdfc')
+
+    preview = import_csv(conn, generic, 'generic', dry_run=True)
+    assert (preview['inserted'], preview['duplicates'], preview['skipped']) == (1, 2, 1)
+    assert len(expense_rows(conn)) == 4
+
+    stats = import_csv(conn, generic, 'generic')
+    assert stats['inserted'] == 1 and stats['duplicates'] == 2
+    assert tuple(expense_rows(conn)[-1]) == ('2024-01-20', 'Electricity bill', 2100.5, 'Utilities')
+
+    # A third identical order on the 2nd is new: only two were stored
+    more = statement(HDFC_STATEMENT.replace('05/01/24,SALARY', '02/01/24,UPI-SWIGGY-FOOD ORDER,,02/01/24,450.00,,\n05/01/24,SALARY'))
+    assert import_csv(conn, more, 'hdfc')['inserted'] == 1
+    assert import_csv(conn, more, 'hdfc')['inserted'] == 0
+    conn.close()
+    for path in (hdfc, generic, more):
+        os.remove(path)
+
+
+def test_dr_cr_overrides_profile_sign(client):
+    conn = simple_backend.get_db_connection()
+    # Generic: positive amounts are expenses, unless marked Cr
+    generic = statement('date,description,amount\n2024-02-01,Rent,"1,250.00 Dr"\n2024-02-02,Refund,300 Cr\n'
+                        '2024-02-03,Groceries,640\n')
+    stats = import_csv(conn, generic, 'generic')
+    assert (stats['inserted'], stats['skipped']) == (2, 1)
+    # Signed: negative amounts are expenses, unless marked Dr
+    signed = statement('date,description,amount\n2024-02-04,Fuel,900 Dr\n2024-02-05,Cashback,-50 Cr\n')
+    stats = import_csv(conn, signed, 'signed')
+    assert (stats['inserted'], stats['skipped']) == (1, 1)
+    assert [row['amount'] for row in expense_rows(conn)] == [1250.0, 640.0, 900.0]
+    conn.close()
+    for path in (generic, signed):
+        os.remove(path)
+
+
+def test_dry_run_writes_nothing(client):
+    conn = simple_backend.get_db_connection()
+    path = statement(HDFC_STATEMENT)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    # One-row batches: in-file duplicates are still counted across batches
+    preview = import_csv(conn, path, 'hdfc', dry_run=True, batch_rows=1)
+    conn.set_trace_callback(None)
+    assert not conn.in_transaction
+    assert not [sql for sql in statements if sql.split()[0].upper() not in ('SELECT', 'WITH')], statements
+
+    stats = import_csv(conn, path, 'hdfc', batch_rows=1)
+    assert (preview['inserted'], preview['duplicates']) == (stats['inserted'], stats['duplicates']) == (4, 0)
+    again = import_csv(conn, path, 'hdfc', dry_run=True, batch_rows=1)
+    assert (again['inserted'], again['duplicates']) == (0, 4)
+    conn.close()
+    os.remove(path)
+
+
+def test_unknown_layout(client):
+    conn = simple_backend.get_db_connection()
+    path = statement(GENERIC_STATEMENT)
+    for profile, message in (('sbi', 'no header row'), ('barclays', 'unknown profile')):
+        try:
+            import_csv(conn, path, profile)
+            assert False, f'{profile} should not import'
+        except ValueError as e:
+            assert message in str(e)
+    conn.close()
+    os.remove(path)
+
+
+def test_content_hash_backfill(client):
+    client.post('/api/expenses', json={'category': 'Food', 'description': ' Lunch  at Cafe', 'amount': 250, 'date': '2024-03-04'})
+    conn = simple_backend.get_db_connection()
+    expected = content_hash(1, '2024-03-04', 250, 'lunch at cafe')
+    assert conn.execute('SELECT content_hash FROM expenses').fetchone()[0] == expected
+
+    conn.execute('UPDATE expenses SET content_hash = NULL')
+    conn.execute('DELETE FROM schema_version WHERE version >= 9')
+    conn.commit()
+    apply_migrations(conn)
+    assert conn.execute('SELECT content_hash FROM expenses').fetchone()[0] == expected
+    assert check_rollups(conn) == []
+    conn.close()
+
+
+def wait_for_job(client, url):
+    for _ in range(200):
+        job = client.get(url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'import job did not finish: {job}')
+
+
+def test_import_endpoints(client):
+    profiles = client.get('/api/import/profiles').get_json()
+    assert {'generic', 'hdfc', 'icici', 'sbi', 'axis'} <= set(profiles)
+
+    response = client.post('/api/import/csv?profile=hdfc', data={'file': (io.BytesIO(HDFC_STATEMENT.encode()), 'jan.csv')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()['url'])
+    assert job['status'] == 'done' and job['percent'] == 100.0 and job['filename'] == 'jan.csv'
+    assert job['inserted'] == 4 and job['invalid'] == 2 and len(job['errors']) == 2
+
+    response = client.post('/api/import/csv?profile=generic', data=GENERIC_STATEMENT, content_type='text/csv')
+    job = wait_for_job(client, response.get_json()['url'])
+    assert (job['inserted'], job['duplicates']) == (1, 2)
+    assert client.get('/api/expenses/total/2024-01').get_json()['total'] == 450 * 2 + 18000 + 1299 + 2100.5
+
+    response = client.post('/api/import/csv?profile=sbi', data=GENERIC_STATEMENT, content_type='text/csv')
+    job = wait_for_job(client, response.get_json()['url'])
+    assert job['status'] == 'failed' and 'no header row' in job['message']
+
+    assert [j['profile'] for j in client.get('/api/import/jobs').get_json()] == ['sbi', 'generic', 'hdfc']
+    assert client.get('/api/import/jobs/99').status_code == 404
+    assert client.post('/api/import/csv?profile=barclays', data=GENERIC_STATEMENT, content_type='text/csv').status_code == 400
+    assert client.post('/api/import/csv', data={}, content_type='multipart/form-data').status_code == 400
+    assert client.post('/api/import/csv', data='', content_type='text/csv').status_code == 400
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ CSV import failure")
+        sys.exit(1)
+    print("✅ CSV imports parse, deduplicate and report progress correctly")
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Change Events Test
+Checks the event broker (bounded queues, resync on overflow, replay after a
+reconnect, cross-process polling) and that successful writes publish their
+table, month, row id and new month totals to /api/events
+"""
+
+import json
+import sys
+
+import pytest
+
+import events
+import simple_backend
+
+
+@pytest.fixture
+def client(client):
+    """A broker without subscribers or history from earlier tests"""
+    events.reset_after_fork()
+    return client
+
+
+def test_slow_client_gets_resync():
+    broker = events.EventBroker(queue_size=3)
+    slow = broker.subscribe()
+    fast = broker.subscribe()
+    for n in range(3):
+        broker.publish('change', {'n': n})
+    assert [e['data']['n'] for e in fast.drain()] == [0, 1, 2]
+    broker.publish('change', {'n': 3})
+    # The slow client's backlog is replaced by one resync, the fast one is unaffected
+    assert [e['event'] for e in slow.drain()] == ['resync']
+    assert [e['data']['n'] for e in fast.drain()] == [3]
+    assert slow.overflows == 1 and broker.stats()['overflows'] == 1
+
+
+def test_reconnect_replays_or_resyncs():
+    broker = events.EventBroker(history=3)
+    seen = [broker.publish('change', {'n': n}) for n in range(2)]
+    resumed = broker.subscribe(seen[0]['id'])
+    assert [e['data']['n'] for e in resumed.get(0)] == [1]
+    assert broker.subscribe(seen[-1]['id']).get(0) == []
+
+    for n in range(2, 6):
+        broker.publish('change', {'n': n})
+    # Event 1 has left the history: replaying would skip events
+    assert [e['event'] for e in broker.subscribe(seen[0]['id']).get(0)] == ['resync']
+    assert [e['event'] for e in broker.subscribe('another-process-7').get(0)] == ['resync']
+
+
+def test_client_limit_and_unsubscribe():
+    broker = events.EventBroker(max_clients=1)
+    first = broker.subscribe()
+    assert broker.subscribe() is None
+    broker.unsubscribe(first)
+    assert broker.subscribe() is not None
+
+
+def test_poll_announces_other_processes():
+    broker = events.EventBroker()
+    listener = broker.subscribe()
+    assert broker.poll({'expenses': 4, 'assets': 2}) == []
+    broker.publish_changes([{'table': 'expenses', 'version': 5, 'month': '2024-01', 'id': 1, 'totals': None}])
+    # Version 5 was published here already; only the assets write is new
+    announced = broker.poll({'expenses': 5, 'assets': 3})
+    assert [(e['data']['table'], e['data']['version']) for e in announced] == [('assets', 3)]
+    assert [e['data']['table'] for e in listener.drain()] == ['expenses', 'assets']
+
+
+def test_writes_publish_changes(client):
+    listener = events.get_broker().subscribe()
+
+    response = client.post('/api/expenses', json={
+        'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'
+    })
+    expense_id = response.get_json()['id']
+    client.post('/api/assets', json={'name': 'Savings', 'category': 'Cash', 'value': 1000, 'month': '2024-01'})
+    [expense, asset] = [e['data'] for e in listener.drain()]
+    assert expense['table'] == 'expenses' and expense['month'] == '2024-01' and expense['id'] == expense_id
+    assert expense['user_id'] == 1
+    assert expense['totals']['expenses'] == 250
+    assert asset['table'] == 'assets' and asset['totals']['net_worth'] == 1000
+
+    # Reads, rejected writes and writes that change nothing publish nothing
+    client.get('/api/expenses')
+    client.post('/api/expenses', json={'category': 'Food'})
+    assert client.post('/api/loan/calculate', json={'principal': 100000, 'rate': 10, 'months': 12}).status_code == 200
+    assert listener.drain() == []
+
+    client.delete(f'/api/admin/delete/expenses/{expense_id}')
+    [deleted] = [e['data'] for e in listener.drain()]
+    assert deleted['month'] == '2024-01' and deleted['id'] == expense_id
+    assert deleted['totals']['expenses'] == 0
+
+
+def test_compute_posts_skip_version_reads(client):
+    reads = []
+    original = simple_backend.read_data_versions
+    simple_backend.read_data_versions = lambda conn: reads.append(1) or original(conn)
+    try:
+        assert client.post('/api/loan/calculate', json={'principal': 100000, 'rate': 10, 'months': 12}).status_code == 200
+        assert client.post('/api/loan/scenarios', json={'principal': 100000, 'rates': [9], 'tenures': [12]}).status_code == 200
+        assert reads == []
+        # Only the batched GET reads them, once, for its cache
+        assert client.post('/api/batch', json={'requests': ['/api/income']}).status_code == 200
+        assert len(reads) == 1
+        client.post('/api/income', json={'source': 'Salary', 'category': 'Job', 'amount': 100, 'date': '2024-01-01'})
+        assert len(reads) == 3
+    finally:
+        simple_backend.read_data_versions = original
+
+
+def test_totals_belong_to_the_written_rows_owner(client):
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Mine', 'amount': 100, 'date': '2024-01-10'})
+    conn = simple_backend.get_db_connection()
+    other = conn.execute(
+        "INSERT INTO expenses (user_id, category, description, amount, date, month) "
+        "VALUES (2, 'Rent', 'Theirs', 900, '2024-01-01', '2024-01')"
+    ).lastrowid
+    conn.commit()
+    conn.close()
+    listener = events.get_broker().subscribe()
+
+    client.put(f'/api/admin/edit/expense/{other}', json={
+        'category': 'Rent', 'description': 'Theirs', 'amount': 950, 'date': '2024-01-01'
+    })
+    [edited] = [e['data'] for e in listener.drain()]
+    assert edited['user_id'] == 2 and edited['totals']['expenses'] == 950
+
+    client.delete(f'/api/admin/delete/expenses/{other}')
+    [deleted] = [e['data'] for e in listener.drain()]
+    assert deleted['user_id'] == 2 and deleted['totals']['expenses'] == 0
+
+
+def test_event_stream(client):
+    response = client.get('/api/events')
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    chunks = iter(response.response)
+    assert next(chunks) == events.STREAM_PREAMBLE
+    assert events.get_broker().stats()['subscribers'] == 1
+
+    client.post('/api/liabilities', json={'name': 'Card', 'category': 'Credit', 'amount': 400, 'month': '2024-02'})
+    lines = next(chunks).decode().splitlines()
+    assert lines[1] == 'event: change' and lines[0].startswith('id: ')
+    change = json.loads(lines[2][len('data: '):])
+    assert change['table'] == 'liabilities' and change['totals']['net_worth'] == -400
+
+    response.close()
+    assert events.get_broker().stats()['subscribers'] == 0
+
+    # Servers with a small fixed thread pool turn streams off; pages poll instead
+    simple_backend.EVENT_STREAMS = False
+    try:
+        response = client.get('/api/events')
+    finally:
+        simple_backend.EVENT_STREAMS = True
+    assert response.status_code == 204 and events.get_broker().stats()['subscribers'] == 0
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Change events failure")
+        sys.exit(1)
+    print("✅ Change events are published and delivered")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Investment Valuation Test
+Checks RD maturity arithmetic, the vectorized point-in-time valuation,
+XIRR, the chit auction simulator, gold chit valuation and the endpoints
+built on them
+"""
+
+import sys
+from datetime import date
+
+import numpy as np
+import pytest
+
+import gold_prices
+import simple_backend
+from gold_prices import GoldPriceHistory
+from investments import (
+    add_months, chit_discounts, chit_prize_sweep, chit_schedule, rd_maturity_amount, value_gold_chits,
+    value_rds
+)
+from migrations import apply_migrations
+from xirr import xirr, year_fractions
+
+
+def test_calendar_months():
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2023, 1, 31), 1) == date(2023, 2, 28)
+    assert add_months(date(2024, 11, 15), 14) == date(2026, 1, 15)
+
+
+def test_maturity_compounds_quarterly():
+    # Each instalment compounds quarterly for the months it stays deposited
+    expected = sum(1000 * (1 + 0.07 / 4) ** ((12 - k) / 3) for k in range(12))
+    assert abs(rd_maturity_amount(1000, 7, 12) - expected) < 1e-6
+    assert rd_maturity_amount(1000, 0, 12) == 12000
+
+
+def test_valuation_of_many_rds():
+    rds = [
+        {'id': 1, 'monthly_amount': 1000, 'interest_rate': 7, 'tenure': 12, 'start_date': '2024-01-01'},
+        {'id': 2, 'monthly_amount': 500, 'interest_rate': 6.5, 'tenure': 24, 'start_date': '2024-03-31'}
+    ]
+    payments = [{'rd_id': 1, 'payment_date': str(add_months(date(2024, 1, 1), k)), 'amount': 1000} for k in range(12)]
+    payments += [{'rd_id': 2, 'payment_date': str(add_months(date(2024, 3, 31), k)), 'amount': 500} for k in range(3)]
+
+    matured, running = value_rds(rds, payments, '2025-06-30')
+    # Paid on schedule and valued after maturity: exactly the scheduled amount
+    assert matured['matured'] and matured['accrued_value'] == round(rd_maturity_amount(1000, 7, 12), 2)
+    assert running['payments_made'] == 3 and running['deposited'] == 1500
+    assert running['accrued_value'] > 1500 and not running['matured']
+    assert running['maturity_date'] == '2026-03-31'
+
+    early = value_rds(rds, payments, '2024-01-15')
+    assert early[0]['payments_made'] == 1 and early[1]['payments_made'] == 0
+
+
+def test_rd_endpoints_and_migration(client):
+    client.post('/api/rd', json={'bank_name': 'SBI', 'monthly_amount': 1000, 'interest_rate': 7, 'tenure': 12, 'start_date': '2024-01-31'})
+    rd = client.get('/api/rd').get_json()[0]
+    assert rd['maturity_date'] == '2025-01-31'
+    assert rd['maturity_amount'] == round(rd_maturity_amount(1000, 7, 12), 2)
+
+    client.post('/api/rd/1/payment', json={'payment_date': '2024-01-31', 'amount': 1000})
+    data = client.get('/api/rd/valuation?as_of=2024-07-31').get_json()
+    assert data['total_deposited'] == 1000
+    assert abs(data['total_value'] - 1000 * (1 + 0.07 / 4) ** 2) < 0.01
+
+    # Rows stored by the old 30-day, simple-interest calculation are revalued
+    conn = simple_backend.get_db_connection()
+    conn.execute("UPDATE recurring_deposits SET maturity_date = '2025-01-25', maturity_amount = 12455")
+    conn.execute('DELETE FROM schema_version WHERE version >= 6')
+    conn.commit()
+    apply_migrations(conn)
+    row = conn.execute('SELECT maturity_date, maturity_amount FROM recurring_deposits').fetchone()
+    conn.close()
+    assert tuple(row) == ('2025-01-31', round(rd_maturity_amount(1000, 7, 12), 2))
+
+
+def test_xirr():
+    # Example from the spreadsheet XIRR documentation
+    years = year_fractions(['2008-01-01', '2008-03-01', '2008-10-30', '2009-02-15', '2009-04-01'])
+    assert abs(xirr([-10000, 2750, 4250, 3250, 2750], years) - 0.373362535) < 1e-6
+
+    rates = xirr([[-100, 110], [-100, 90], [100, 50]], [0, 1])
+    assert np.allclose(rates[:2], [0.10, -0.10]) and np.isnan(rates[2])
+
+
+def test_chit_prize_sweep():
+    discounts, known = chit_discounts(100000, 20, {1: 35000})
+    assert discounts[0] == 35000 and known.sum() == 1 and discounts[-1] == 5000
+    schedule = chit_schedule(100000, 5000, discounts)
+    assert schedule['dividend'][0] == (35000 - 5000) / 20 and schedule['dividend'][-1] == 0
+    sweep = chit_prize_sweep('2024-01-10', schedule)
+
+    # Every row is the same instalments with the prize in a different month
+    flows = sweep['flows']
+    assert flows.shape == (20, 20)
+    assert np.allclose(flows.sum(axis=1), sweep['net_gain'])
+    years = year_fractions(sweep['date'])
+    for month in (0, 19):
+        assert abs(xirr(flows[month], years) - sweep['xirr'][month]) < 1e-9
+    assert sweep['position'][0] == 'borrower' and sweep['position'][-1] == 'saver'
+    assert sweep['xirr'][-1] > 0
+
+
+def test_chit_endpoints(client):
+    client.post('/api/chit', json={'chit_name': 'Office', 'total_value': 100000, 'monthly_amount': 5000, 'total_months': 20, 'start_date': '2024-01-10'})
+    assert client.post('/api/chit/1/auction', json={'month_number': 21, 'discount': 1000}).status_code == 400
+    assert client.post('/api/chit/1/auction', json={'month_number': 1, 'discount': 30000}).status_code == 200
+    # Re-recording a month corrects it
+    client.post('/api/chit/1/auction', json={'month_number': 1, 'discount': 35000, 'won_by_member': True})
+
+    data = client.get('/api/chit/1/simulation').get_json()
+    assert data['months']['discount'][0] == 35000 and data['months']['recorded'][:2] == [True, False]
+    assert data['won_month'] == 1
+    assert len(data['sweep']['xirr_pct']) == 20
+    assert client.get('/api/chit/2/simulation').status_code == 404
+    assert client.get('/api/chit/1/simulation?max_discount_pct=1').status_code == 400
+
+    client.delete('/api/chit/1')
+    conn = simple_backend.get_db_connection()
+    assert conn.execute('SELECT COUNT(*) FROM chit_auctions').fetchone()[0] == 0
+    conn.close()
+
+
+def test_investment_returns(client):
+    client.post('/api/rd', json={'bank_name': 'SBI', 'monthly_amount': 1000, 'interest_rate': 7, 'tenure': 12, 'start_date': '2024-01-01'})
+    for month in range(1, 13):
+        client.post('/api/rd/1/payment', json={'payment_date': f'2024-{month:02d}-01', 'amount': 1000})
+    client.post('/api/chit', json={'chit_name': 'Office', 'total_value': 20000, 'monthly_amount': 5000, 'total_months': 4, 'start_date': '2024-01-10'})
+    client.post('/api/chit/1/payment', json={'payment_date': '2024-01-10', 'amount': 5000})
+
+    data = client.get('/api/investments/returns?as_of=2025-06-30').get_json()
+    rd, chit = data['schemes'][0], data['schemes'][1]
+    # Quarterly compounding at 7% is an effective annual 7.19%
+    assert abs(rd['xirr_pct'] - 7.19) < 0.05 and rd['invested'] == 12000
+    assert chit['xirr_pct'] is None and chit['note'] == 'prize not taken yet'
+    assert data['recomputed'] == 2
+
+    # Only the chit is re-solved once its prize is recorded
+    client.post('/api/chit/1/auction', json={'month_number': 1, 'discount': 2000, 'won_by_member': True, 'auction_date': '2024-01-10'})
+    for month in range(2, 5):
+        client.post('/api/chit/1/payment', json={'payment_date': f'2024-{month:02d}-10', 'amount': 5000})
+    data = client.get('/api/investments/returns?as_of=2025-06-30').get_json()
+    assert data['recomputed'] == 1
+    assert data['schemes'][1]['gain'] == -2000 and data['schemes'][1]['xirr_pct'] > 0
+    assert data['portfolio']['invested'] == 32000
+    assert client.get('/api/investments/returns?as_of=2025-06-30').get_json()['recomputed'] == 0
+
+
+def test_gold_price_lookup_and_valuation():
+    history = GoldPriceHistory(['2024-02-01', '2024-01-01', '2024-01-01'], [6200, 5900, 6000])
+    assert list(history.prices) == [6000, 6200]
+    prices = history.price_on(['2023-12-31', '2024-01-20', '2024-02-01', '2025-01-01'])
+    assert np.isnan(prices[0]) and list(prices[1:]) == [6000, 6200, 6200]
+
+    chits = [{'id': 4, 'gold_weight': 2}, {'id': 9, 'gold_weight': 5}]
+    payments = [
+        {'gold_chit_id': 9, 'payment_date': '2024-01-02', 'amount': 3000},
+        {'gold_chit_id': 4, 'payment_date': '2024-01-02', 'amount': 6000},
+        {'gold_chit_id': 4, 'payment_date': '2024-02-02', 'amount': 6200},
+        {'gold_chit_id': 9, 'payment_date': '2024-03-02', 'amount': 6200}
+    ]
+    valuations, detail = value_gold_chits(chits, payments, history, '2024-02-28')
+    assert valuations[0]['grams'] == 2 and valuations[0]['progress_pct'] == 100
+    assert valuations[0]['current_value'] == 12400 and valuations[0]['gain'] == 200
+    # Payments after the valuation date are left out
+    assert valuations[1]['grams'] == 0.5 and valuations[1]['payments_made'] == 1
+    assert detail[0]['cumulative_grams'] == [1, 2] and detail[1]['cumulative_grams'] == [0.5]
+
+    early = payments + [{'gold_chit_id': 9, 'payment_date': '2023-12-20', 'amount': 6000}]
+    try:
+        value_gold_chits(chits, early, history, '2024-02-28')
+        assert False, 'a payment before the first price has no gram value'
+    except ValueError as e:
+        assert '2023-12-20' in str(e) and '2024-01-01' in str(e)
+
+
+def test_gold_chit_endpoints(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(gold_prices, 'GOLD_PRICE_CSV', str(tmp_path / 'gold.csv'))
+    assert client.get('/api/gold-chit/valuation').status_code == 404
+
+    with open(gold_prices.GOLD_PRICE_CSV, 'w') as f:
+        f.write('date,price_per_gram\n2024-01-01,6000\n2024-06-01,6600\n')
+    client.post('/api/gold-chit', json={'chit_name': 'Jeweller', 'gold_weight': 10, 'monthly_amount': 6000, 'total_months': 11, 'start_date': '2024-01-01'})
+    client.post('/api/gold-chit/1/payment', json={'payment_date': '2024-01-05', 'amount': 6000})
+    data = client.get('/api/gold-chit/valuation?as_of=2024-06-30').get_json()
+    assert data['total_grams'] == 1 and data['total_value'] == 6600
+
+    returns = client.get('/api/investments/returns?as_of=2024-06-30').get_json()['schemes'][0]
+    assert returns['type'] == 'gold_chit' and returns['gain'] == 600 and returns['xirr_pct'] > 10
+
+    response = client.post('/api/gold-chit/1/payment', json={'payment_date': '2023-12-05', 'amount': 6000})
+    assert response.status_code == 400 and '2024-01-01' in response.get_json()['error']
+    assert client.post('/api/gold-chit/1/payment', json={'payment_date': 'soon', 'amount': 6000}).status_code == 400
+    # Recorded before the price file went back far enough
+    conn = simple_backend.get_db_connection()
+    conn.execute("INSERT INTO gold_chit_payments (gold_chit_id, payment_date, amount, month_number) "
+                 "VALUES (1, '2023-12-05', 6000, 2)")
+    conn.commit()
+    conn.close()
+    for path in ('/api/gold-chit/valuation?as_of=2024-06-30', '/api/investments/returns?as_of=2024-06-30'):
+        response = client.get(path)
+        assert response.status_code == 400 and 'before the first gold price (2024-01-01)' in response.get_json()['error']
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Investment valuation failure")
+        sys.exit(1)
+    print("✅ Investment valuations are correct")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Loan Engine Test
+Compares the vectorized amortization schedules with a plain month-by-month
+simulation and checks the loan calculator endpoint built on them
+"""
+
+import sys
+
+import numpy as np
+
+import simple_backend
+from loan_engine import amortize, emi, paid_off_tolerance, scenario_grid
+
+
+def simulate(principal, annual_rate, months, extra_monthly=0, lump_sums=(), rate_changes=(), adjust='tenure'):
+    """Reference schedule, one month at a time"""
+    lumps = dict(lump_sums)
+    changes = dict(rate_changes)
+    rate = annual_rate / 1200
+    instalment = emi(principal, annual_rate, months)
+    balance = principal
+    rows = []
+    for month in range(1, 2 * months + 1):
+        if month in changes:
+            rate = changes[month] / 1200
+            if adjust == 'emi':
+                instalment = emi(balance, changes[month], max(months - month + 1, 1))
+        interest = balance * rate
+        payment = instalment + extra_monthly + lumps.get(month, 0)
+        if balance + interest - payment <= paid_off_tolerance(principal):
+            payment = balance + interest
+        balance = balance + interest - payment
+        rows.append((payment, interest, balance))
+        if balance <= 0:
+            break
+    return np.array(rows)
+
+
+CASES = [
+    dict(principal=500000, annual_rate=9, months=240),
+    dict(principal=500000, annual_rate=9, months=240, extra_monthly=2000, lump_sums=[(12, 50000), (60, 100000)]),
+    dict(principal=500000, annual_rate=9, months=240, rate_changes=[(24, 11), (100, 7.5)]),
+    dict(principal=500000, annual_rate=9, months=240, extra_monthly=1000, rate_changes=[(24, 11)], adjust='emi'),
+    dict(principal=100000, annual_rate=0, months=12),
+    # Large principals and very low rates leave more floating point residue
+    dict(principal=1e7, annual_rate=7.3, months=360),
+    dict(principal=1e8, annual_rate=0.1, months=360),
+    dict(principal=1e7, annual_rate=0.01, months=480),
+    # EMI no longer covers the interest: never repaid within the horizon
+    dict(principal=100000, annual_rate=12, months=60, rate_changes=[(3, 30)])
+]
+
+
+def test_schedule_matches_month_by_month_simulation():
+    for case in CASES:
+        schedule = amortize(**case)
+        expected = simulate(**case)
+        assert schedule.months == len(expected), case
+        assert np.allclose(schedule.payment, expected[:, 0], atol=1e-6), case
+        assert np.allclose(schedule.interest, expected[:, 1], atol=1e-6), case
+        assert np.allclose(np.maximum(schedule.balance, 0), np.maximum(expected[:, 2], 0), atol=1e-6), case
+    assert not amortize(**CASES[-1]).paid_off
+    for case in CASES[5:8]:
+        assert amortize(**case).months == case['months'] and amortize(**case).paid_off, case
+
+
+def test_calculate_endpoint_reports_simulated_savings():
+    client = simple_backend.app.test_client()
+    data = client.post('/api/loan/calculate', json={
+        'principal': 1000000, 'rate': 9, 'months': 240,
+        'extra_monthly': 2000, 'lump_sums': [{'month': 12, 'amount': 100000}]
+    }).get_json()
+    baseline = amortize(1000000, 9, 240)
+    assert data['baseline']['total_interest'] == round(baseline.total_interest, 2)
+    assert data['interest_saved'] > 0 and data['months_saved'] > 0
+    assert len(data['schedule']['balance']) == data['months']
+    assert data['schedule']['balance'][-1] == 0
+
+    extra_tip = next(tip for tip in data['tips'] if tip['type'] == 'extra_payment')
+    faster = amortize(1000000, 9, 240, extra_monthly=baseline.emi * 0.1)
+    assert extra_tip['savings'] == round(baseline.total_interest - faster.total_interest, 2)
+
+    large = client.post('/api/loan/calculate', json={'principal': 1e7, 'rate': 7.3, 'months': 360}).get_json()
+    assert large['months'] == 360 and large['paid_off']
+    extra_tip = next(tip for tip in large['tips'] if tip['type'] == 'extra_payment')
+    faster = amortize(1e7, 7.3, 360, extra_monthly=large['monthly_payment'] * 0.1)
+    assert extra_tip['months_saved'] == 360 - faster.months
+
+    assert client.post('/api/loan/calculate', json={'principal': 0, 'rate': 9, 'months': 12}).status_code == 400
+
+
+def test_scenario_grid_matches_individual_schedules():
+    grid = scenario_grid(1000000, rates=[0, 8, 10], tenures=[120, 240], extra_pcts=[0, 15],
+                         lump_sums=[0, 100000], lump_months=[12, 150])
+    # Lump sums at month 150 fall outside the 120-month tenure and are dropped
+    assert len(grid['rate']) == 3 * 2 * 2 * (1 + 1) + 3 * 1 * 2 * 1
+    for i in range(len(grid['rate'])):
+        lump_sums = [(int(grid['lump_month'][i]), grid['lump_sum'][i])] if grid['lump_sum'][i] else None
+        schedule = amortize(1000000, grid['rate'][i], int(grid['tenure'][i]),
+                            extra_monthly=grid['emi'][i] * grid['extra_pct'][i] / 100, lump_sums=lump_sums)
+        assert schedule.months == grid['months'][i]
+        assert abs(schedule.total_interest - grid['total_interest'][i]) < 1e-4
+
+
+def test_scenario_grid_large_principals():
+    # The longest tenure is the horizon: its baseline must still end at month 360
+    for principal in (5e6, 1e7, 1e8):
+        grid = scenario_grid(principal, rates=[0.1, 7.3, 9.25], tenures=[240, 360], extra_pcts=[0, 10])
+        for i in range(len(grid['rate'])):
+            schedule = amortize(principal, grid['rate'][i], int(grid['tenure'][i]),
+                                extra_monthly=grid['emi'][i] * grid['extra_pct'][i] / 100)
+            assert schedule.months == grid['months'][i], (principal, i)
+            assert abs(schedule.total_interest - grid['total_interest'][i]) < 1e-9 * principal
+        baseline = grid['extra_pct'] == 0
+        assert (grid['months'][baseline] == grid['tenure'][baseline]).all()
+        assert np.allclose(grid['interest_saved'][baseline], 0, atol=1e-9 * principal)
+
+
+def test_scenarios_endpoint_ranks_by_savings():
+    client = simple_backend.app.test_client()
+    data = client.post('/api/loan/scenarios', json={
+        'principal': 2000000, 'rates': {'start': 8, 'stop': 9, 'step': 0.5}, 'tenures': [180, 240],
+        'extra_pcts': [0, 10], 'lump_sums': [0, 100000], 'lump_months': [12, 24]
+    }).get_json()
+    saved = [row['interest_saved'] for row in data['scenarios']]
+    assert data['evaluated'] == 3 * 2 * 2 * 3
+    assert saved == sorted(saved, reverse=True)
+    assert data['best'] == data['scenarios'][0]
+
+    data = client.post('/api/loan/scenarios', json={
+        'principal': 5000000, 'rates': [9.25], 'tenures': [360], 'extra_pcts': [0, 10]
+    }).get_json()
+    assert [row['extra_pct'] for row in data['scenarios']] == [10, 0]
+    assert data['scenarios'][1]['months'] == 360 and data['scenarios'][1]['months_saved'] == 0
+
+    too_many = {'principal': 100000, 'rates': {'start': 1, 'stop': 20, 'step': 0.0001}, 'tenures': [12]}
+    assert client.post('/api/loan/scenarios', json=too_many).status_code == 400
+
+    small = {'principal': 100000, 'rates': [9], 'tenures': [12, 24]}
+    for bad in ({'limit': 0}, {'limit': -3}, {'tenures': [12.5]}, {'tenures': {'start': 12, 'stop': 13, 'step': 0.5}},
+                {'lump_sums': [1000], 'lump_months': [6.5]}):
+        response = client.post('/api/loan/scenarios', json={**small, **bad})
+        assert response.status_code == 400, bad
+    assert len(client.post('/api/loan/scenarios', json={**small, 'limit': 1}).get_json()['scenarios']) == 1
+    assert client.post('/api/loan/scenarios', json={**small, 'tenures': [12.0, 24]}).status_code == 200
+
+
+if __name__ == '__main__':
+    try:
+        test_schedule_matches_month_by_month_simulation()
+        test_calculate_endpoint_reports_simulated_savings()
+        test_scenario_grid_matches_individual_schedules()
+        test_scenario_grid_large_principals()
+        test_scenarios_endpoint_ranks_by_savings()
+        print("✅ Loan schedules are correct")
+    except AssertionError as e:
+        print(f"❌ Loan engine failure: {e}")
+        sys.exit(1)
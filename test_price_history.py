@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Price History Test
+Builds a small store from CSV and checks the vectorized indicators against
+one-symbol reference loops, plus the /api/prices endpoints
+"""
+
+import csv
+import sys
+
+import numpy as np
+import pytest
+
+import price_history
+import simple_backend
+from price_history import build_store, get_store, indicators, rolling_mean
+
+SYMBOLS = 40
+DAYS = 600
+
+
+def write_prices(path, seed=3):
+    """Random-walk closes; LATE lists on day 200 and GAPPY misses every tenth day"""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2021-01-01', np.arange(DAYS), roll='forward')
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (SYMBOLS, DAYS)), axis=1))
+    names = [f'S{i:02d}' for i in range(SYMBOLS - 2)] + ['LATE', 'GAPPY']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'symbol', 'close'])
+        for day, date in enumerate(dates):
+            for i, name in enumerate(names):
+                if (name == 'LATE' and day < 200) or (name == 'GAPPY' and day % 10 == 5):
+                    continue
+                writer.writerow([str(date), name, round(closes[i, day], 4)])
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A store built from write_prices() that the /api/prices endpoints read"""
+    write_prices(tmp_path / 'prices.csv')
+    build_store(str(tmp_path / 'prices.csv'), str(tmp_path))
+    monkeypatch.setattr(price_history, 'PRICE_HISTORY_DIR', str(tmp_path))
+    return get_store()
+
+
+def rsi_reference(prices, window):
+    change = np.diff(prices)
+    gain, loss = np.maximum(change, 0), np.maximum(-change, 0)
+    avg_gain, avg_loss = gain[:window].mean(), loss[:window].mean()
+    for k in range(window, len(change)):
+        avg_gain = (avg_gain * (window - 1) + gain[k]) / window
+        avg_loss = (avg_loss * (window - 1) + loss[k]) / window
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def test_indicators_match_reference(store):
+    assert len(store.symbols) == SYMBOLS and len(store.dates) == DAYS
+    gappy = np.asarray(store.close[store.index['GAPPY']], dtype=float)
+    assert not np.isnan(gappy).any() and gappy[5] == gappy[4]
+    late = np.asarray(store.close[store.index['LATE']], dtype=float)
+    assert np.isnan(late[:200]).all() and not np.isnan(late[200:]).any()
+
+    result = indicators(store, store.rows(), '2022-01-01', '2023-03-31', (10, 50), 20, 14)
+    columns = result['columns']
+    stop = store.day('2023-03-31')
+    start = store.day('2022-01-01', side='left')
+    for symbol in ('S00', 'LATE', 'GAPPY'):
+        i = store.index[symbol]
+        x = np.asarray(store.close[i, :stop], dtype=float)
+        assert abs(columns['sma_50'][i] - x[-50:].mean()) < 1e-9
+        returns = np.diff(np.log(x[-21:]))
+        assert abs(columns['volatility_20_pct'][i] - returns.std(ddof=1) * np.sqrt(252) * 100) < 1e-9
+        assert abs(columns['rsi_14'][i] - rsi_reference(x[-140:], 14)) < 1e-9
+        period = x[start:]
+        assert abs(columns['return_pct'][i] - (period[-1] / period[0] - 1) * 100) < 1e-9
+        worst = (period / np.maximum.accumulate(period) - 1).min() * 100
+        assert abs(columns['max_drawdown_pct'][i] - worst) < 1e-9
+
+    sma = rolling_mean(np.array([[np.nan, 1.0, 2.0, 3.0, 4.0]]), 2)
+    assert np.isnan(sma[0, :2]).all() and list(sma[0, 2:]) == [1.5, 2.5, 3.5]
+
+
+def test_price_endpoints(store):
+    client = simple_backend.app.test_client()
+    data = client.get('/api/prices/indicators?from=2022-01-01&sma=20&sort=return_pct&limit=5').get_json()
+    returns = data['columns']['return_pct']
+    assert data['symbols'] == 5 and returns == sorted(returns, reverse=True)
+    assert client.get('/api/prices/indicators?symbols=NOPE').status_code == 404
+    assert client.get('/api/prices/indicators?sma=0').status_code == 400
+
+    data = client.get('/api/prices/late?from=2021-01-01&to=2021-12-31&sma=5').get_json()
+    first = data['series']['close'].index(next(c for c in data['series']['close'] if c is not None))
+    assert data['symbol'] == 'LATE' and data['series']['sma_5'][first + 4] is not None
+    assert data['series']['sma_5'][first + 3] is None
+
+
+if __name__ == '__main__':
+    # The store fixture builds into pytest's tmp_path
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Price history failure")
+        sys.exit(1)
+    print("✅ Price history indicators are correct")
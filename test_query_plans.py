@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Test
+Calls every read endpoint against a throwaway database, captures the SQL
+each one runs and fails if any statement falls back to a full table scan
+"""
+
+import re
+import sqlite3
+import sys
+
+import pytest
+
+import gold_prices
+import simple_backend
+
+# Tables that are small by nature or deliberately listed in full
+FULL_SCAN_ALLOWED = {
+    'users', 'schema_version', 'monthly_rollups', 'data_versions',
+    'expense_templates', 'income_templates', 'asset_templates', 'liability_templates',
+    'recurring_deposits', 'chit_funds', 'gold_chits'
+}
+
+READ_ENDPOINTS = [
+    '/api/expenses',
+    '/api/expenses?limit=10&from=2024-01-01&to=2024-12-31&fields=id,date,amount',
+    '/api/expenses?limit=10&cursor=WyIyMDI0LTAxLTE1IiwgMV0',
+    '/api/assets?limit=10',
+    '/api/liabilities?limit=10&from=2024-01',
+    '/api/income?limit=10',
+    '/api/expenses/month/2024-01',
+    '/api/expenses/total/2024-01',
+    '/api/expenses/category/2024-01',
+    '/api/dashboard?month=2024-01',
+    '/api/assets',
+    '/api/liabilities',
+    '/api/networth/2024-01',
+    '/api/income',
+    '/api/admin/reports',
+    '/api/import/jobs',
+    '/api/ai/investment-suggestions',
+    '/api/ai/monthly-report',
+    '/api/financial-health',
+    '/api/reports/yearly?year=2024',
+    '/api/reports/monthly?month=2024-01',
+    '/api/reports/weekly?date=2024-01-15',
+    '/api/templates/expense',
+    '/api/templates/expense/categories',
+    '/api/rd',
+    '/api/rd?summary=true',
+    '/api/rd/valuation?as_of=2024-06-30',
+    '/api/chit',
+    '/api/chit?summary=true',
+    '/api/chit/1/simulation',
+    '/api/investments/returns?as_of=2024-06-30',
+    '/api/gold-chit',
+    '/api/gold-chit?summary=true',
+    '/api/gold-chit/valuation?as_of=2024-06-30'
+]
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@pytest.fixture
+def database(database, monkeypatch):
+    # One pooled connection, so the trace callback sees every statement
+    monkeypatch.setattr(simple_backend, 'DB_POOL_SIZE', 1)
+    return database
+
+
+@pytest.fixture
+def client(client, tmp_path, monkeypatch):
+    """A little data in every table the read endpoints query"""
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+    client.post('/api/assets', json={'name': 'Savings', 'category': 'Cash', 'value': 50000, 'month': '2024-01'})
+    client.post('/api/liabilities', json={'name': 'Car Loan', 'category': 'Car Loan', 'amount': 20000, 'month': '2024-01'})
+    client.post('/api/income', json={'source': 'Salary', 'category': 'Salary', 'amount': 60000, 'date': '2024-01-01'})
+    client.post('/api/rd', json={'bank_name': 'SBI', 'monthly_amount': 1000, 'interest_rate': 7, 'tenure': 12, 'start_date': '2024-01-01'})
+    client.post('/api/rd/1/payment', json={'payment_date': '2024-01-05', 'amount': 1000})
+    client.post('/api/chit', json={'chit_name': 'Office', 'total_value': 100000, 'monthly_amount': 5000, 'total_months': 20, 'start_date': '2024-01-10'})
+    client.post('/api/chit/1/auction', json={'month_number': 1, 'discount': 30000})
+    prices = tmp_path / 'gold_prices.csv'
+    prices.write_text('date,price_per_gram\n2024-01-01,6000\n')
+    monkeypatch.setattr(gold_prices, 'GOLD_PRICE_CSV', str(prices))
+    client.post('/api/gold-chit', json={'chit_name': 'Jeweller', 'gold_weight': 10, 'monthly_amount': 6000, 'total_months': 11, 'start_date': '2024-01-01'})
+    client.post('/api/gold-chit/1/payment', json={'payment_date': '2024-01-05', 'amount': 6000})
+    return client
+
+
+def capture_statements(client, path):
+    """Run one request and return the SELECT statements it executed"""
+    statements = []
+    conn = simple_backend.get_db_connection()
+    conn.set_trace_callback(statements.append)
+    conn.close()
+    try:
+        response = client.get(path)
+    finally:
+        conn = simple_backend.get_db_connection()
+        conn.set_trace_callback(None)
+        conn.close()
+    assert response.status_code == 200, f'{path} returned {response.status_code}'
+    return [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+
+def full_scans(sql):
+    """Tables the planner would scan without an index for this statement"""
+    conn = sqlite3.connect(simple_backend.DB_PATH)
+    try:
+        plan = conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    finally:
+        conn.close()
+    tables = []
+    for row in plan:
+        match = FULL_SCAN.match(row[3])
+        if match and match.group(1) not in FULL_SCAN_ALLOWED:
+            tables.append(match.group(1))
+    return tables
+
+
+def test_read_endpoints_use_indexes(client):
+    problems = []
+    for path in READ_ENDPOINTS:
+        for sql in capture_statements(client, path):
+            tables = full_scans(sql)
+            if tables:
+                problems.append(f'{path}: full scan of {", ".join(tables)} in: {" ".join(sql.split())}')
+    assert not problems, 'Full table scans found:\n' + '\n'.join(problems)
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Full table scans found")
+        sys.exit(1)
+    print("✅ All read endpoints use indexes")
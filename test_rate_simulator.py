@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Floating-Rate Simulation Test
+Checks the Monte Carlo closure strategies against the deterministic loan
+engine and that a seed reproduces the same bands in and out of the pool
+"""
+
+import sys
+
+import simple_backend
+from loan_engine import amortize
+from rate_simulator import shutdown_executor, simulate_strategies
+
+LOAN = dict(principal=2000000, rate=9, months=180, monthly_income=100000)
+
+
+def test_zero_volatility_matches_fixed_rate_schedules():
+    result = simulate_strategies(**LOAN, paths=50, volatility=0, seed=1)['strategies']
+    baseline = amortize(2000000, 9, 180)
+    expected = {
+        'current': baseline,
+        'increase_emi': amortize(2000000, 9, 180, extra_monthly=baseline.emi * 0.2),
+        'lump_sum': amortize(2000000, 9, 180, lump_sums=[(1, 200000)]),
+        'balance_transfer': amortize(2000000, 9 * 0.8, 180),
+        'biweekly': amortize(2000000, 9, 180, extra_monthly=baseline.emi / 12),
+        'annual_bonus': amortize(2000000, 9, 180, lump_sums=[(month, 200000) for month in range(12, 181, 12)])
+    }
+    for name, schedule in expected.items():
+        bands = result[name]
+        assert abs(bands['mean_interest'] - schedule.total_interest) < 0.01, name
+        assert bands['payoff_month']['p5'] == bands['payoff_month']['p95'] == schedule.months, name
+        assert bands['unpaid_share'] == 0
+
+
+def test_unchanged_rate_repays_large_loan_at_its_tenure():
+    for principal, rate in ((1e7, 7.3), (1e8, 0.1)):
+        result = simulate_strategies(principal, rate, 360, 100000, paths=20, volatility=0, seed=3)['strategies']
+        bands = result['current']
+        assert bands['payoff_month']['p5'] == bands['payoff_month']['p95'] == 360, principal
+        assert bands['unpaid_share'] == 0
+        assert abs(bands['mean_interest'] - amortize(principal, rate, 360).total_interest) < 1e-9 * principal
+
+
+def test_seed_is_reproducible_in_process_pool():
+    settings = dict(LOAN, paths=4500, drift=0.2, volatility=1.2, seed=11)
+    local = simulate_strategies(**settings, pool_threshold=10 ** 9)
+    try:
+        pooled = simulate_strategies(**settings, pool_threshold=1, workers=2)
+    finally:
+        shutdown_executor()
+    assert pooled['ran_in_process_pool'] and not local['ran_in_process_pool']
+    assert pooled['strategies'] == local['strategies']
+
+    bands = local['strategies']['current']['total_interest']
+    assert bands['p5'] < bands['p50'] < bands['p95']
+
+
+def test_quick_loan_closure_simulation_mode():
+    client = simple_backend.app.test_client()
+    body = {'loan_amount': 2000000, 'interest_rate': 9, 'remaining_months': 180, 'monthly_income': 100000}
+    data = client.post('/api/ai/quick-loan-closure', json=dict(body, simulate={'paths': 500, 'seed': 5})).get_json()
+    assert data['simulation']['seed'] == 5
+    assert set(data['simulation']['strategies']) >= {'current', 'increase_emi', 'balance_transfer'}
+    assert 'simulation' not in client.post('/api/ai/quick-loan-closure', json=body).get_json()
+    too_many = dict(body, simulate={'paths': simple_backend.MAX_SIMULATION_PATHS + 1})
+    assert client.post('/api/ai/quick-loan-closure', json=too_many).status_code == 400
+
+
+if __name__ == '__main__':
+    try:
+        test_zero_volatility_matches_fixed_rate_schedules()
+        test_unchanged_rate_repays_large_loan_at_its_tenure()
+        test_seed_is_reproducible_in_process_pool()
+        test_quick_loan_closure_simulation_mode()
+        print("✅ Floating-rate simulations are consistent")
+    except AssertionError as e:
+        print(f"❌ Simulation failure: {e}")
+        sys.exit(1)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Monthly Rollup Consistency Test
+Drives the write endpoints against a throwaway database and checks that
+monthly_rollups always matches totals recomputed from the raw tables
+"""
+
+import ast
+import sys
+
+import pytest
+
+import migrations
+import simple_backend
+from rollups import check_rollups, rebuild_rollups
+
+
+def assert_consistent():
+    conn = simple_backend.get_db_connection()
+    mismatches = check_rollups(conn)
+    conn.close()
+    assert not mismatches, mismatches
+
+
+def test_write_paths_keep_rollups_current(client):
+
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Dinner', 'amount': 400, 'date': '2024-01-20'})
+    client.post('/api/assets', json={'name': 'Savings', 'category': 'Cash', 'value': 50000, 'month': '2024-01'})
+    client.post('/api/liabilities', json={'name': 'Car Loan', 'category': 'Car Loan', 'amount': 20000, 'month': '2024-01'})
+    client.post('/api/income', json={'source': 'Salary', 'category': 'Salary', 'amount': 60000, 'date': '2024-01-01'})
+    assert_consistent()
+
+    networth = client.get('/api/networth/2024-01').get_json()
+    assert networth['total_assets'] == 50000
+    assert networth['net_worth'] == 30000
+
+    # Moving an expense to another month and category
+    client.put('/api/admin/edit/expense/1', json={'category': 'Travel', 'description': 'Cab', 'amount': 300, 'date': '2024-02-03'})
+    client.put('/api/admin/edit/asset/1', json={'name': 'Savings', 'category': 'Cash', 'value': 55000, 'month': '2024-01'})
+    client.put('/api/income/1', json={'source': 'Salary', 'category': 'Salary', 'amount': 65000, 'date': '2024-02-01'})
+    assert_consistent()
+
+    client.delete('/api/admin/delete/expenses/2')
+    client.delete('/api/admin/delete/liabilities/1')
+    client.delete('/api/income/1')
+    assert_consistent()
+
+    yearly = client.get('/api/reports/yearly?year=2024').get_json()
+    assert yearly['monthly_data'][1]['expenses'] == 300
+    assert yearly['monthly_data'][0]['assets'] == 55000
+
+    # Only the February expense row and the January asset row remain
+    conn = simple_backend.get_db_connection()
+    rows = conn.execute('SELECT COUNT(*) FROM monthly_rollups').fetchone()[0]
+    conn.close()
+    assert rows == 2
+
+
+def test_rebuild_repairs_drift(client):
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+
+    conn = simple_backend.get_db_connection()
+    conn.execute('UPDATE monthly_rollups SET expense_total = 1')
+    conn.commit()
+    assert check_rollups(conn)
+    rebuild_rollups(conn)
+    conn.commit()
+    assert not check_rollups(conn)
+    conn.close()
+
+
+def test_rebuild_refreshes_cached_reports(client):
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+
+    # Drift written behind the triggers' back is what the report caches
+    conn = simple_backend.get_db_connection()
+    conn.execute('UPDATE monthly_rollups SET expense_total = 1')
+    conn.commit()
+    conn.close()
+    path = '/api/reports/yearly?year=2024'
+    stale = client.get(path)
+    assert stale.get_json()['monthly_data'][0]['expenses'] == 1
+
+    assert client.post('/api/admin/rollups/rebuild').status_code == 200
+    assert client.get(path, headers={'If-None-Match': stale.headers['ETag']}).status_code == 200
+    fresh = client.get(path)
+    assert fresh.headers['ETag'] != stale.headers['ETag']
+    assert fresh.get_json()['monthly_data'][0]['expenses'] == 250
+
+
+def test_rollup_migration_is_repeatable(client):
+    # Re-running the rollup migration on a database with data rebuilds the same rollups
+    client.post('/api/expenses', json={'category': 'Food', 'description': 'Lunch', 'amount': 250, 'date': '2024-01-15'})
+    client.post('/api/income', json={'source': 'Salary', 'category': 'Job', 'amount': 5000, 'date': '2024-01-01'})
+    conn = simple_backend.get_db_connection()
+    triggers = "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%rollup%' ORDER BY name"
+    before = conn.execute(triggers).fetchall()
+    for (name,) in before:
+        conn.execute(f'DROP TRIGGER {name}')
+    conn.execute('DROP TABLE monthly_rollups')
+    conn.execute('DELETE FROM schema_version WHERE version >= 3')
+    conn.commit()
+    migrations.apply_migrations(conn)
+    assert conn.execute(triggers).fetchall() == before
+    conn.close()
+    assert_consistent()
+
+
+def test_migrations_are_frozen():
+    # Shipped migrations must not change when application code does
+    tree = ast.parse(open(migrations.__file__, encoding='utf-8').read())
+    imported = {alias.name.split('.')[0] for node in tree.body if isinstance(node, ast.Import) for alias in node.names}
+    imported |= {node.module.split('.')[0] for node in tree.body if isinstance(node, ast.ImportFrom)}
+    assert imported <= set(sys.stdlib_module_names), imported - set(sys.stdlib_module_names)
+
+
+if __name__ == '__main__':
+    # The database fixtures live in conftest.py
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Rollup mismatch")
+        sys.exit(1)
+    print("✅ Monthly rollups stay consistent")
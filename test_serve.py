@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Production Server Test
+Checks the serve.py settings (flags and environment), that a forked
+worker starts without the master's database connections or process pool,
+and that open event streams cannot take every worker thread
+"""
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import events
+import rate_simulator
+import serve
+import simple_backend
+
+
+def test_options_from_flags_and_environment():
+    os.environ['SERVER_THREADS'] = '8'
+    try:
+        args = serve.parse_args(['--bind', '127.0.0.1:8000', '--workers', '3', '--max-requests', '100'])
+    finally:
+        del os.environ['SERVER_THREADS']
+    options = serve.gunicorn_options(args)
+    assert options['bind'] == '127.0.0.1:8000' and options['workers'] == 3 and options['threads'] == 8
+    assert options['worker_class'] == 'gthread' and options['max_requests'] == 100
+    assert options['preload_app'] and options['post_fork'] is serve.post_fork
+    assert serve.parse_args([]).workers == serve.cpu_count()
+
+
+def test_post_fork_drops_inherited_state():
+    simple_backend.get_pool()
+    rate_simulator._executor = object()
+    inherited = events.get_broker()
+    serve.post_fork(None, None)
+    assert simple_backend._pool is None and rate_simulator._executor is None
+    assert events.get_broker() is not inherited
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_listening(port, process, seconds=15):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        assert process.poll() is None, 'server exited early'
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError('server did not start')
+
+
+def test_event_streams_leave_threads_for_requests(tmp_path):
+    if serve.BaseApplication is None:
+        return  # gunicorn is not installed: the fallback server has a thread per connection
+    threads, port = 2, free_port()
+    db_path = str(tmp_path / 'serve.db')
+    script = (f'import serve, simple_backend; simple_backend.DB_PATH = {db_path!r}; '
+              f'serve.main(["--bind", "127.0.0.1:{port}", "--workers", "1", "--threads", "{threads}"])')
+    process = subprocess.Popen([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    streams = []
+    try:
+        wait_until_listening(port, process)
+        for _ in range(threads):
+            stream = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            stream.request('GET', '/api/events', headers={'Accept': 'text/event-stream'})
+            streams.append(stream)
+        # Browsers keep the stream connections open; a normal request must still be served
+        client = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        client.request('GET', '/api/expenses')
+        assert client.getresponse().status == 200
+        client.close()
+        assert [stream.getresponse().status for stream in streams] == [204] * threads
+    finally:
+        for stream in streams:
+            stream.close()
+        process.terminate()
+        process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    # The stream test runs its server on a database in pytest's tmp_path
+    if pytest.main(['-q', __file__]) != 0:
+        print("❌ Production server failure")
+        sys.exit(1)
+    print("✅ Production server settings are correct")
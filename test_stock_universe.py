@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Stock Universe Test
+Checks the screener against a plain filter-and-sort over the records, and
+that /api/ai/stock-analysis still returns the original analysis
+"""
+
+import random
+import sys
+
+import simple_backend
+from stock_universe import StockUniverse, get_universe
+
+SECTORS = ['Banking', 'Power', 'Steel', 'Telecom', 'Mining']
+
+
+def random_universe(count, seed=7):
+    rng = random.Random(seed)
+    stocks = []
+    for i in range(count):
+        price = round(rng.uniform(10, 3000), 1)
+        stocks.append({
+            'name': f'Stock {i}', 'symbol': f'S{i}', 'current_price': price,
+            'pe_ratio': rng.choice([-1, round(rng.uniform(3, 80), 1)]), 'market_cap': rng.randint(1000, 900000),
+            'sector': rng.choice(SECTORS), 'dividend_yield': round(rng.uniform(0, 7), 1),
+            'debt_to_equity': round(rng.uniform(0, 3), 2), 'roe': round(rng.uniform(-20, 40), 1),
+            'revenue_growth': round(rng.uniform(-10, 50), 1), 'profit_margin': round(rng.uniform(-10, 30), 1),
+            'recommendation': rng.choice(['Buy', 'Hold', 'Avoid']), 'target_price': round(price * 1.1, 1),
+            'risk': rng.choice(['Low', 'Medium', 'High']), 'reasons': [], 'concerns': []
+        })
+    return stocks
+
+
+def test_screener_matches_plain_filter():
+    stocks = random_universe(5000)
+    universe = StockUniverse(stocks)
+    rows, total = universe.screen({'pe_ratio': (None, 15), 'roe': (12, None), 'debt_to_equity': (None, 1)},
+                                  sectors=['Banking', 'Power'], sort='dividend_yield', direction='desc', limit=25)
+    expected = [s for s in stocks if 0 < s['pe_ratio'] <= 15 and s['roe'] >= 12 and s['debt_to_equity'] <= 1
+                and s['sector'] in ('Banking', 'Power')]
+    expected.sort(key=lambda s: s['dividend_yield'], reverse=True)
+    assert total == len(expected)
+    assert [stocks[i]['symbol'] for i in rows] == [s['symbol'] for s in expected[:25]]
+
+    # Loss-making stocks (P/E <= 0) rank after every positive P/E
+    rows, _ = universe.screen(sort='pe_ratio', direction='asc', limit=5000)
+    ranked = [stocks[i]['pe_ratio'] for i in rows]
+    positives = [pe for pe in ranked if pe > 0]
+    assert ranked[:len(positives)] == sorted(positives)
+
+
+def test_stock_analysis_endpoint():
+    client = simple_backend.app.test_client()
+    data = client.get('/api/ai/stock-analysis').get_json()
+    assert data['total_stocks'] == len(get_universe()) == 20
+    assert [s['symbol'] for s in data['top_picks']['best_pe_ratio']] == ['CANBK', 'ONGC', 'BANKBARODA', 'COALINDIA', 'UNIONBANK']
+    assert len(data['by_recommendation']['strong_buy']) == 5
+
+    data = client.get('/api/stocks/screener?sector=Banking&sort=pe_ratio&order=asc&limit=2&fields=symbol').get_json()
+    assert data['total_matches'] == 5 and [s['symbol'] for s in data['stocks']] == ['CANBK', 'BANKBARODA']
+    assert client.get('/api/stocks/screener?limit=0').status_code == 400
+
+
+if __name__ == '__main__':
+    try:
+        test_screener_matches_plain_filter()
+        test_stock_analysis_endpoint()
+        print("✅ Stock screener is correct")
+    except AssertionError as e:
+        print(f"❌ Stock screener failure: {e}")
+        sys.exit(1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Vectorized XIRR for the Personal Finance Tracker
+Solves sum(a[t] * (1 + r) ** -years[t]) = 0 for the annual rate r of many
+cash flow series at once: Newton's method on every row together, then
+bisection for the rows Newton could not settle (flat slopes, overshoot
+past -100%). Series whose NPV is negative or positive at every rate have
+no IRR and give NaN.
+"""
+
+import numpy as np
+
+MIN_RATE = -0.9999
+MAX_RATE = 100.0
+TOLERANCE = 1e-10
+NEWTON_ITERATIONS = 50
+BISECTION_ITERATIONS = 60
+
+
+def year_fractions(dates):
+    """Years from the first date (datetime64[D] or ISO strings), on a 365-day basis"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    return (dates - dates.min(axis=-1, keepdims=True)).astype(float) / 365.0
+
+
+def npv(rates, amounts, years):
+    return (amounts * (1 + rates[:, None]) ** -years).sum(axis=1)
+
+
+def xirr(amounts, years, guess=0.1):
+    """Annual internal rate of return of each row of `amounts`
+
+    amounts  (series x flows) array, or one series as a 1-D array
+    years    flow times in years, (flows,) shared by all rows or (series x flows)
+    Rows without both an inflow and an outflow have no rate and give NaN.
+    """
+    single = np.ndim(amounts) == 1
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    years = np.broadcast_to(np.asarray(years, dtype=float), amounts.shape)
+    scale = np.abs(amounts).sum(axis=1)
+    solvable = (amounts > 0).any(axis=1) & (amounts < 0).any(axis=1)
+
+    rates = np.full(len(amounts), float(guess))
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(NEWTON_ITERATIONS):
+            discount = (1 + rates[:, None]) ** -years
+            value = (amounts * discount).sum(axis=1)
+            slope = (-years * amounts * discount / (1 + rates[:, None])).sum(axis=1)
+            step = np.where(slope != 0, value / slope, 0.0)
+            rates = np.clip(rates - step, MIN_RATE, MAX_RATE)
+            if (np.abs(step) < TOLERANCE).all():
+                break
+        converged = np.isfinite(rates) & (np.abs(npv(rates, amounts, years)) <= 1e-7 * np.maximum(scale, 1))
+
+        retry = solvable & ~converged
+        if retry.any():
+            rates[retry] = _bisect(amounts[retry], years[retry], guess)
+    rates[~solvable] = np.nan
+    return float(rates[0]) if single else rates
+
+
+# Rates scanned for a sign change when Newton fails; series with several
+# sign changes in their flows can have more than one root
+BRACKET_GRID = np.concatenate([np.linspace(MIN_RATE, 1.0, 201)[:-1], np.geomspace(1.0, MAX_RATE, 50)])
+
+
+def _bisect(amounts, years, guess=0.1):
+    """Bisection inside the grid bracket nearest `guess`; NaN where NPV never changes sign"""
+    values = np.stack([npv(np.full(len(amounts), rate), amounts, years) for rate in BRACKET_GRID], axis=1)
+    changes = np.sign(values[:, :-1]) != np.sign(values[:, 1:])
+    distance = np.abs((BRACKET_GRID[:-1] + BRACKET_GRID[1:]) / 2 - guess)
+    nearest = np.argmin(np.where(changes, distance, np.inf), axis=1)
+    bracketed = changes.any(axis=1)
+
+    low = BRACKET_GRID[nearest]
+    high = BRACKET_GRID[nearest + 1]
+    low_value = values[np.arange(len(amounts)), nearest]
+    for _ in range(BISECTION_ITERATIONS):
+        middle = (low + high) / 2
+        value = npv(middle, amounts, years)
+        same = np.sign(value) == np.sign(low_value)
+        low = np.where(same, middle, low)
+        low_value = np.where(same, value, low_value)
+        high = np.where(same, high, middle)
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def xirr_series(series, guess=0.1):
+    """XIRR of cash flow series of different lengths in one solve
+
+    series  [(amounts, dates), ...]; shorter series are padded with zero
+            flows on their own first date, which leaves their NPV unchanged
+    """
+    if not series:
+        return np.zeros(0)
+    width = max(len(amounts) for amounts, _ in series)
+    amounts = np.zeros((len(series), max(width, 1)))
+    dates = np.zeros(amounts.shape, dtype='datetime64[D]')
+    for row, (flows, when) in enumerate(series):
+        when = np.asarray(when, dtype='datetime64[D]')
+        amounts[row, :len(flows)] = flows
+        if len(when):
+            dates[row] = when.min()
+            dates[row, :len(when)] = when
+    return xirr(amounts, year_fractions(dates), guess)